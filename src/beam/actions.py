@@ -7,6 +7,7 @@ from django.http import HttpRequest, HttpResponse
 from django.utils.translation import gettext as _
 from django.utils.translation import gettext_lazy
 
+from .reference import use_reference_choices
 from .utils import check_permission
 
 
@@ -41,6 +42,7 @@ class Action:
             form_class = self.get_form_class()
             if form_class is not None:
                 self._form = form_class(data=self.data, prefix=self.id)
+                use_reference_choices(self._form)
         return self._form
 
     def get_form_class(self) -> Optional[Type[BaseForm]]:
@@ -0,0 +1,44 @@
+from logging import getLogger
+
+from django.apps import AppConfig, apps
+from django.conf import settings
+from django.core.signals import request_started
+
+logger = getLogger(__name__)
+
+WARM_UP_DISPATCH_UID = "beam.apps.warm_up"
+
+
+def warm_up_on_first_request(**kwargs):
+    # only the first request, concurrent ones find the receiver disconnected
+    if not request_started.disconnect(dispatch_uid=WARM_UP_DISPATCH_UID):
+        return
+
+    from .warmup import warm_up
+
+    report = warm_up()
+    for viewset, error in report.errors:
+        logger.error("Warming up %s failed", viewset, exc_info=error)
+    logger.info(
+        "Warmed up %d viewsets with %d facets in %.3fs",
+        report.viewsets,
+        report.facets,
+        report.duration,
+    )
+
+
+class BeamConfig(AppConfig):
+    name = "beam"
+
+    def ready(self):
+        from .reference import reference_models
+
+        for label in getattr(settings, "BEAM_REFERENCE_MODELS", []):
+            reference_models.register(apps.get_model(label))
+
+        if getattr(settings, "BEAM_WARM_UP", False):
+            # other apps aren't ready yet and management commands don't need
+            # it, so wait for the first request before importing the urlconf
+            request_started.connect(
+                warm_up_on_first_request, dispatch_uid=WARM_UP_DISPATCH_UID
+            )
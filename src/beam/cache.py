@@ -0,0 +1,105 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from django.core.cache import BaseCache
+
+
+def make_cache_key(prefix: str, *parts) -> str:
+    """
+    Build a cache key from arbitrary parts, hashing them to keep the key short
+    and free of characters that some cache backends reject.
+    """
+    digest = hashlib.sha1("\n".join(str(part) for part in parts).encode("utf-8"))
+    return "beam:{}:{}".format(prefix, digest.hexdigest())
+
+
+class FragmentCache:
+    """
+    Cache rendered fragments for a known set of items using a single
+    round trip to the cache for reading and one for writing.
+
+    Fragments that are missing are recorded via ``set`` and written in bulk
+    when ``flush`` is called, usually after the response has been rendered.
+    """
+
+    def __init__(
+        self,
+        cache: BaseCache,
+        keys: Dict[Hashable, str],
+        timeout: Optional[int] = None,
+    ):
+        self.cache = cache
+        self.keys = keys
+        self.timeout = timeout
+        self.fragments = cache.get_many(keys.values()) if keys else {}
+        self.missing: Dict[str, str] = {}
+
+    def get(self, item: Hashable) -> Optional[str]:
+        key = self.keys.get(item)
+        if key is None:
+            return None
+        return self.fragments.get(key)
+
+    def set(self, item: Hashable, fragment: str):
+        key = self.keys.get(item)
+        if key is not None:
+            self.missing[key] = fragment
+
+    def flush(self):
+        if self.missing:
+            self.cache.set_many(self.missing, timeout=self.timeout)
+            self.fragments.update(self.missing)
+            self.missing = {}
+
+
+class LocalCache:
+    """
+    A small thread safe least recently used cache that lives in the current process.
+
+    Used for values that are cheap to keep around but can't easily be pickled
+    into Django's cache, e.g. facet instances.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_set(
+        self,
+        key: Hashable,
+        default: Callable[[], Any],
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Get the value of ``key``, computing it with ``default`` if it is missing
+        or older than ``timeout`` seconds. Values without a timeout never expire.
+        """
+        with self._lock:
+            if key in self._data:
+                value, expires = self._data[key]
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    return value
+
+        # compute outside of the lock, at worst two threads compute the same value
+        value = default()
+        expires = time.monotonic() + timeout if timeout is not None else None
+
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -1,12 +1,13 @@
 from typing import List
 
+from asgiref.sync import sync_to_async
 from dal import autocomplete
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 
 from beam.facets import Facet
 from beam.urls import UrlKwargDict
-from beam.views import FacetMixin
+from beam.views import AsyncFacetMixin, AsyncMultipleObjectMixin, FacetMixin
 from beam.viewsets import BaseViewSet
 
 
@@ -59,6 +60,16 @@ class BaseAutocomplete(FacetMixin, autocomplete.Select2QuerySetView):
         return qs.filter(qs_filter)
 
 
+class AsyncAutocomplete(AsyncMultipleObjectMixin, AsyncFacetMixin, BaseAutocomplete):
+    async def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        await self.afetch_object_list()
+        return await self.arender_response()
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(super().post)(request, *args, **kwargs)
+
+
 class AutocompleteFacet(Facet):
     def __init__(
         self,
@@ -85,6 +96,7 @@ class AutocompleteMixin(BaseViewSet):
     """
 
     autocomplete_view_class = BaseAutocomplete
+    autocomplete_async_view_class = AsyncAutocomplete
     autocomplete_url = "autocomplete/"
     autocomplete_url_kwargs: UrlKwargDict = {}
     autocomplete_url_name = None
@@ -0,0 +1,146 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.contrib.contenttypes.models import ContentType
+from django.core import serializers
+from django.db import router, transaction
+from django.db.models.signals import post_save, pre_delete
+from django.utils import timezone
+from django.utils.encoding import force_str
+from reversion import create_revision, is_registered
+from reversion.models import Revision, Version
+from reversion.revisions import _get_options
+
+_current_collector: ContextVar[Optional["BulkVersionCollector"]] = ContextVar(
+    "beam_bulk_revision", default=None
+)
+_connected_models: Set[type] = set()
+
+
+class BulkVersionCollector:
+    """
+    Collects the objects that are saved or deleted inside `bulk_revision` and
+    stores their versions in a single revision using chunked bulk inserts.
+    """
+
+    def __init__(self, user=None, comment="", chunk_size=500):
+        self.user = user
+        self.comment = comment
+        self.chunk_size = chunk_size
+        self.using = router.db_for_write(Revision)
+        self.revision: Optional[Revision] = None
+        self.saved: Dict[type, Set] = defaultdict(set)
+        self.pending: List[Version] = []
+        self.version_count = 0
+
+    def add_saved(self, obj):
+        if obj.pk is not None:
+            self.saved[type(obj)].add(obj.pk)
+
+    def add_deleted(self, obj):
+        # deleted objects are serialized right away as they will be gone later
+        self.saved[type(obj)].discard(obj.pk)
+        self.pending.append(self.get_version(obj))
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def get_version(self, obj) -> Version:
+        options = _get_options(type(obj))
+        return Version(
+            content_type=ContentType.objects.db_manager(self.using).get_for_model(
+                type(obj), for_concrete_model=False
+            ),
+            object_id=force_str(getattr(obj, options.object_id_field)),
+            db=router.db_for_write(type(obj), instance=obj),
+            format=options.format,
+            serialized_data=serializers.serialize(
+                options.format,
+                (obj,),
+                fields=options.fields,
+                use_natural_foreign_keys=options.use_natural_foreign_keys,
+            ),
+            object_repr=force_str(obj),
+        )
+
+    def flush(self):
+        if not self.pending:
+            return
+        if self.revision is None:
+            self.revision = Revision(
+                date_created=timezone.now(), user=self.user, comment=self.comment
+            )
+            self.revision.save(using=self.using)
+        for version in self.pending:
+            version.revision = self.revision
+        Version.objects.using(self.using).bulk_create(self.pending)
+        self.version_count += len(self.pending)
+        self.pending = []
+
+    def iter_saved(self):
+        """
+        Fetch the current state of the saved objects chunk by chunk.
+        """
+        for model, pks in self.saved.items():
+            pks = sorted(pks)
+            for start in range(0, len(pks), self.chunk_size):
+                yield from model._base_manager.filter(
+                    pk__in=pks[start : start + self.chunk_size]
+                ).order_by("pk")
+
+    def finish(self):
+        for obj in self.iter_saved():
+            self.pending.append(self.get_version(obj))
+            if len(self.pending) >= self.chunk_size:
+                self.flush()
+        self.flush()
+
+
+def _post_save_receiver(sender, instance, raw=False, **kwargs):
+    collector = _current_collector.get()
+    if collector is not None and not raw and is_registered(sender):
+        collector.add_saved(instance)
+
+
+def _pre_delete_receiver(sender, instance, **kwargs):
+    collector = _current_collector.get()
+    if collector is not None and is_registered(sender):
+        collector.add_deleted(instance)
+
+
+def _connect(model):
+    # receivers are only connected for the models that are bulk versioned,
+    # so that other models keep their fast deletes
+    if model in _connected_models:
+        return
+    post_save.connect(_post_save_receiver, sender=model, weak=False)
+    pre_delete.connect(_pre_delete_receiver, sender=model, weak=False)
+    _connected_models.add(model)
+
+
+@contextmanager
+def bulk_revision(models: Iterable[type], user=None, comment="", chunk_size=500):
+    """
+    Version every object of `models` that is saved or deleted inside the block
+    in one revision.
+
+    Unlike `reversion.create_revision`, the versions are not kept in memory
+    until the block ends and relations are not followed. Deleted objects are
+    serialized before they are deleted, saved objects are fetched and
+    serialized after the block in chunks of `chunk_size`, and each chunk is
+    inserted with a single query.
+    """
+    for model in models:
+        _connect(model)
+
+    collector = BulkVersionCollector(user=user, comment=comment, chunk_size=chunk_size)
+    with transaction.atomic(using=collector.using):
+        # keep reversion from versioning the objects one by one
+        with create_revision(manage_manually=True):
+            token = _current_collector.set(collector)
+            try:
+                yield collector
+            finally:
+                _current_collector.reset(token)
+        collector.finish()
@@ -0,0 +1,207 @@
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Field
+
+
+class FieldDiff(NamedTuple):
+    field: Field
+    old: Any
+    new: Any
+
+
+class ObjectDiff(NamedTuple):
+    label: str
+    action: str  # "added", "removed" or "changed"
+    diffs: List[FieldDiff]
+
+
+class FieldChange(NamedTuple):
+    label: str
+    old: Any
+    new: Any
+
+
+class ObjectChange(NamedTuple):
+    label: str
+    action: str
+    changes: List[FieldChange]
+
+
+# maps str(pk) to the object's label and field dict
+ObjectDicts = Dict[str, Tuple[str, Dict[str, Any]]]
+
+
+def get_model_fields(model, field_names):
+    """
+    Get the concrete model fields for the given names, skipping virtual fields.
+    """
+    fields = []
+    for name in field_names:
+        try:
+            field = model._meta.get_field(str(name))
+        except FieldDoesNotExist:
+            continue
+        if field.concrete:
+            fields.append(field)
+    return fields
+
+
+def get_field_dict(obj, fields) -> Dict[str, Any]:
+    """
+    Get a dict like Version.field_dict for the current state of an object.
+    """
+    field_dict = {}
+    for field in fields:
+        if field.many_to_many:
+            field_dict[field.attname] = [
+                related.pk for related in getattr(obj, field.name).all()
+            ]
+        else:
+            field_dict[field.attname] = getattr(obj, field.attname)
+    return field_dict
+
+
+def get_version_dicts(revision, model, foreign_key, parent_pk) -> ObjectDicts:
+    """
+    Get the field dicts of the objects of ``model`` stored in a revision that
+    point to ``parent_pk`` using ``foreign_key``.
+    """
+    content_type = ContentType.objects.get_for_model(model, for_concrete_model=False)
+    return {
+        version.object_id: (version.object_repr, version.field_dict)
+        for version in revision.version_set.filter(content_type=content_type)
+        if version.field_dict.get(foreign_key.attname) == parent_pk
+    }
+
+
+def get_object_dicts(queryset, fields) -> ObjectDicts:
+    return {str(obj.pk): (str(obj), get_field_dict(obj, fields)) for obj in queryset}
+
+
+def _normalize(field, value):
+    if field.many_to_many:
+        return sorted(str(pk) for pk in value or [])
+    return value
+
+
+def diff_field_dicts(fields, old, new) -> List[FieldDiff]:
+    diffs = []
+    for field in fields:
+        old_value = old.get(field.attname)
+        new_value = new.get(field.attname)
+        if _normalize(field, old_value) != _normalize(field, new_value):
+            diffs.append(FieldDiff(field, old_value, new_value))
+    return diffs
+
+
+def diff_object_dicts(fields, old: ObjectDicts, new: ObjectDicts) -> List[ObjectDiff]:
+    """
+    Compare two sets of objects matching them on their pk.
+    """
+    diffs = []
+    for pk, (label, old_dict) in old.items():
+        if pk not in new:
+            diffs.append(ObjectDiff(label, "removed", []))
+            continue
+        field_diffs = diff_field_dicts(fields, old_dict, new[pk][1])
+        if field_diffs:
+            diffs.append(ObjectDiff(new[pk][0], "changed", field_diffs))
+    for pk, (label, new_dict) in new.items():
+        if pk not in old:
+            diffs.append(ObjectDiff(label, "added", []))
+    return diffs
+
+
+def _get_target_field(field):
+    if field.many_to_many:
+        return field.related_model._meta.pk
+    return field.target_field
+
+
+def _get_related_values(field, value):
+    if value is None:
+        return []
+    target_field = _get_target_field(field)
+    values = value if field.many_to_many else [value]
+    return [target_field.to_python(value) for value in values]
+
+
+class RelatedObjects:
+    """
+    The related objects referenced by field diffs, fetched using a single query
+    per related model.
+    """
+
+    def __init__(self, field_diffs: List[FieldDiff]):
+        values = defaultdict(set)
+        for diff in field_diffs:
+            if not diff.field.is_relation:
+                continue
+            key = (diff.field.related_model, _get_target_field(diff.field).name)
+            for value in (diff.old, diff.new):
+                values[key].update(_get_related_values(diff.field, value))
+
+        self.objects = {}
+        for (model, field_name), key_values in values.items():
+            self.objects[model, field_name] = model._default_manager.in_bulk(
+                list(key_values), field_name=field_name
+            )
+
+    def format_value(self, field, value):
+        """
+        Turn a stored value into something that can be shown to the user.
+        """
+        if value is None:
+            return None
+        if field.is_relation:
+            objects = self.objects[(field.related_model, _get_target_field(field).name)]
+            labels = [
+                str(objects[related]) if related in objects else related
+                for related in _get_related_values(field, value)
+            ]
+            if field.many_to_many:
+                return ", ".join(str(label) for label in labels)
+            return labels[0]
+        if field.choices:
+            return str(dict(field.flatchoices).get(value, value))
+        return value
+
+    def format_field_diff(self, diff: FieldDiff) -> FieldChange:
+        return FieldChange(
+            label=str(diff.field.verbose_name),
+            old=self.format_value(diff.field, diff.old),
+            new=self.format_value(diff.field, diff.new),
+        )
+
+    def format_object_diff(self, diff: ObjectDiff) -> ObjectChange:
+        return ObjectChange(
+            diff.label,
+            diff.action,
+            [self.format_field_diff(field_diff) for field_diff in diff.diffs],
+        )
+
+
+def format_diff(diff):
+    """
+    Format the field diffs of an object and its inlines for display, using the
+    current labels of related objects.
+    """
+    field_diffs = list(diff["changes"])
+    for __, object_diffs in diff["inlines"]:
+        for object_diff in object_diffs:
+            field_diffs.extend(object_diff.diffs)
+    related_objects = RelatedObjects(field_diffs)
+
+    return {
+        "changes": [
+            related_objects.format_field_diff(field_diff)
+            for field_diff in diff["changes"]
+        ],
+        "inlines": [
+            (title, [related_objects.format_object_diff(obj) for obj in object_diffs])
+            for title, object_diffs in diff["inlines"]
+        ],
+    }
@@ -1,15 +1,35 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import List
+
 from django.contrib import messages
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
 from django.core.exceptions import ImproperlyConfigured
 from django.db import connection, transaction
-from django.http import HttpResponseRedirect
+from django.db.models import Q
+from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
 from django.utils.encoding import force_str
+from django.utils.translation import get_language
 from django.utils.translation import gettext as _
 from django.views import View, generic
 from reversion import RevertError, set_comment
 from reversion.models import Version
 
+from beam.cache import make_cache_key
 from beam.views import FacetMixin, InlinesMixin
 
+from .compare import (
+    diff_field_dicts,
+    diff_object_dicts,
+    format_diff,
+    get_field_dict,
+    get_model_fields,
+    get_object_dicts,
+    get_version_dicts,
+)
+
 
 class _RollBackRevisionView(Exception):
     def __init__(self, response) -> None:
@@ -17,6 +37,29 @@ class _RollBackRevisionView(Exception):
         self.response = response
 
 
+class RevisionMixin:
+    """
+    Create a revision around saving a valid form.
+    """
+
+    def form_valid(self, *args, **kwargs):
+        with self.viewset.create_revision(self.request):
+            self.viewset._set_revision_comment(
+                self.facet, self.request, *self.args, **self.kwargs
+            )
+            return super().form_valid(*args, **kwargs)
+
+
+class ActionRevisionMixin:
+    """
+    Version the objects changed by a list action in a single revision.
+    """
+
+    def handle_action(self, action):
+        with self.viewset.create_bulk_revision(self.request, action):
+            return super().handle_action(action)
+
+
 class VersionRestoreView(FacetMixin, View):
     def post(self, request, *args, **kwargs):
         self.version = Version.objects.get_for_object_reference(
@@ -51,6 +94,57 @@ class VersionRestoreView(FacetMixin, View):
             )
 
 
+def get_version_instance(version):
+    """
+    Build an unsaved instance holding the field values stored in a version.
+    """
+    model = version.content_type.model_class()
+    many_to_many = {field.attname for field in model._meta.many_to_many}
+    instance = model(
+        **{
+            name: value
+            for name, value in version.field_dict.items()
+            if name not in many_to_many
+        }
+    )
+    # looks like it was loaded from the database but must never be saved
+    instance._state.adding = False
+    instance._state.db = version.db
+    # the related managers return the stored objects instead of the current ones,
+    # many to many fields with a custom through model are not stored
+    instance._prefetched_objects_cache = {
+        field.name: field.related_model._default_manager.using(version.db).filter(
+            pk__in=version.field_dict.get(field.attname, [])
+        )
+        for field in model._meta.many_to_many
+    }
+    return instance
+
+
+class VersionInlineMixin:
+    """
+    Show the objects of an inline as they were stored in a version, without
+    filters or actions.
+    """
+
+    filterset_class = None
+    filterset_fields = None
+    action_classes: List = []
+
+    def __init__(self, *args, version_objects=(), **kwargs) -> None:
+        self.version_objects = list(version_objects)
+        super().__init__(*args, **kwargs)
+
+    def get_queryset(self):
+        order_field = self.order_field if self.can_order else "pk"
+        return sorted(self.version_objects, key=lambda obj: getattr(obj, order_field))
+
+
+@lru_cache(maxsize=None)
+def get_version_inline_class(inline_class):
+    return type(inline_class.__name__, (VersionInlineMixin, inline_class), {})
+
+
 class VersionDetailView(FacetMixin, InlinesMixin, generic.DetailView):
     # we don't inherit from DetailView as that would add the ActionMixin
     # we explicitly don't want the ActionMixin in here as that would
@@ -61,11 +155,70 @@ class VersionDetailView(FacetMixin, InlinesMixin, generic.DetailView):
         kwargs["version"] = self.version
         return super().get_context_data(**kwargs)
 
+    def get_version(self):
+        return get_object_or_404(
+            Version.objects.get_for_object_reference(
+                self.model, self.kwargs["pk"]
+            ).select_related("revision"),
+            pk=self.kwargs["version_id"],
+        )
+
+    def get_inline_versions(self, inline_class):
+        """
+        Get the versions of the inline's objects stored in the same revision.
+        """
+        content_type = ContentType.objects.db_manager(self.version.db).get_for_model(
+            inline_class.model, for_concrete_model=False
+        )
+        return self.version.revision.version_set.filter(content_type=content_type)
+
+    def get_inlines(self, object=None):
+        if self.facet.version_detail_revert:
+            return super().get_inlines(object)
+
+        parent = object if object is not None else self.object
+        inlines = []
+        for inline_class in self.get_inline_classes():
+            foreign_key = inline_class.model._meta.get_field(
+                inline_class.foreign_key_field
+            )
+            version_objects = [
+                instance
+                for instance in map(
+                    get_version_instance, self.get_inline_versions(inline_class)
+                )
+                if getattr(instance, foreign_key.attname) == parent.pk
+            ]
+            inlines.append(
+                get_version_inline_class(inline_class)(
+                    parent_instance=parent,
+                    parent_model=self.model,
+                    request=self.request,
+                    version_objects=version_objects,
+                )
+            )
+        return inlines
+
     def get(self, request, *args, **kwargs):
-        self.version = Version.objects.get_for_object_reference(
-            self.model, kwargs["pk"]
-        ).get(pk=kwargs["version_id"])
+        self.version = self.get_version()
+        if self.facet.version_detail_revert:
+            return self.get_reverted(request, *args, **kwargs)
+
+        try:
+            self.object = get_version_instance(self.version)
+        except RevertError as ex:
+            messages.error(request, force_str(ex))
+            return HttpResponseRedirect(
+                self.viewset.links["detail"].reverse(self.get_object())
+            )
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
 
+    def get_reverted(self, request, *args, **kwargs):
+        """
+        Render the version by reverting the revision inside a transaction that is
+        rolled back afterwards.
+        """
         # Check that database transactions are supported.
         if not connection.features.uses_savepoints:
             raise ImproperlyConfigured(
@@ -76,6 +229,8 @@ class VersionDetailView(FacetMixin, InlinesMixin, generic.DetailView):
         try:
             with transaction.atomic(using=self.version.db):
                 self.version.revision.revert(delete=True)
+                # fetch the reverted object instead of the one checked for permissions
+                self.__dict__.pop("_object", None)
                 response = super().get(request, *args, **kwargs)
                 if hasattr(response, "render"):
                     response.render()
@@ -95,9 +250,160 @@ class VersionDetailView(FacetMixin, InlinesMixin, generic.DetailView):
 
 
 class VersionListView(FacetMixin, generic.DetailView):
+    """
+    Show the history of an object, newest first.
+
+    The versions are paginated using a cursor on ``revision.date_created`` so
+    that objects with a long history render quickly on every page.
+    """
+
+    cursor_param = "before"
+
     def get_template_names(self):
         return ["beam_reversion/version_list.html"]
 
+    def get_paginate_by(self):
+        return self.facet.version_list_paginate_by
+
+    def get_versions(self):
+        return (
+            Version.objects.get_for_object(self.object)
+            .select_related("revision__user")
+            .defer("serialized_data")
+            .order_by("-revision__date_created", "-pk")
+        )
+
+    def get_cursor(self, version):
+        return "{}_{}".format(version.revision.date_created.isoformat(), version.pk)
+
+    def parse_cursor(self, cursor):
+        try:
+            date_created, pk = cursor.rsplit("_", 1)
+            return datetime.fromisoformat(date_created), int(pk)
+        except ValueError:
+            raise Http404(_("Invalid cursor"))
+
+    def paginate_versions(self, versions, paginate_by):
+        cursor = self.request.GET.get(self.cursor_param)
+        if cursor:
+            date_created, pk = self.parse_cursor(cursor)
+            versions = versions.filter(
+                Q(revision__date_created__lt=date_created)
+                | Q(revision__date_created=date_created, pk__lt=pk)
+            )
+
+        # fetch one additional version to find out if there is a next page
+        versions = list(versions[: paginate_by + 1])
+        next_cursor = None
+        if len(versions) > paginate_by:
+            versions = versions[:paginate_by]
+            next_cursor = self.get_cursor(versions[-1])
+        return versions, cursor, next_cursor
+
     def get_context_data(self, **kwargs):
-        kwargs["versions"] = Version.objects.get_for_object(self.object)
+        versions = self.get_versions()
+        paginate_by = self.get_paginate_by()
+        if paginate_by:
+            versions, cursor, next_cursor = self.paginate_versions(
+                versions, paginate_by
+            )
+            kwargs["is_paginated"] = bool(cursor or next_cursor)
+            kwargs["cursor"] = cursor
+            kwargs["next_cursor"] = next_cursor
+        kwargs["versions"] = versions
+        kwargs["cursor_param"] = self.cursor_param
         return super().get_context_data(**kwargs)
+
+
+class VersionCompareView(FacetMixin, generic.DetailView):
+    """
+    Show the fields that differ between a version and another version given by
+    the ``with`` parameter, or the current object.
+
+    Versions are compared using their stored field values, diffs between two
+    versions are cached as versions never change. The labels of related objects
+    are looked up for every request as the related objects might change.
+    """
+
+    compare_param = "with"
+    cache_alias = "default"
+
+    def get_template_names(self):
+        return ["beam_reversion/version_compare.html"]
+
+    def get_versions(self):
+        return Version.objects.get_for_object(self.object).select_related("revision")
+
+    def get_compared_versions(self):
+        version = get_object_or_404(self.get_versions(), pk=self.kwargs["version_id"])
+        other_id = self.request.GET.get(self.compare_param)
+        if not other_id:
+            return version, None
+        return version, get_object_or_404(self.get_versions(), pk=other_id)
+
+    def compute_diff(self, version, other):
+        fields = get_model_fields(self.model, self.facet.fields or [])
+        if other is not None:
+            new_dict = other.field_dict
+        else:
+            new_dict = get_field_dict(self.object, fields)
+
+        diff = {
+            "changes": diff_field_dicts(fields, version.field_dict, new_dict),
+            "inlines": [],
+        }
+        for inline_class in self.facet.inline_classes or []:
+            model = inline_class.model
+            foreign_key = model._meta.get_field(inline_class.foreign_key_field)
+            inline_fields = get_model_fields(model, inline_class.fields)
+
+            parent_pk = self.object.pk
+            old = get_version_dicts(version.revision, model, foreign_key, parent_pk)
+            if other is not None:
+                new = get_version_dicts(other.revision, model, foreign_key, parent_pk)
+            else:
+                new = get_object_dicts(
+                    model._default_manager.filter(**{foreign_key.name: self.object}),
+                    inline_fields,
+                )
+
+            changes = diff_object_dicts(inline_fields, old, new)
+            if changes:
+                title = inline_class.title or model._meta.verbose_name_plural
+                diff["inlines"].append((str(title), changes))
+        return diff
+
+    def get_diff(self, version, other):
+        if other is None:
+            # the current object might change at any time
+            return self.compute_diff(version, None)
+
+        key = make_cache_key(
+            "version_compare",
+            self.facet.url_name,
+            version.pk,
+            other.pk,
+            [str(field) for field in self.facet.fields or []],
+            [inline.__qualname__ for inline in self.facet.inline_classes or []],
+            get_language() or "",
+        )
+        return caches[self.cache_alias].get_or_set(
+            key,
+            lambda: self.compute_diff(version, other),
+            timeout=self.facet.version_compare_cache_timeout,
+        )
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        version, other = self.get_compared_versions()
+        try:
+            diff = format_diff(self.get_diff(version, other))
+        except RevertError as ex:
+            messages.error(request, force_str(ex))
+            return HttpResponseRedirect(
+                self.viewset.links["detail"].reverse(self.object, request=request)
+            )
+        context = self.get_context_data(
+            object=self.object, version=version, other_version=other, diff=diff
+        )
+        return self.render_to_response(context)
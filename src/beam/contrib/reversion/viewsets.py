@@ -13,9 +13,18 @@ from reversion import (
 
 from beam import RelatedInline, ViewSet
 from beam.urls import UrlKwargDict
+from beam.views import CreateWithInlinesMixin, ListActionsMixin, UpdateWithInlinesMixin
 from beam.viewsets import BaseViewSet, DeleteMixin, DetailMixin, Facet, UpdateMixin
 
-from .views import VersionDetailView, VersionListView, VersionRestoreView
+from .bulk import bulk_revision
+from .views import (
+    ActionRevisionMixin,
+    RevisionMixin,
+    VersionCompareView,
+    VersionDetailView,
+    VersionListView,
+    VersionRestoreView,
+)
 
 
 class VersionRestoreMixin(BaseViewSet):
@@ -31,6 +40,12 @@ class VersionRestoreMixin(BaseViewSet):
         return super().get_facet_classes() + [("version_restore", Facet)]
 
 
+class VersionDetailFacet(Facet):
+    def __init__(self, version_detail_revert=False, **kwargs):
+        self.version_detail_revert = version_detail_revert
+        super().__init__(**kwargs)
+
+
 class VersionDetailMixin(BaseViewSet):
     version_detail_view_class = VersionDetailView
     version_detail_url = "<str:pk>/versions/<str:version_id>/"
@@ -39,11 +54,13 @@ class VersionDetailMixin(BaseViewSet):
     version_detail_url_name = None
     version_detail_link_layout = ["version_list"]
     version_detail_permission = "{app_label}.view_{model_name}"
+    # render by reverting the revision in a rolled back transaction
+    version_detail_revert = False
 
     detail_link_layout = DetailMixin.detail_link_layout + ["!version_detail"]
 
     def get_facet_classes(self):
-        return super().get_facet_classes() + [("version_detail", Facet)]
+        return super().get_facet_classes() + [("version_detail", VersionDetailFacet)]
 
     # mirror the detail fields and layout
     @property
@@ -61,6 +78,12 @@ class VersionDetailMixin(BaseViewSet):
         )
 
 
+class VersionListFacet(Facet):
+    def __init__(self, version_list_paginate_by=None, **kwargs):
+        self.version_list_paginate_by = version_list_paginate_by
+        super().__init__(**kwargs)
+
+
 class VersionListMixin(BaseViewSet):
     version_list_view_class = VersionListView
     version_list_url = "<str:pk>/versions/"
@@ -69,20 +92,67 @@ class VersionListMixin(BaseViewSet):
     version_list_url_name = None
     version_list_link_layout = ["detail"]
     version_list_permission = "{app_label}.view_{model_name}"
+    version_list_paginate_by = 50
+
+    def get_facet_classes(self):
+        return super().get_facet_classes() + [("version_list", VersionListFacet)]
+
+
+class VersionCompareFacet(Facet):
+    def __init__(self, version_compare_cache_timeout=None, **kwargs):
+        self.version_compare_cache_timeout = version_compare_cache_timeout
+        super().__init__(**kwargs)
+
+
+class VersionCompareMixin(BaseViewSet):
+    version_compare_view_class = VersionCompareView
+    version_compare_url = "<str:pk>/versions/<str:version_id>/compare/"
+    version_compare_url_kwargs: UrlKwargDict = {"pk": "pk"}
+    version_compare_verbose_name = _("compare")
+    version_compare_url_name = None
+    version_compare_link_layout = ["version_list"]
+    version_compare_permission = "{app_label}.view_{model_name}"
+    version_compare_cache_timeout = 60 * 60 * 24
+
+    detail_link_layout = DetailMixin.detail_link_layout + ["!version_compare"]
 
     def get_facet_classes(self):
-        return super().get_facet_classes() + [("version_list", Facet)]
+        return super().get_facet_classes() + [("version_compare", VersionCompareFacet)]
 
+    # mirror the detail fields and inlines
+    @property
+    def version_compare_fields(self):
+        return getattr(self, "detail_fields", getattr(self, "fields", []))
 
-class VersionViewSetMixin(VersionDetailMixin, VersionRestoreMixin, VersionListMixin):
+    @property
+    def version_compare_inline_classes(self):
+        return getattr(
+            self, "detail_inline_classes", getattr(self, "inline_classes", [])
+        )
+
+
+class VersionViewSetMixin(
+    VersionDetailMixin, VersionRestoreMixin, VersionListMixin, VersionCompareMixin
+):
     versioned_facet_names = ["create", "update", "delete"]
+    # list actions of these facets are versioned in one revision per action
+    versioned_action_facet_names = ["list"]
+    version_action_chunk_size = 500
+    # don't follow the inlines, so that only saved inline objects are versioned
+    version_changed_inlines_only = False
+    detail_link_layout = DetailMixin.detail_link_layout + [
+        "!version_detail",
+        "!version_compare",
+    ]
     update_link_layout = UpdateMixin.update_link_layout + [
         "!version_restore",
         "!version_detail",
+        "!version_compare",
     ]
     delete_link_layout = DeleteMixin.delete_link_layout + [
         "!version_restore",
         "!version_detail",
+        "!version_compare",
     ]
 
     def __init__(self) -> None:
@@ -151,6 +221,10 @@ class VersionViewSetMixin(VersionDetailMixin, VersionRestoreMixin, VersionListMi
             # register the inline model
             self._register_model_with_parents(inline_model)
 
+            if self.version_changed_inlines_only:
+                # the inline objects are versioned when they are saved
+                continue
+
             # if the remote field has an accessor name that
             # we can follow from our model (not hidden)
             # we want reversion to follow that accessor when
@@ -170,6 +244,19 @@ class VersionViewSetMixin(VersionDetailMixin, VersionRestoreMixin, VersionListMi
                 set_user(request.user)
             yield
 
+    @contextmanager
+    def create_bulk_revision(self, request, action):
+        models = [self.model] + [
+            inline_class.model for inline_class in self._get_version_inline_classes()
+        ]
+        with bulk_revision(
+            [model for model in models if is_registered(model)],
+            user=request.user if request.user.is_authenticated else None,
+            comment=str(action.verbose_name),
+            chunk_size=self.version_action_chunk_size,
+        ) as collector:
+            yield collector
+
     def _set_revision_comment(self, facet, request, *args, **kwargs):
         """
         Sets the revision comment according to facet and parameters.
@@ -178,16 +265,37 @@ class VersionViewSetMixin(VersionDetailMixin, VersionRestoreMixin, VersionListMi
             comment = facet.verbose_name
             set_comment(comment)
 
+    def _get_view_class(self, facet):
+        if facet.name in self.versioned_action_facet_names:
+            view_class = super()._get_view_class(facet)
+            if issubclass(view_class, ListActionsMixin):
+                return type(view_class.__name__, (ActionRevisionMixin, view_class), {})
+            return view_class
+        if facet.name not in self.versioned_facet_names:
+            return super()._get_view_class(facet)
+
+        view_class = facet.view_class
+        if issubclass(view_class, (CreateWithInlinesMixin, UpdateWithInlinesMixin)):
+            # only valid forms are saved, so only those need a revision
+            return type(view_class.__name__, (RevisionMixin, view_class), {})
+        # create_revision wraps the synchronous view
+        return view_class
+
     def _get_view(self, facet):
         """
-        Ensure that the views in `self.versioned_facet_names`
-        are wrapped with the create_revision context_manager
+        Ensure that the views in `self.versioned_facet_names` create revisions,
+        either when saving a valid form or by wrapping unsafe requests
+        with the create_revision context_manager
         """
         view = super()._get_view(facet)
-        if facet.name not in self.versioned_facet_names:
+        if facet.name not in self.versioned_facet_names or issubclass(
+            view.view_class, RevisionMixin
+        ):
             return view
 
         def wrapped_view(request, *args, **kwargs):
+            if request.method in ("GET", "HEAD", "OPTIONS"):
+                return view(request, *args, **kwargs)
             with self.create_revision(request):
                 self._set_revision_comment(facet, request, *args, **kwargs)
                 return view(request, *args, **kwargs)
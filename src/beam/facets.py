@@ -1,11 +1,12 @@
 import inspect
-from typing import List, Mapping, Optional, Set, Type
+from typing import Any, List, Mapping, Optional, Set, Type
 
 import django_filters
+from asgiref.sync import sync_to_async
 from django.urls import reverse
 
 from .actions import Action
-from .utils import check_permission
+from .utils import acheck_permission, check_permission
 
 
 class BaseFacet:
@@ -82,6 +83,19 @@ class BaseFacet:
         """
         return check_permission(permission=self.permission, user=user, obj=obj)
 
+    async def ahas_perm(
+        self, user, obj=None, request=None, override_kwargs=None
+    ) -> bool:
+        """
+        Async version of has_perm. Subclasses overriding has_perm are called in a
+        thread so their custom checks keep working.
+        """
+        if type(self).has_perm is not BaseFacet.has_perm:
+            return await sync_to_async(self.has_perm)(
+                user, obj=obj, request=request, override_kwargs=override_kwargs
+            )
+        return await acheck_permission(permission=self.permission, user=user, obj=obj)
+
     def reverse(self, obj=None, request=None, override_kwargs=None):
         """
         Get a url for this facet.
@@ -127,6 +141,7 @@ class Facet(BaseFacet):
     def __init__(
         self,
         view_class=None,
+        async_view_class=None,
         fields=None,
         url=None,
         layout=None,
@@ -137,6 +152,8 @@ class Facet(BaseFacet):
         name=None,
         url_name=None,
         url_namespace=None,
+        version_field=None,
+        conditional_get=False,
         **kwargs
     ):
         self.url = url
@@ -147,6 +164,8 @@ class Facet(BaseFacet):
                 "not want to serve a view use BaseFacet"
             )
         self.view_class = view_class
+        # used instead of view_class if the viewset serves async views
+        self.async_view_class = async_view_class
 
         self.inline_classes = inline_classes
 
@@ -165,6 +184,14 @@ class Facet(BaseFacet):
         self.model = model
         self.queryset = queryset
 
+        # a field that changes whenever an instance changes, e.g. updated_at
+        self.version_field = version_field
+        self.conditional_get = conditional_get
+        if conditional_get and not version_field:
+            raise ValueError(
+                "Facet {} needs a version_field to support conditional_get".format(name)
+            )
+
         if not url_name:
             url_name = "{}_{}_{}".format(
                 self.model._meta.app_label, self.model._meta.model_name, name
@@ -201,11 +228,14 @@ class ListFacet(Facet):
         list_item_link_layout: Optional[List[str]] = None,
         list_sort_fields: Optional[List[str]] = None,
         list_sort_fields_columns: Optional[Mapping[str, str]] = None,
+        list_annotations: Optional[Mapping[str, Any]] = None,
         list_filterset_fields: Optional[List[str]] = None,
         list_filterset_class: Optional[
             Type[django_filters.filterset.BaseFilterSet]
         ] = None,
         list_action_classes: Optional[List[Type[Action]]] = None,
+        list_row_cache: bool = False,
+        list_row_cache_timeout: Optional[int] = None,
         **kwargs
     ):
         self.list_search_fields = list_search_fields
@@ -213,11 +243,21 @@ class ListFacet(Facet):
         self.list_item_link_layout = list_item_link_layout
         self.list_sort_fields = list_sort_fields
         self.list_sort_fields_columns = list_sort_fields_columns
+        self.list_annotations = list_annotations
         self.list_filterset_fields = list_filterset_fields
         self.list_filterset_class = list_filterset_class
         self.list_actions_classes = list_action_classes
+        self.list_row_cache = list_row_cache
+        self.list_row_cache_timeout = list_row_cache_timeout
         super().__init__(**kwargs)
 
+        if self.list_row_cache and not self.version_field:
+            raise ValueError(
+                "Facet {} needs a version_field to support list_row_cache".format(
+                    self.name
+                )
+            )
+
 
 class Link(BaseFacet):
     """
@@ -1,20 +1,557 @@
-from typing import List, Optional, Type
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Type
 
 from django.contrib.admin.utils import NestedObjects
-from django.core.exceptions import ValidationError
+from django.core import signing
+from django.core.exceptions import EmptyResultSet, ValidationError
 from django.core.paginator import Page, Paginator
-from django.db import router
-from django.db.models import Model
+from django.db import connections, router
+from django.db.models import PROTECT, RESTRICT, Count, Max, Model
 from django.db.models.options import Options
-from django.forms import ModelForm, inlineformset_factory
+from django.db.models.signals import post_save, pre_save
+from django.forms import (
+    BaseInlineFormSet,
+    BaseModelForm,
+    ModelChoiceField,
+    ModelForm,
+    inlineformset_factory,
+)
+from django.forms.formsets import INITIAL_FORM_COUNT, TOTAL_FORM_COUNT
+from django.utils.datastructures import MultiValueDict
 from django.utils.text import get_text_list
 from django.utils.translation import gettext as _
-from django_filters.filterset import filterset_factory
 
 from beam.actions import Action
+from beam.cache import LocalCache
+from beam.layouts import get_annotations
+from beam.reference import (
+    ReferenceModelChoiceIterator,
+    renders_own_choices,
+    use_reference_choices,
+)
 from beam.types import LayoutType
+from beam.utils import get_filterset_class_for_fields
 
 DELETION_FIELD_NAME = "DELETE"
+MANIFEST_FIELD_NAME = "MANIFEST"
+MANIFEST_SALT = "beam.inlines.manifest"
+
+formset_class_cache = LocalCache(maxsize=1024)
+
+
+class SharedModelChoiceIterator(ReferenceModelChoiceIterator):
+    """
+    A choice iterator that evaluates the queryset of its field only once, so that
+    it can be shared by the same field of all forms in a formset.
+    """
+
+    def __init__(self, field):
+        super().__init__(field)
+        self._choices = None
+
+    def get_choices(self):
+        if self._choices is None:
+            self._choices = [choice for choice in super().__iter__()]
+        return self._choices
+
+    def __iter__(self):
+        return iter(self.get_choices())
+
+    def __len__(self):
+        return len(self.get_choices())
+
+    def __bool__(self):
+        return bool(self.get_choices())
+
+
+def collect_protected(instances, using) -> Dict[Model, List[Model]]:
+    """
+    Collect the objects that would be deleted along with `instances` in a single
+    pass and return the protected objects that prevent deleting each instance.
+
+    Raises LookupError if a protected object can't be traced back to one of the
+    instances.
+    """
+    collector = NestedObjects(using=using)
+    collector.collect(instances)
+    if not collector.protected:
+        return {}
+    if len(instances) == 1:
+        return {instances[0]: list(collector.protected)}
+
+    parents: Dict[Model, Model] = {}
+    for source, targets in collector.edges.items():
+        for target in targets:
+            parents.setdefault(target, source)
+
+    collected: Dict[Tuple[Type[Model], str], Dict] = {}
+
+    def find_collected(model, attname, value):
+        key = (model, attname)
+        if key not in collected:
+            collected[key] = {
+                getattr(obj, attname): obj
+                for obj in collector.model_objs.get(model, ())
+            }
+        return collected[key].get(value)
+
+    instance_set = set(instances)
+    protected: Dict[Model, List[Model]] = {}
+    for protected_obj in collector.protected:
+        roots = []
+        for field in protected_obj._meta.concrete_fields:
+            if not field.is_relation or field.remote_field.on_delete not in (
+                PROTECT,
+                RESTRICT,
+            ):
+                continue
+            obj = find_collected(
+                field.related_model,
+                field.target_field.attname,
+                getattr(protected_obj, field.attname),
+            )
+            seen = set()
+            # walk up to the instance that caused the object to be collected
+            while obj is not None and parents.get(obj) is not None:
+                if obj in seen:
+                    break
+                seen.add(obj)
+                obj = parents[obj]
+            if obj is not None and obj not in roots:
+                roots.append(obj)
+        if not roots or any(root not in instance_set for root in roots):
+            raise LookupError(protected_obj)
+        for root in roots:
+            protected.setdefault(root, []).append(protected_obj)
+    return protected
+
+
+def get_fingerprint(obj) -> str:
+    """
+    A short hash of the field values of an object.
+    """
+    values = "\n".join(
+        field.value_to_string(obj) for field in obj._meta.concrete_fields
+    )
+    return hashlib.sha1(values.encode("utf-8")).hexdigest()[:16]
+
+
+def dump_manifest(fingerprints: Dict[str, str], parent_pk, prefix: str) -> str:
+    """
+    Sign the fingerprints of the objects of a formset, bound to its parent and
+    prefix so that the manifest can't be submitted to another formset.
+    """
+    return signing.dumps(
+        {
+            "parent": None if parent_pk is None else str(parent_pk),
+            "prefix": prefix,
+            "objects": fingerprints,
+        },
+        salt=MANIFEST_SALT,
+        compress=True,
+    )
+
+
+def load_manifest(value, parent_pk, prefix: str) -> Optional[Dict[str, str]]:
+    """
+    Return the fingerprints of a manifest, or None if it is invalid or was
+    issued for another formset.
+    """
+    if not value:
+        return None
+    try:
+        manifest = signing.loads(value, salt=MANIFEST_SALT)
+    except signing.BadSignature:
+        return None
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("parent") != (None if parent_pk is None else str(parent_pk))
+        or manifest.get("prefix") != prefix
+        or not isinstance(manifest.get("objects"), dict)
+    ):
+        return None
+    return manifest["objects"]
+
+
+def compact_formset_data(prefix, data, files, pk_name):
+    """
+    Number the submitted forms of a formset consecutively, so that the client
+    can leave out unchanged forms.
+
+    Returns the new data and files and the primary keys of the submitted initial
+    forms.
+    """
+    pattern = re.compile(r"^{}-(\d+)-(.*)$".format(re.escape(prefix)))
+
+    def lists(source):
+        if source is None:
+            return []
+        if hasattr(source, "lists"):
+            return list(source.lists())
+        return [(key, [value]) for key, value in source.items()]
+
+    data_lists, files_lists = lists(data), lists(files)
+    indexes = set()
+    for key, values in data_lists + files_lists:
+        match = pattern.match(key)
+        if match:
+            indexes.add(int(match.group(1)))
+    new_indexes = {index: new for new, index in enumerate(sorted(indexes))}
+
+    try:
+        initial_form_count = int(data.get("{}-{}".format(prefix, INITIAL_FORM_COUNT)))
+    except (TypeError, ValueError):
+        initial_form_count = 0
+
+    def compact(source_lists):
+        result = MultiValueDict()
+        for key, values in source_lists:
+            match = pattern.match(key)
+            if match:
+                key = "{}-{}-{}".format(
+                    prefix, new_indexes[int(match.group(1))], match.group(2)
+                )
+            result.setlist(key, values)
+        return result
+
+    new_data = compact(data_lists)
+    new_data["{}-{}".format(prefix, TOTAL_FORM_COUNT)] = str(len(indexes))
+    new_data["{}-{}".format(prefix, INITIAL_FORM_COUNT)] = str(
+        len([index for index in indexes if index < initial_form_count])
+    )
+    pks = [
+        data.get("{}-{}-{}".format(prefix, index, pk_name))
+        for index in sorted(indexes)
+        if index < initial_form_count
+    ]
+    return (
+        new_data,
+        compact(files_lists) if files is not None else None,
+        [pk for pk in pks if pk],
+    )
+
+
+class RelatedInlineFormSet(BaseInlineFormSet):
+    """
+    The base formset of related inlines.
+
+    Model choice fields of the forms share their choices, so rendering a formset
+    with many forms runs the query for the choices of each field only once.
+    Validation still uses the queryset of each field.
+
+    Forms marked for deletion get an error if deleting their instance would
+    require deleting protected objects. The related objects of all of them are
+    collected in a single pass.
+
+    Unless ``bulk_save`` is False, new objects are saved using ``bulk_create`` and
+    changed ones using ``bulk_update`` if the model has no custom ``save()`` and
+    no receivers for ``pre_save`` or ``post_save``.
+
+    With ``changed_only`` the client only submits the forms it changed, along
+    with a signed manifest of the objects it rendered, see `changed_only_manifest`.
+    Only the submitted forms are built and validated. Forms whose object was
+    changed by someone else since it was rendered get an error.
+
+    A submission with more forms than ``absolute_max`` is rejected before any of
+    its forms are built.
+    """
+
+    share_choices = True
+    bulk_save = True
+
+    def __init__(
+        self,
+        data=None,
+        files=None,
+        instance=None,
+        save_as_new=False,
+        prefix=None,
+        queryset=None,
+        changed_only=False,
+        **kwargs,
+    ):
+        self._shared_choices = {}
+        self._choices_keys = {}
+        self.changed_only = changed_only
+        self.manifest = None
+        self._manifest_value = None
+        self._fingerprints = None
+        if changed_only and data is not None:
+            manifest_key = "{}-{}".format(
+                prefix or self.get_default_prefix(), MANIFEST_FIELD_NAME
+            )
+            self._manifest_value = data.get(manifest_key)
+            self.manifest = load_manifest(
+                self._manifest_value,
+                instance.pk if instance is not None else None,
+                prefix or self.get_default_prefix(),
+            )
+            data, files, pks = compact_formset_data(
+                prefix or self.get_default_prefix(),
+                data,
+                files,
+                self.model._meta.pk.name,
+            )
+            if queryset is None:
+                queryset = self.model._default_manager.get_queryset()
+            pk_field = self.model._meta.pk
+            valid_pks = []
+            for pk in pks:
+                try:
+                    valid_pks.append(pk_field.to_python(pk))
+                except ValidationError:
+                    pass
+            # only the objects of submitted forms are loaded
+            queryset = queryset.filter(pk__in=valid_pks)
+        super().__init__(
+            data=data,
+            files=files,
+            instance=instance,
+            save_as_new=save_as_new,
+            prefix=prefix,
+            queryset=queryset,
+            **kwargs,
+        )
+
+    def has_too_many_forms(self) -> bool:
+        return (
+            self.is_bound
+            and self.management_form.is_valid()
+            and self.management_form.cleaned_data[TOTAL_FORM_COUNT] > self.absolute_max
+        )
+
+    def total_form_count(self):
+        # without forms full_clean() only reports the too_many_forms error
+        if self.has_too_many_forms():
+            return 0
+        return super().total_form_count()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.changed_only and self.is_bound and self._fingerprints is None:
+            # fingerprint the objects before the forms change them
+            self._fingerprints = {obj.pk: get_fingerprint(obj) for obj in queryset}
+        return queryset
+
+    @property
+    def changed_only_manifest(self) -> str:
+        """
+        The signed manifest of the rendered objects, keeps the manifest of a
+        submission so that changes since the first rendering are detected.
+        """
+        if self.is_bound and self.manifest is not None:
+            return self._manifest_value
+        return dump_manifest(
+            {
+                str(form.instance.pk): get_fingerprint(form.instance)
+                for form in self.initial_forms
+            },
+            self.instance.pk,
+            self.prefix,
+        )
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        if self.share_choices:
+            self.share_choices_of_form(form)
+        else:
+            use_reference_choices(form)
+
+    def form_changes_querysets(self) -> bool:
+        """
+        Whether the form class may change the querysets of its fields depending
+        on its instance, which only an ``__init__`` of its own can do.
+        """
+        for form_class in self.form.__mro__:
+            if form_class is BaseModelForm:
+                return False
+            if "__init__" in vars(form_class):
+                return True
+        return False
+
+    def get_choices_key(self, name, field):
+        try:
+            query = str(field.queryset.query)
+        except EmptyResultSet:
+            query = None
+        return (name, type(field), field.empty_label, query)
+
+    def share_choices_of_form(self, form):
+        changes_querysets = self.form_changes_querysets()
+        for name, field in form.fields.items():
+            if not isinstance(field, ModelChoiceField):
+                continue
+            # autocomplete widgets need a choice iterator of their own
+            if renders_own_choices(field.widget):
+                continue
+            if changes_querysets:
+                key = self.get_choices_key(name, field)
+            else:
+                # compiling the query is expensive, the fields of all forms have
+                # the same queryset, including its limit_choices_to
+                if name not in self._choices_keys:
+                    self._choices_keys[name] = self.get_choices_key(name, field)
+                key = self._choices_keys[name]
+            if key not in self._shared_choices:
+                self._shared_choices[key] = SharedModelChoiceIterator(field)
+            choices = self._shared_choices[key]
+            field.iterator = lambda field, choices=choices: choices
+            field.widget.choices = choices
+
+    def clean(self):
+        super().clean()
+        if self.changed_only:
+            self.clean_changed_only()
+        if self.can_delete:
+            self.clean_protected_deletions()
+
+    def clean_changed_only(self):
+        if self.manifest is None:
+            raise ValidationError(
+                _(
+                    "The submitted data is incomplete, please reload the page "
+                    "and try again."
+                ),
+                code="invalid_manifest",
+            )
+        for form in self.initial_forms:
+            if form.instance.pk is None:
+                continue
+            fingerprint = self.manifest.get(str(form.instance.pk))
+            if fingerprint is None:
+                raise ValidationError(
+                    _(
+                        "The submitted data is incomplete, please reload the "
+                        "page and try again."
+                    ),
+                    code="invalid_manifest",
+                )
+            if fingerprint != self._fingerprints.get(form.instance.pk):
+                form.add_error(
+                    None,
+                    ValidationError(
+                        _(
+                            "{class_name} {instance} was changed by someone else "
+                            "in the meantime, please reload the page and try again."
+                        ).format(
+                            class_name=self.model._meta.verbose_name,
+                            instance=form.instance,
+                        ),
+                        code="concurrent_change",
+                    ),
+                )
+                if hasattr(form, "cleaned_data"):
+                    form.cleaned_data.pop(DELETION_FIELD_NAME, None)
+
+    def clean_protected_deletions(self):
+        """
+        Implementation based on django.contrib.admin.options.get_formset, but
+        collecting the instances of all deleted forms at once.
+
+        We don't validate the 'DELETE' field itself because on templates it's
+        not rendered using the field information.
+        """
+        forms = [
+            form
+            for form in self.forms
+            if hasattr(form, "cleaned_data")
+            and form.cleaned_data.get(DELETION_FIELD_NAME, False)
+            and not form.instance._state.adding
+        ]
+        if not forms:
+            return
+
+        using = router.db_for_write(self.model)
+        try:
+            protected = collect_protected([form.instance for form in forms], using)
+        except LookupError:
+            # a protected object couldn't be traced back to its instance
+            protected = {}
+            for form in forms:
+                protected.update(collect_protected([form.instance], using))
+
+        for form in forms:
+            if form.instance in protected:
+                form.add_error(
+                    None,
+                    self.get_protected_error(form.instance, protected[form.instance]),
+                )
+                form.cleaned_data.pop(DELETION_FIELD_NAME, None)
+
+    def can_bulk_save(self):
+        model = self.model
+        return (
+            self.bulk_save
+            and model.save is Model.save
+            and model.save_base is Model.save_base
+            and not model._meta.parents
+            and not pre_save.has_listeners(model)
+            and not post_save.has_listeners(model)
+        )
+
+    def save(self, commit=True):
+        if not commit or not self.can_bulk_save():
+            return super().save(commit=commit)
+
+        instances = super().save(commit=False)
+        for obj in self.deleted_objects:
+            self.delete_existing(obj)
+
+        using = router.db_for_write(self.model, instance=self.instance)
+        # objects are grouped by their changed fields, so that e.g. reordering
+        # only updates the order field of the moved objects in a single query
+        changed_objects = defaultdict(list)
+        for obj, changed_data in self.changed_objects:
+            changed_objects[frozenset(changed_data)].append(obj)
+        for changed_data, objs in changed_objects.items():
+            self.bulk_update_existing(objs, changed_data, using)
+
+        if self.new_objects:
+            if connections[using].features.can_return_rows_from_bulk_insert:
+                self.model._base_manager.using(using).bulk_create(self.new_objects)
+            else:
+                # we need the primary keys for many to many relations
+                for obj in self.new_objects:
+                    obj.save(using=using)
+
+        self.save_m2m()
+        return instances
+
+    def bulk_update_existing(self, objs, changed_data, using):
+        fields = []
+        for field in self.model._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            # bulk_update doesn't call pre_save, which e.g. sets auto_now fields
+            for obj in objs:
+                setattr(obj, field.attname, field.pre_save(obj, add=False))
+            if field.name in changed_data or getattr(field, "auto_now", False):
+                fields.append(field.name)
+        if fields:
+            self.model._base_manager.using(using).bulk_update(objs, fields)
+
+    def get_protected_error(self, instance, protected_objects):
+        objs = []
+        for p in protected_objects:
+            objs.append(
+                # Translators: Model verbose name and instance representation,
+                # suitable to be an item in a list.
+                _("{class_name} {instance}").format(
+                    class_name=p._meta.verbose_name, instance=p
+                )
+            )
+        msg = _(
+            "Deleting {class_name} {instance} would require "
+            "deleting the following protected related objects: "
+            "{related_objects}"
+        ).format(
+            class_name=self.model._meta.verbose_name,
+            instance=instance,
+            related_objects=get_text_list(objs, _("and")),
+        )
+        return ValidationError(msg, code="deleting_protected")
 
 
 class BaseRelatedInline(object):
@@ -24,11 +561,18 @@ class BaseRelatedInline(object):
     layout: Optional[LayoutType] = None
     fields: List[str] = []
     extra = None
+    version_field: Optional[str] = None
+    max_num: Optional[int] = None
+    absolute_max: Optional[int] = None
+    validate_max = False
     can_delete = True
     can_order = False
     order_field: str = ""
     queryset = None
     form_class = ModelForm
+    formset_class = RelatedInlineFormSet
+    bulk_save = True
+    submit_changed_only = False
     detail_template_name = ""
     form_template_name = ""
 
@@ -61,54 +605,13 @@ class BaseRelatedInline(object):
 
     def _construct_form_class(self):
         """
-        Build a form class based on self.form_class that handles deletion of nested objects.
+        The form class of the formset, override to customize it. Deleting objects
+        with protected related objects is prevented by the formset.
 
-        Implementation from django.contrib.admin.options.get_formset.
+        Return the same class for the same inline, formset classes are cached
+        per form class.
         """
-
-        class DeleteProtectedModelForm(self.form_class):
-            def hand_clean_DELETE(self):
-                """
-                We don't validate the 'DELETE' field itself because on
-                templates it's not rendered using the field information.
-                """
-                if self.cleaned_data.get(DELETION_FIELD_NAME, False):
-                    using = router.db_for_write(self._meta.model)
-                    collector = NestedObjects(using=using)
-                    if self.instance._state.adding:
-                        return
-                    collector.collect([self.instance])
-                    if collector.protected:
-                        objs = []
-                        for p in collector.protected:
-                            objs.append(
-                                # Translators: Model verbose name and instance representation,
-                                # suitable to be an item in a list.
-                                _("{class_name} {instance}").format(
-                                    class_name=p._meta.verbose_name, instance=p
-                                )
-                            )
-                        msg = _(
-                            "Deleting {class_name} {instance} would require "
-                            "deleting the following protected related objects: "
-                            "{related_objects}"
-                        ).format(
-                            class_name=self._meta.model._meta.verbose_name,
-                            instance=self.instance,
-                            related_objects=get_text_list(objs, _("and")),
-                        )
-                        raise ValidationError(msg, code="deleting_protected")
-
-            def clean(self):
-                cleaned_data = super().clean() or self.cleaned_data
-                try:
-                    self.hand_clean_DELETE()
-                except ValidationError as e:
-                    cleaned_data.pop(DELETION_FIELD_NAME)
-                    raise e
-                return cleaned_data
-
-        return DeleteProtectedModelForm
+        return self.form_class
 
     def get_formset_class(self):
         if self.extra is not None:
@@ -118,34 +621,82 @@ class BaseRelatedInline(object):
         else:
             extra = 1
 
-        return inlineformset_factory(
-            parent_model=self.parent_model,
-            form=self._construct_form_class(),
-            model=self.model,
-            fk_name=self.foreign_key_field,
-            extra=extra,
-            can_delete=self.can_delete,
-            fields=self.fields[:],
+        max_num = self.get_max_num()
+        absolute_max = self.get_absolute_max()
+
+        kwargs = {
+            "parent_model": self.parent_model,
+            "form": self._construct_form_class(),
+            "formset": self.formset_class,
+            "model": self.model,
+            "fk_name": self.foreign_key_field,
+            "extra": extra,
+            "max_num": max_num,
+            "absolute_max": absolute_max,
+            "validate_max": self.validate_max,
+            "can_delete": self.can_delete,
+            "fields": tuple(self.fields),
+        }
+        # inlines built with the same arguments share their formset class
+        return formset_class_cache.get_or_set(
+            tuple(sorted(kwargs.items())),
+            lambda: inlineformset_factory(**kwargs),
         )
 
+    def get_max_num(self) -> Optional[int]:
+        """
+        The maximum number of forms, Django's default of 1000 if None. Only
+        enforced with ``validate_max``, otherwise it limits the extra forms.
+        """
+        return self.max_num
+
+    def get_absolute_max(self) -> Optional[int]:
+        """
+        The number of forms above which a submission is rejected, 1000 more than
+        the maximum number of forms if None.
+        """
+        return self.absolute_max
+
     def get_formset_kwargs(self):
-        return {
+        kwargs = {
             "instance": self.parent_instance,
             "queryset": self.get_queryset(),
             "data": self.request.POST if self.request and self.request.POST else None,
-            "files": self.request.FILES
-            if self.request and self.request.FILES
-            else None,
+            "files": (
+                self.request.FILES if self.request and self.request.FILES else None
+            ),
             "prefix": self.prefix,
         }
+        if self.submit_changed_only:
+            kwargs["changed_only"] = True
+        return kwargs
 
     def construct_formset(self):
         formset_class = self.get_formset_class()
-        return formset_class(**self.get_formset_kwargs())
+        formset = formset_class(**self.get_formset_kwargs())
+        formset.bulk_save = self.bulk_save
+        return formset
 
     def get_title(self):
         return self.title or self.model_options.verbose_name_plural
 
+    @classmethod
+    def get_version(cls, parent_instance) -> str:
+        """
+        Return a value that changes whenever objects are added to or removed from
+        the inline of ``parent_instance``, or, if ``version_field`` is set, whenever
+        one of them changes. The inline doesn't need to be built for this.
+        """
+        queryset = (
+            cls.queryset if cls.queryset is not None else cls.model._default_manager
+        )
+        queryset = queryset.filter(**{cls.foreign_key_field: parent_instance})
+        aggregates = {"count": Count("pk"), "max_pk": Max("pk")}
+        if cls.version_field:
+            aggregates["version"] = Max(cls.version_field)
+        values = queryset.aggregate(**aggregates)
+        return "-".join(str(value) for value in values.values())
+
     def get_queryset(self):
         if self.queryset:
             # ensure re-evaluation of queryset
@@ -153,6 +704,10 @@ class BaseRelatedInline(object):
         else:
             qs = self._get_queryset_from_parent_instance()
 
+        annotations = get_annotations(self.fields, self.layout)
+        if annotations:
+            qs = qs.annotate(**annotations)
+
         if not qs.ordered:
             # ensure a stable order
             qs = qs.order_by("pk")
@@ -224,6 +779,23 @@ class PaginationMixin(BaseRelatedInline):
         else:
             return NotPaginated(object_list=queryset, number=1, paginator=None)
 
+    def get_max_num(self) -> Optional[int]:
+        max_num = super().get_max_num()
+        if max_num is None and self.paginate_by:
+            # a lower max_num would prevent adding objects to a full page, django
+            # requires it to be at most absolute_max
+            return self.get_absolute_max()
+        return max_num
+
+    def get_absolute_max(self) -> Optional[int]:
+        absolute_max = super().get_absolute_max()
+        if absolute_max is None and self.paginate_by:
+            # a page shows at most paginate_by forms, leave room for adding as many
+            # new objects
+            max_num = super().get_max_num() or 0
+            return max(max_num, self.paginate_by) + self.paginate_by
+        return absolute_max
+
     def get_formset_kwargs(self):
         kwargs = super().get_formset_kwargs()
         if self.paginate_by:
@@ -251,8 +823,8 @@ class FilterSetMixin(BaseRelatedInline):
         if self.filterset_class:
             return self.filterset_class
         elif self.get_filterset_fields():
-            return filterset_factory(
-                model=self.model, fields=self.get_filterset_fields()
+            return get_filterset_class_for_fields(
+                self.model, self.get_filterset_fields()
             )
         return None
 
@@ -274,7 +846,9 @@ class FilterSetMixin(BaseRelatedInline):
         filterset_class = self.get_filterset_class()
         if not filterset_class:
             return None
-        return filterset_class(**self.get_filterset_kwargs())
+        filterset = filterset_class(**self.get_filterset_kwargs())
+        use_reference_choices(filterset.form)
+        return filterset
 
     def get_queryset(self):
         if self.filterset and self.filterset.is_bound and self.filterset.is_valid():
@@ -1,4 +1,5 @@
-from typing import Dict, List
+import warnings
+from typing import Any, Dict, List
 
 from beam.facets import BaseFacet
 
@@ -25,6 +26,53 @@ class VirtualField:
         return self.name
 
 
+class QueryVirtualField(VirtualField):
+    """
+    A virtual field whose value is computed by the database using an ORM
+    expression, e.g. ``Count("sighting")``.
+
+    The list and detail views and related inlines add it as an annotation to
+    their queryset, so the values are fetched with the objects and the field can
+    be sorted and filtered. Objects that weren't annotated, e.g. in custom views,
+    show no value and emit a ``RuntimeWarning``.
+    """
+
+    def __init__(self, name, expression, verbose_name=None):
+        super().__init__(name, callback=None, verbose_name=verbose_name)
+        self.expression = expression
+
+    def get_value(self, obj=None):
+        if obj is None:
+            return None
+        if self.name not in obj.__dict__:
+            # querying the value here would cost a query per rendered object
+            warnings.warn(
+                "{} is not annotated on {!r}, annotate the queryset with "
+                "beam.layouts.get_annotations() to show it.".format(self.name, obj),
+                RuntimeWarning,
+            )
+            return None
+        return obj.__dict__[self.name]
+
+
+def get_annotations(*layouts) -> Dict[str, Any]:
+    """
+    Get the annotations of all query virtual fields in the given fields or layouts.
+    """
+    annotations = {}
+
+    def collect(items):
+        for item in items or []:
+            if isinstance(item, QueryVirtualField):
+                annotations[item.name] = item.expression
+            elif isinstance(item, (list, tuple)):
+                collect(item)
+
+    for layout in layouts:
+        collect(layout)
+    return annotations
+
+
 def layout_links(
     links: Dict[str, BaseFacet], link_layout: List[str]
 ) -> List[BaseFacet]:
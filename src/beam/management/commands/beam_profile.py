@@ -0,0 +1,110 @@
+import cProfile
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from beam.profiling import FacetProfiler
+
+
+class Command(BaseCommand):
+    help = (
+        "Render a facet through the test client against the configured database "
+        "and print where the time was spent."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "viewset", help="Dotted path to the viewset, e.g. myapp.views.MyViewSet"
+        )
+        parser.add_argument("facet", help="Name of the facet, e.g. list")
+        parser.add_argument(
+            "--query", default="", help="Query string, e.g. 'o=name&page=2'"
+        )
+        parser.add_argument("--user", help="Username of the user to log in as")
+        parser.add_argument(
+            "--kwarg",
+            action="append",
+            default=[],
+            metavar="NAME=VALUE",
+            help="Url kwarg for facets that need one, e.g. pk=1",
+        )
+        parser.add_argument(
+            "--profile-output", help="Write cProfile stats to this file"
+        )
+        parser.add_argument(
+            "--queries",
+            type=int,
+            default=5,
+            help="Number of duplicate and similar queries to show",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            viewset = import_string(options["viewset"])()
+        except ImportError as e:
+            raise CommandError(e)
+
+        if options["facet"] not in viewset.facets:
+            raise CommandError(
+                "{} has no facet {}, choose one of {}".format(
+                    options["viewset"],
+                    options["facet"],
+                    ", ".join(viewset.facets),
+                )
+            )
+
+        url_kwargs = {}
+        for kwarg in options["kwarg"]:
+            name, sep, value = kwarg.partition("=")
+            if not sep:
+                raise CommandError("Use NAME=VALUE for --kwarg, not {}".format(kwarg))
+            url_kwargs[name] = value
+
+        user = None
+        if options["user"]:
+            user_model = get_user_model()
+            try:
+                user = user_model._default_manager.get_by_natural_key(options["user"])
+            except user_model.DoesNotExist:
+                raise CommandError("There is no user {}".format(options["user"]))
+
+        profiler = cProfile.Profile() if options["profile_output"] else None
+        report = FacetProfiler(viewset, options["facet"]).profile(
+            url_kwargs=url_kwargs, query=options["query"], user=user, profiler=profiler
+        )
+        if profiler is not None:
+            profiler.dump_stats(options["profile_output"])
+
+        self.print_report(report, options["queries"])
+        if profiler is not None:
+            self.stdout.write(
+                "cProfile stats written to {}".format(options["profile_output"])
+            )
+
+    def print_report(self, report, limit):
+        write = self.stdout.write
+        write("GET {} -> {}".format(report.url, report.status_code))
+        write("Total: {:.1f}ms".format(report.duration * 1000))
+        write(
+            "SQL: {} queries in {:.1f}ms".format(
+                len(report.queries), report.query_duration * 1000
+            )
+        )
+        for category, timing in report.timings.items():
+            write(
+                "{}: {} calls in {:.1f}ms".format(
+                    category.capitalize(), timing.calls, timing.duration * 1000
+                )
+            )
+
+        for title, queries in (
+            ("Duplicate queries", report.get_duplicate_queries()),
+            ("Similar queries", report.get_similar_queries()),
+        ):
+            if not queries:
+                continue
+            write("")
+            write("{}:".format(title))
+            for sql, count in queries[:limit]:
+                write("  {}x {}".format(count, sql))
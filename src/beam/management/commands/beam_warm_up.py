@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from beam.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the urlconf and build the filterset and formset classes of all "
+        "served viewsets to validate the configuration."
+    )
+
+    def handle(self, *args, **options):
+        report = warm_up()
+
+        for viewset, error in report.errors:
+            self.stderr.write(
+                "{}.{}: {!r}".format(viewset.__module__, viewset.__qualname__, error)
+            )
+
+        if report.errors:
+            raise CommandError(
+                "Warming up failed for {} of {} viewsets".format(
+                    len(report.errors), report.viewsets
+                )
+            )
+
+        self.stdout.write(
+            "Warmed up {} viewsets with {} facets in {:.3f}s".format(
+                report.viewsets, report.facets, report.duration
+            )
+        )
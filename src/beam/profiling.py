@@ -0,0 +1,172 @@
+import cProfile
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from unittest import mock
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .actions import Action
+from .facets import BaseFacet
+from .inlines import BaseRelatedInline
+from .views import InlinesMixin
+
+# the methods timed for every category, nested calls are only counted once
+TIMED_METHODS = {
+    "permissions": [(BaseFacet, "has_perm"), (Action, "has_perm")],
+    "reverse": [(BaseFacet, "reverse")],
+    "templates": [(Template, "render")],
+    "inlines": [
+        (InlinesMixin, "get_inlines"),
+        (BaseRelatedInline, "construct_formset"),
+    ],
+}
+
+_literals = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Replace the literals in a query so that queries only differing in
+    their parameters can be grouped.
+    """
+    return _literals.sub("?", sql)
+
+
+class Timing(NamedTuple):
+    calls: int
+    duration: float
+
+
+class ProfileReport(NamedTuple):
+    url: str
+    status_code: int
+    duration: float
+    queries: List[Dict]
+    timings: Dict[str, Timing]
+
+    @property
+    def query_duration(self) -> float:
+        return sum(float(query["time"]) for query in self.queries)
+
+    def get_duplicate_queries(self) -> List[Tuple[str, int]]:
+        """
+        Queries that were executed more than once with the same parameters.
+        """
+        counts = Counter(query["sql"] for query in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+    def get_similar_queries(self) -> List[Tuple[str, int]]:
+        """
+        Queries that were executed more than once with different parameters,
+        which usually hints at a missing select_related or prefetch_related.
+        """
+        counts = Counter(normalize_sql(query["sql"]) for query in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+
+class FacetProfiler:
+    def __init__(self, viewset, facet_name: str, using: str = "default"):
+        self.viewset = viewset
+        self.facet = viewset.facets[facet_name]
+        self.using = using
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.durations: Dict[str, float] = defaultdict(float)
+        self._active: set = set()
+
+    def _wrap(self, category, method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            if category in self._active:
+                return method(*args, **kwargs)
+            self._active.add(category)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.durations[category] += time.perf_counter() - start
+                self.calls[category] += 1
+                self._active.discard(category)
+
+        return wrapper
+
+    @contextmanager
+    def timed(self):
+        with ExitStack() as stack:
+            for category, methods in TIMED_METHODS.items():
+                for cls, name in methods:
+                    method = getattr(cls, name)
+                    stack.enter_context(
+                        mock.patch.object(cls, name, self._wrap(category, method))
+                    )
+            yield
+
+    def get_url(self, url_kwargs=None, query: str = "") -> str:
+        url = self.facet.reverse(override_kwargs=url_kwargs or {})
+        if query:
+            url = "{}?{}".format(url, query.lstrip("?"))
+        return url
+
+    def get_response(self, client, url, profiler=None):
+        # the test client uses testserver as its host
+        allowed_hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        with override_settings(ALLOWED_HOSTS=allowed_hosts):
+            with CaptureQueriesContext(connections[self.using]) as queries:
+                with self.timed():
+                    if profiler is not None:
+                        profiler.enable()
+                    start = time.perf_counter()
+                    try:
+                        response = client.get(url)
+                        # render streaming and lazy responses inside the measurement
+                        b"".join(response)
+                    finally:
+                        duration = time.perf_counter() - start
+                        if profiler is not None:
+                            profiler.disable()
+        return response, duration, queries
+
+    def delete_session(self, client):
+        """
+        Delete the session of the profiled request from the session store.
+        """
+        cookie = client.cookies.get(settings.SESSION_COOKIE_NAME)
+        if cookie and cookie.value:
+            client.session.delete()
+
+    def profile(
+        self,
+        url_kwargs=None,
+        query: str = "",
+        user=None,
+        profiler: Optional[cProfile.Profile] = None,
+    ) -> ProfileReport:
+        """
+        Request the facet using the test client and measure where the time went.
+        """
+        url = self.get_url(url_kwargs, query)
+        client = Client(raise_request_exception=True)
+        try:
+            if user is not None:
+                client.force_login(user)
+            response, duration, queries = self.get_response(client, url, profiler)
+        finally:
+            self.delete_session(client)
+
+        return ProfileReport(
+            url=url,
+            status_code=response.status_code,
+            duration=duration,
+            queries=list(queries.captured_queries),
+            timings={
+                category: Timing(self.calls[category], self.durations[category])
+                for category in TIMED_METHODS
+            },
+        )
@@ -0,0 +1,189 @@
+import uuid
+from functools import lru_cache
+from typing import Dict, List, Optional, Type
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import transaction
+from django.db.models import Model, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.forms import ModelChoiceField
+from django.forms.models import ModelChoiceIterator
+
+from .cache import LocalCache, make_cache_key
+
+
+class ReferenceModelRegistry:
+    """
+    Models whose choices are cached across requests.
+
+    Reference models are small lookup tables like statuses or categories that are
+    used as choices by many forms. The objects of their choice querysets are cached
+    per query, either in the current process or, if the ``BEAM_REFERENCE_CACHE``
+    setting names a cache, in Django's cache so that all processes share them.
+    Saving or deleting an object of a reference model, or changing one of its
+    many to many relations, invalidates its cached choices. Choices cached in
+    the current process are only invalidated there, other processes keep them
+    until their timeout expires.
+    """
+
+    def __init__(self):
+        self.models: Dict[Type[Model], Optional[int]] = {}
+        self._local_cache = LocalCache(maxsize=256)
+        self._local_versions: Dict[Type[Model], str] = {}
+
+    def register(self, model: Type[Model], timeout: Optional[int] = None):
+        """
+        Cache the choices of a model for ``timeout`` seconds, forever if None.
+        """
+        self.models[model] = timeout
+        post_save.connect(self._invalidate_receiver, sender=model, weak=False)
+        post_delete.connect(self._invalidate_receiver, sender=model, weak=False)
+        m2m_changed.connect(self._m2m_changed_receiver, weak=False)
+
+    def unregister(self, model: Type[Model]):
+        self.models.pop(model, None)
+        post_save.disconnect(self._invalidate_receiver, sender=model)
+        post_delete.disconnect(self._invalidate_receiver, sender=model)
+        self.invalidate(model)
+
+    def is_registered(self, model: Type[Model]) -> bool:
+        return model in self.models
+
+    @property
+    def cache(self):
+        alias = getattr(settings, "BEAM_REFERENCE_CACHE", None)
+        return caches[alias] if alias else None
+
+    def get_version(self, model: Type[Model]) -> str:
+        cache = self.cache
+        if cache is None:
+            return self._local_versions.setdefault(model, uuid.uuid4().hex)
+        key = make_cache_key("reference-version", model._meta.label)
+        version = cache.get(key)
+        if version is None:
+            # add so that concurrent processes agree on the first version
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(key)
+        return version
+
+    def invalidate(self, model: Type[Model]):
+        cache = self.cache
+        if cache is None:
+            self._local_versions[model] = uuid.uuid4().hex
+        else:
+            cache.set(
+                make_cache_key("reference-version", model._meta.label),
+                uuid.uuid4().hex,
+                timeout=None,
+            )
+
+    def get_objects(self, queryset: QuerySet) -> List[Model]:
+        """
+        Get the objects of a queryset of a reference model from the cache.
+        """
+        model = queryset.model
+        try:
+            query = str(queryset.query)
+        except EmptyResultSet:
+            return []
+        key = make_cache_key(
+            "reference", model._meta.label, self.get_version(model), queryset.db, query
+        )
+        cache = self.cache
+        if cache is None:
+            return self._local_cache.get_or_set(
+                key, lambda: list(queryset), timeout=self.models.get(model)
+            )
+        objects = cache.get(key)
+        if objects is None:
+            objects = list(queryset)
+            cache.set(key, objects, timeout=self.models.get(model))
+        return objects
+
+    def _invalidate_receiver(self, sender, using=None, **kwargs):
+        self.invalidate(sender)
+        # the previous version may have been cached again before the transaction
+        # was committed, so invalidate once more afterwards
+        transaction.on_commit(lambda: self.invalidate(sender), using=using)
+
+    def _m2m_changed_receiver(self, sender, instance, model, using=None, **kwargs):
+        for changed_model in {sender, type(instance), model}:
+            if self.is_registered(changed_model):
+                self._invalidate_receiver(changed_model, using=using)
+
+
+reference_models = ReferenceModelRegistry()
+
+
+class ReferenceModelChoiceIterator(ModelChoiceIterator):
+    """
+    A choice iterator that takes the objects of reference models from the cache.
+    """
+
+    def get_objects(self):
+        if reference_models.is_registered(self.queryset.model):
+            return reference_models.get_objects(self.queryset)
+        return self.queryset
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        objects = self.get_objects()
+        if isinstance(objects, QuerySet) and not objects._prefetch_related_lookups:
+            objects = objects.iterator()
+        for obj in objects:
+            yield self.choice(obj)
+
+    def __len__(self):
+        objects = self.get_objects()
+        count = objects.count() if isinstance(objects, QuerySet) else len(objects)
+        return count + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        objects = self.get_objects()
+        if self.field.empty_label is not None:
+            return True
+        return objects.exists() if isinstance(objects, QuerySet) else bool(objects)
+
+
+@lru_cache(maxsize=None)
+def get_reference_iterator_class(iterator_class):
+    """
+    Get a choice iterator class that keeps the behavior of `iterator_class`, e.g.
+    the null choice of django-filter, but takes its objects from the cache.
+    """
+    if issubclass(iterator_class, ReferenceModelChoiceIterator):
+        return iterator_class
+    if iterator_class is ModelChoiceIterator:
+        return ReferenceModelChoiceIterator
+    return type(
+        "Reference{}".format(iterator_class.__name__),
+        (iterator_class, ReferenceModelChoiceIterator),
+        {},
+    )
+
+
+def renders_own_choices(widget) -> bool:
+    # autocomplete widgets filter the queryset of their choices to only
+    # render the selected options
+    return hasattr(widget, "filter_choices_to_render")
+
+
+def use_reference_choices(form):
+    """
+    Make the model choice fields of a form take the choices of reference models
+    from the cache.
+    """
+    if not reference_models.models:
+        return
+    for field in form.fields.values():
+        if (
+            isinstance(field, ModelChoiceField)
+            and field.queryset is not None
+            and reference_models.is_registered(field.queryset.model)
+            and not renders_own_choices(field.widget)
+        ):
+            field.iterator = get_reference_iterator_class(field.iterator)
+            field.widget.choices = field.choices
@@ -1,6 +1,10 @@
 import warnings
 from collections import OrderedDict
-from typing import TYPE_CHECKING, Dict, Type
+from typing import TYPE_CHECKING, Dict, Optional, Type
+
+from django.db.models import Model
+
+from .cache import LocalCache
 
 if TYPE_CHECKING:
     from .viewsets import BaseViewSet
@@ -10,6 +14,9 @@ else:
 
 RegistryType = Dict[str, Dict[str, Type[BaseViewSet]]]
 
+# keeps the frozen registries alive so that their ids aren't reused
+_frozen_registries: Dict[int, RegistryType] = {}
+
 test: RegistryType = {"foo": {"bar": BaseViewSet}}
 
 
@@ -18,6 +25,13 @@ def register(registry: RegistryType, viewset: Type[BaseViewSet]):
     app_label = model._meta.app_label
     model_name = model._meta.model_name
 
+    if is_frozen(registry):
+        warnings.warn(
+            "Registration of {} after the registry was frozen is ignored, "
+            "define it before beam warms up.".format(viewset)
+        )
+        return
+
     app_registry = registry.setdefault(app_label, {})
     if model_name in app_registry:
         warnings.warn(
@@ -28,6 +42,18 @@ def register(registry: RegistryType, viewset: Type[BaseViewSet]):
         )
         return
     app_registry[model_name] = viewset
+    _registry_indexes.pop(id(registry))
+
+
+def freeze(registry: RegistryType):
+    """
+    Prevent further registrations, e.g. once all viewsets have been imported.
+    """
+    _frozen_registries[id(registry)] = registry
+
+
+def is_frozen(registry: RegistryType) -> bool:
+    return _frozen_registries.get(id(registry)) is registry
 
 
 def unregister(registry, model):
@@ -43,15 +69,114 @@ def unregister(registry, model):
         return
 
     app_registry.pop(model_name)
+    _registry_indexes.pop(id(registry))
 
     if not app_registry:
         registry.pop(app_label)
 
 
 def get_viewset_for_model(registry, model):
-    app_label = model._meta.app_label
-    model_name = model._meta.model_name
-    return registry[app_label][model_name]
+    """
+    Get the viewset for a model, falling back to the viewset of the concrete
+    model for proxy models and to the parents for multi table inheritance.
+
+    Raises KeyError if there is none.
+    """
+    viewset = get_registry_index(registry).get_viewset(model)
+    if viewset is None:
+        raise KeyError(model)
+    return viewset
+
+
+class RegistryIndex:
+    """
+    Lookups into a registry by model, content type id and facet url name.
+
+    The index is built once for every state of the registry, see
+    `get_registry_index`. Viewsets are only instantiated when facets are looked up.
+    """
+
+    def __init__(self, registry: RegistryType):
+        self.registry = registry
+        self.viewsets: Dict[Type[Model], Type[BaseViewSet]] = {
+            viewset.model: viewset
+            for viewsets_dict in registry.values()
+            for viewset in viewsets_dict.values()
+        }
+        self._model_cache: Dict[Type[Model], Optional[Type[BaseViewSet]]] = {}
+        self._content_types: Optional[Dict[int, Optional[Type[BaseViewSet]]]] = None
+        self._instances: Dict[Type[BaseViewSet], BaseViewSet] = {}
+        self._facets: Optional[Dict[str, object]] = None
+
+    def get_viewset(self, model) -> Optional[Type[BaseViewSet]]:
+        if model in self.viewsets:
+            return self.viewsets[model]
+        if model not in self._model_cache:
+            opts = model._meta
+            candidates = [opts.concrete_model] if opts.proxy else []
+            candidates += opts.concrete_model._meta.get_parent_list()
+            self._model_cache[model] = next(
+                (
+                    self.viewsets[candidate]
+                    for candidate in candidates
+                    if candidate in self.viewsets
+                ),
+                None,
+            )
+        return self._model_cache[model]
+
+    def get_viewset_for_content_type(
+        self, content_type_id: int
+    ) -> Optional[Type[BaseViewSet]]:
+        from django.contrib.contenttypes.models import ContentType
+
+        if self._content_types is None:
+            # a single query for all registered models
+            content_types = ContentType.objects.get_for_models(
+                *self.viewsets, for_concrete_models=False
+            )
+            self._content_types = {
+                content_type.pk: self.viewsets[model]
+                for model, content_type in content_types.items()
+            }
+        if content_type_id not in self._content_types:
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            self._content_types[content_type_id] = (
+                self.get_viewset(model) if model is not None else None
+            )
+        return self._content_types[content_type_id]
+
+    def get_instance(self, viewset: Type[BaseViewSet]) -> BaseViewSet:
+        """
+        Get a shared instance of a registered viewset.
+        """
+        if viewset not in self._instances:
+            self._instances[viewset] = viewset()
+        return self._instances[viewset]
+
+    def get_facet(self, url_name: str):
+        """
+        Get the facet for a url name, e.g. ``testapp_dragonfly_list``.
+        """
+        if self._facets is None:
+            self._facets = {
+                facet.url_name: facet
+                for viewset in self.viewsets.values()
+                for facet in self.get_instance(viewset).facets.values()
+            }
+        return self._facets.get(url_name)
+
+
+_registry_indexes = LocalCache()
+
+
+def get_registry_index(registry: RegistryType) -> RegistryIndex:
+    """
+    Get the index for a registry, it is rebuilt after viewsets are
+    registered or unregistered.
+    """
+    # a cached index keeps its registry alive, so the id can't be reused meanwhile
+    return _registry_indexes.get_or_set(id(registry), lambda: RegistryIndex(registry))
 
 
 class ViewsetMetaClass(type):
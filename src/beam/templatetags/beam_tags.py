@@ -17,8 +17,16 @@ from django.utils.safestring import mark_safe
 
 from beam.facets import BaseFacet
 from beam.layouts import layout_links
-from beam.registry import default_registry, get_viewset_for_model
-from beam.utils import navigation_facet_entry, reverse_facet
+from beam.registry import default_registry
+from beam.utils import (
+    CreateRelatedUrls,
+    get_cached_for_permissions,
+    get_registry_facets,
+    get_registry_key,
+    get_related_facet_url,
+    navigation_facet_entry,
+    reverse_facet,
+)
 
 register = template.Library()
 
@@ -36,6 +44,45 @@ def get_link_url(
     )
 
 
+class CachedRowNode(template.Node):
+    def __init__(self, nodelist, obj):
+        self.nodelist = nodelist
+        self.obj = obj
+
+    def render(self, context):
+        row_cache = context.get("row_cache")
+        if row_cache is None:
+            return self.nodelist.render(context)
+
+        obj = self.obj.resolve(context)
+        cached = row_cache.get(obj.pk)
+        if cached is not None:
+            return mark_safe(cached)
+
+        rendered = self.nodelist.render(context)
+        row_cache.set(obj.pk, rendered)
+        return rendered
+
+
+@register.tag
+def cached_row(parser, token):
+    """
+    Render the enclosed row from the row cache in the context if possible.
+
+    Usage::
+
+        {% cached_row object %}<tr>...</tr>{% endcached_row %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            "'{}' tag requires exactly one argument.".format(bits[0])
+        )
+    nodelist = parser.parse(("endcached_row",))
+    parser.delete_first_token()
+    return CachedRowNode(nodelist, parser.compile_filter(bits[1]))
+
+
 @register.simple_tag
 def get_attribute(obj, field):
     if getattr(field, "is_virtual", False):
@@ -70,41 +117,30 @@ def is_queryset(value):
 
 @register.simple_tag(takes_context=True)
 def get_url_for_related(context, instance, facet_name, **override_kwargs):
-    if not instance:
-        return None
-
-    opts = get_options(instance)
-
     viewset = context.get("viewset", None)
-    if viewset:
-        registry = viewset.registry
-    else:
-        registry = default_registry
-
-    try:
-        viewset = get_viewset_for_model(registry, opts.model)
-    except KeyError:
-        return None
-
-    facets = viewset().facets
-    if facet_name not in facets:
-        return None
-
+    registry = viewset.registry if viewset else default_registry
     request = getattr(context, "request", None)
+    return get_related_facet_url(
+        registry, request, instance, facet_name, override_kwargs
+    )
 
-    facet = facets[facet_name]
 
-    if request and not facet.has_perm(
-        request.user, obj=instance, request=request, override_kwargs=override_kwargs
-    ):
-        return None
+@register.simple_tag(takes_context=True)
+def get_create_url_for_field(context, form_field):
+    """
+    Return the url to create a related object for a model choice field.
 
-    return reverse_facet(
-        facet=facet,
-        obj=instance,
-        request=request,
-        override_kwargs=override_kwargs,
-    )
+    The urls are looked up in the ``create_related_urls`` of the view so that
+    they are resolved once per form class and field, not once per form.
+    """
+    create_related_urls = context.get("create_related_urls", None)
+    if create_related_urls is None:
+        viewset = context.get("viewset", None)
+        create_related_urls = CreateRelatedUrls(
+            viewset.registry if viewset else default_registry,
+            getattr(context, "request", None),
+        )
+    return create_related_urls.get(form_field.form, form_field.name)
 
 
 @register.filter
@@ -190,26 +226,42 @@ def get_apps_for_navigation(context):
     request = context.get("request", None)
     user = request.user if request else None
 
-    apps_with_entries = []
-    for app_label, viewsets_dict in default_registry.items():
-        entries = []
-        for viewset in viewsets_dict.values():
-            entry = navigation_facet_entry(
-                viewset().links.get("list"), user=user, request=request
-            )
-            if entry:
-                entries.append(entry)
-
-        if not entries:
-            continue
-
-        group = {
-            "app_label": app_label,
-            "app_config": apps.get_app_config(app_label),
-            "entries": entries,
-        }
-        apps_with_entries.append(group)
-    return apps_with_entries
+    grouped_facets = get_registry_facets(default_registry, ["list"])
+
+    def build():
+        apps_with_entries = []
+        for app_label, viewsets in grouped_facets:
+            entries = []
+            for viewset, facets in viewsets:
+                for facet in facets:
+                    entry = navigation_facet_entry(facet, user=user, request=request)
+                    if entry:
+                        label, url = entry
+                        entries.append((str(label), url))
+
+            if not entries:
+                continue
+
+            group = {
+                "app_label": app_label,
+                "app_config": apps.get_app_config(app_label),
+                "entries": entries,
+            }
+            apps_with_entries.append(group)
+        return apps_with_entries
+
+    return get_cached_for_permissions(
+        ("navigation", get_registry_key(default_registry)),
+        facets=[
+            facet
+            for app_label, viewsets in grouped_facets
+            for viewset, facets in viewsets
+            for facet in facets
+        ],
+        user=user,
+        request=request,
+        build=build,
+    )
 
 
 @register.simple_tag(takes_context=True)
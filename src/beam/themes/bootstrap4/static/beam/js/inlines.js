@@ -1,21 +1,30 @@
 function RelatedInline(elem) {
   this.elem = elem;
   this.items = [];
+  this.itemsById = new Map();
+  // items that changed since they were last rendered
+  this.dirtyItems = new Set();
   let $elem = jQuery(elem);
   this.canOrder = !!$elem.data("can-order");
   this.canDelete = !!$elem.data("can-delete");
+  this.submitChangedOnly = !!$elem.data("submit-changed-only");
   this.orderFieldName = $elem.data("order-field");
   this.prefix = $elem.data("prefix");
   this.numItemsInput = $elem.find("#id_" + this.prefix + "-TOTAL_FORMS")[0];
+  this.group = $elem.find(".related-inline-group")[0];
+  this.nextItemId = 0;
+  this.maxOrder = 0;
+
+  // the empty form is cloned for every new item, so only read it once
+  let emptyForm = $elem.find(".empty-form")[0];
+  this.template = emptyForm === undefined ? "" : emptyForm.outerHTML;
 
   let that = this;
 
   $elem.find(".related-inline-group .related-inline-item").each(function () {
     let itemId = jQuery(this).data("inline-id");
-    let orderInput = jQuery(this).find(
-      "#id_" + that.prefix + "-" + itemId + "-" + that.orderFieldName
-    );
-    let order = parseInt(jQuery(orderInput).val(), 10);
+    let orderInput = that.findOrderInput(this, itemId);
+    let order = orderInput === null ? NaN : parseInt(orderInput.value, 10);
     // might result in invalid order values, fixed after all items are added
     that._addItem(itemId, this, order);
   });
@@ -32,7 +41,8 @@ function RelatedInline(elem) {
   // fix missing order values from empty forms
   for (let item of this.items) {
     if (isNaN(item.order)) {
-      item.order = this.getMaxOrder() + 1;
+      this.maxOrder += 1;
+      item.order = this.maxOrder;
     }
   }
 
@@ -54,8 +64,7 @@ function RelatedInline(elem) {
   $elem.find(".related-inline-item-remove").removeClass("d-none");
 
   if (this.canOrder) {
-    let group = $elem.find(".related-inline-group")[0];
-    Sortable.create(group, {
+    Sortable.create(this.group, {
       dataIdAttr: "data-inline-id",
       handle: ".handle",
       store: {
@@ -70,65 +79,155 @@ function RelatedInline(elem) {
   }
 
   this.render();
+
+  if (this.submitChangedOnly) {
+    this.initChangedOnly();
+  }
 }
 
+// above this number of items, the browser skips rendering items that are off-screen
+RelatedInline.prototype.virtualizeThreshold = 100;
+
 RelatedInline.prototype.getItemCount = function () {
   return this.items.length;
 };
 
+RelatedInline.prototype.findOrderInput = function (itemElem, itemId) {
+  return itemElem.querySelector(
+    "#id_" + this.prefix + "-" + itemId + "-" + this.orderFieldName
+  );
+};
+
 RelatedInline.prototype.render = function () {
   let itemCount = this.getItemCount();
-  jQuery(this.numItemsInput).val(itemCount);
+  if (this.numItemsInput.value !== String(itemCount)) {
+    this.numItemsInput.value = itemCount;
+  }
 
-  for (let item of this.items) {
-    if (item.elem === undefined) {
-      let template = jQuery(this.elem).find(".empty-form")[0].outerHTML;
-      let itemHtml = template.replace(/__prefix__/g, item.id);
-      item.elem = jQuery(itemHtml)
-        .removeClass("empty-form")
-        .appendTo(jQuery(this.elem).find(".related-inline-group"))[0];
+  let virtualize = itemCount > this.virtualizeThreshold;
+  for (let item of this.dirtyItems) {
+    this.renderItem(item, virtualize);
+  }
+  this.dirtyItems.clear();
+
+  if (virtualize && !this.virtualized) {
+    for (let item of this.items) {
+      this.virtualizeItem(item);
     }
-    if (this.canOrder && item.orderInput === undefined) {
-      item.orderInput = jQuery(item.elem).find(
-        "#id_" + this.prefix + "-" + item.id + "-" + this.orderFieldName
-      );
-      jQuery(item.orderInput).closest(".field-group").children().hide();
-      jQuery(item.orderInput)
-        .closest(".field-group")
-        .append(
-          "<label class='handle col-form-label btn' style='cursor: grab'>↕</label>"
-        );
+  }
+  this.virtualized = virtualize;
+};
+
+RelatedInline.prototype.renderItem = function (item, virtualize) {
+  if (item.elem === undefined) {
+    let template = document.createElement("template");
+    template.innerHTML = this.template.replace(/__prefix__/g, item.id);
+    item.elem = template.content.firstElementChild;
+    item.elem.classList.remove("empty-form");
+    this.group.appendChild(item.elem);
+    if (virtualize) {
+      this.virtualizeItem(item);
     }
-    if (this.canDelete && item.deleteInput === undefined) {
-      jQuery(item.elem)
-        .find('[name="' + this.prefix + "-" + item.id + '-DELETE"]')
-        .closest(".beam-field-DELETE")
-        .remove();
-      item.deleteInput = jQuery(
-        '<input type="hidden" name="' +
-          this.prefix +
-          "-" +
-          item.id +
-          '-DELETE">'
-      )[0];
-      jQuery(item.elem)
-        .find(".related-inline-item-remove")
-        .after(item.deleteInput);
+  }
+  if (this.canOrder && item.orderInput === undefined) {
+    item.orderInput = this.findOrderInput(item.elem, item.id);
+    let fieldGroup = jQuery(item.orderInput).closest(".field-group");
+    fieldGroup.children().hide();
+    fieldGroup.append(
+      "<label class='handle col-form-label btn' style='cursor: grab'>↕</label>"
+    );
+  }
+  if (this.canDelete && item.deleteInput === undefined) {
+    jQuery(item.elem)
+      .find('[name="' + this.prefix + "-" + item.id + '-DELETE"]')
+      .closest(".beam-field-DELETE")
+      .remove();
+    item.deleteInput = document.createElement("input");
+    item.deleteInput.type = "hidden";
+    item.deleteInput.name = this.prefix + "-" + item.id + "-DELETE";
+    jQuery(item.elem).find(".related-inline-item-remove").after(item.deleteInput);
+  }
+
+  if (item.deleted) {
+    item.elem.style.display = "none";
+    if (item.deleteInput !== undefined) {
+      item.deleteInput.value = true;
     }
+  } else {
+    item.elem.style.display = "";
+    if (item.deleteInput !== undefined) {
+      item.deleteInput.value = false;
+    }
+  }
+  if (this.canOrder && item.orderInput) {
+    item.orderInput.value = item.order;
+  }
+};
 
-    if (item.deleted) {
-      jQuery(item.elem).hide();
-      jQuery(item.deleteInput).val(true);
-    } else {
-      jQuery(item.elem).show();
-      jQuery(item.deleteInput).val(false);
+RelatedInline.prototype.virtualizeItem = function (item) {
+  if (item.elem !== undefined) {
+    item.elem.style.contentVisibility = "auto";
+    item.elem.style.containIntrinsicSize = "auto 4rem";
+  }
+};
+
+RelatedInline.prototype.initChangedOnly = function () {
+  let initialFormsInput = this.elem.querySelector(
+    "#id_" + this.prefix + "-INITIAL_FORMS"
+  );
+  this.initialFormCount = parseInt(initialFormsInput.value, 10);
+  this.disabledInputs = [];
+  for (let item of this.items) {
+    if (item.id < this.initialFormCount) {
+      item.initialData = this.serializeItem(item);
     }
-    if (this.canOrder) {
-      jQuery(item.orderInput).val(item.order);
+  }
+
+  let that = this;
+  jQuery(this.elem)
+    .closest("form")
+    .on("submit", function () {
+      that.disableUnchangedItems();
+    });
+  // the inputs stay disabled when the page is restored from the history
+  window.addEventListener("pageshow", function () {
+    that.enableItems();
+  });
+};
+
+RelatedInline.prototype.serializeItem = function (item) {
+  return jQuery(item.elem).find(":input").serialize();
+};
+
+RelatedInline.prototype.isChanged = function (item) {
+  return (
+    item.initialData === undefined ||
+    item.deleted ||
+    // forms that were submitted before have to be submitted again
+    item.elem.hasAttribute("data-inline-bound") ||
+    this.serializeItem(item) !== item.initialData
+  );
+};
+
+RelatedInline.prototype.disableUnchangedItems = function () {
+  // unchanged forms are not submitted, the server only validates the others
+  for (let item of this.items) {
+    if (!this.isChanged(item)) {
+      for (let input of jQuery(item.elem).find(":input[name]:enabled")) {
+        input.disabled = true;
+        this.disabledInputs.push(input);
+      }
     }
   }
 };
 
+RelatedInline.prototype.enableItems = function () {
+  for (let input of this.disabledInputs) {
+    input.disabled = false;
+  }
+  this.disabledInputs = [];
+};
+
 RelatedInline.prototype._addItem = function (itemId, elem, order) {
   let item = {
     id: itemId,
@@ -139,27 +238,23 @@ RelatedInline.prototype._addItem = function (itemId, elem, order) {
     deleted: false,
   };
   this.items.push(item);
+  this.itemsById.set(String(itemId), item);
+  this.dirtyItems.add(item);
+  if (itemId >= this.nextItemId) {
+    this.nextItemId = itemId + 1;
+  }
+  if (!isNaN(order) && order > this.maxOrder) {
+    this.maxOrder = order;
+  }
   return item;
 };
 
 RelatedInline.prototype.getNextItemId = function () {
-  let maxId = -1;
-  for (let item of this.items) {
-    if (item.id >= maxId) {
-      maxId = item.id;
-    }
-  }
-  return maxId + 1;
+  return this.nextItemId;
 };
 
 RelatedInline.prototype.getMaxOrder = function () {
-  let maxOrder = 0;
-  for (let item of this.items) {
-    if (!isNaN(item.order) && item.order > maxOrder) {
-      maxOrder = item.order;
-    }
-  }
-  return maxOrder;
+  return this.maxOrder;
 };
 
 RelatedInline.prototype.getItemIdsInOrder = function () {
@@ -173,15 +268,37 @@ RelatedInline.prototype.getItemIdsInOrder = function () {
   }
   return ids;
 };
+
 RelatedInline.prototype.setItemOrderFromIds = function (ids) {
-  for (let i = 0; i < ids.length; i++) {
-    for (let item of this.items) {
-      if (String(item.id) === String(ids[i])) {
-        item.order = i;
-        break;
-      }
+  let orderedItems = [];
+  for (let id of ids) {
+    let item = this.itemsById.get(String(id));
+    if (item !== undefined) {
+      orderedItems.push(item);
+    }
+  }
+
+  // reuse the existing order values, so moving an item only changes the order
+  // of the items between its old and its new position
+  let orders = orderedItems.map(function (item) {
+    return item.order;
+  });
+  orders.sort(function (a, b) {
+    return a - b;
+  });
+  let distinct = orders.every(function (order, i) {
+    return !isNaN(order) && (i === 0 || order > orders[i - 1]);
+  });
+  for (let i = 0; i < orderedItems.length; i++) {
+    let order = distinct ? orders[i] : i;
+    if (orderedItems[i].order !== order) {
+      orderedItems[i].order = order;
+      this.dirtyItems.add(orderedItems[i]);
     }
   }
+  if (orderedItems.length > 0 && orders[orders.length - 1] > this.maxOrder) {
+    this.maxOrder = orders[orders.length - 1];
+  }
   this.render();
 };
 
@@ -198,12 +315,10 @@ RelatedInline.prototype.add = function () {
 };
 
 RelatedInline.prototype.remove = function (id) {
-  let deleted;
-  for (let item of this.items) {
-    if (item.id === id) {
-      item.deleted = true;
-      deleted = item;
-    }
+  let deleted = this.itemsById.get(String(id));
+  if (deleted !== undefined) {
+    deleted.deleted = true;
+    this.dirtyItems.add(deleted);
   }
   this.render();
 
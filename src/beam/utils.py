@@ -1,6 +1,18 @@
-from typing import Optional, Tuple
+import hashlib
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
 
-from django.urls import NoReverseMatch
+from asgiref.sync import sync_to_async
+from django.forms.utils import pretty_name
+from django.urls import NoReverseMatch, get_script_prefix
+from django.utils.translation import get_language
+from django_filters.filterset import filterset_factory
+
+from .cache import LocalCache
+from .registry import default_registry, get_registry_index
+
+registry_facets_cache = LocalCache()
+navigation_cache = LocalCache()
+filterset_class_cache = LocalCache()
 
 
 def check_permission(permission, user, obj):
@@ -14,12 +26,62 @@ def check_permission(permission, user, obj):
     return user.has_perm(permission)
 
 
+async def acheck_permission(permission, user, obj):
+    if permission is None:
+        return True
+    if not user:
+        return False
+    if callable(permission):
+        return await sync_to_async(permission)(user, obj=obj)
+    if hasattr(user, "ahas_perm"):
+        return await user.ahas_perm(permission)
+    return await sync_to_async(user.has_perm)(permission)
+
+
+def permission_fingerprint(user) -> str:
+    """
+    Get a short string identifying the permissions of a user.
+
+    Users sharing the same set of permissions share the same fingerprint so it can
+    be used as part of cache keys for content that only depends on permissions.
+    """
+    if not user or not user.is_authenticated:
+        return "anonymous"
+    if not user.is_active:
+        return "inactive"
+    if user.is_superuser:
+        return "superuser"
+    return hash_permissions(user.get_all_permissions())
+
+
+async def apermission_fingerprint(user) -> str:
+    """
+    Async version of permission_fingerprint.
+    """
+    if not user or not user.is_authenticated or not user.is_active:
+        return permission_fingerprint(user)
+    if user.is_superuser:
+        return "superuser"
+    if hasattr(user, "aget_all_permissions"):
+        return hash_permissions(await user.aget_all_permissions())
+    return hash_permissions(await sync_to_async(user.get_all_permissions)())
+
+
+def hash_permissions(permissions) -> str:
+    permissions = "\n".join(sorted(permissions))
+    return hashlib.sha1(permissions.encode("utf-8")).hexdigest()
+
+
 def navigation_facet_entry(
     facet=None, user=None, request=None
 ) -> Optional[Tuple[str, str]]:
     """
-    Get an optional tuple (label, url) for a given facet to use in render_navigation
+    Get an optional tuple (label, url) for a given facet or the url name
+    of a facet in the default registry to use in render_navigation
     """
+    if isinstance(facet, str):
+        facet = get_registry_index(default_registry).get_facet(facet)
+
     if not facet:
         return None
 
@@ -40,6 +102,129 @@ def navigation_facet_entry(
     return label, url
 
 
+def get_filterset_class_for_fields(model, fields, annotations=None):
+    """
+    Get a filterset class for the given model and fields, the class is only
+    built once for every model and set of fields.
+
+    Fields that are keys of ``annotations`` are filtered using the output field
+    of their expression.
+    """
+    if isinstance(fields, dict):
+        lookups = {name: list(lookups) for name, lookups in fields.items()}
+    else:
+        lookups = {name: ["exact"] for name in fields}
+    annotations = {
+        name: expression
+        for name, expression in (annotations or {}).items()
+        if name in lookups
+    }
+
+    def build():
+        model_fields = {
+            name: field_lookups
+            for name, field_lookups in lookups.items()
+            if name not in annotations
+        }
+        filterset_class = filterset_factory(model=model, fields=model_fields)
+        if not annotations:
+            return filterset_class
+
+        query = model._default_manager.annotate(**annotations).query
+        filters = {}
+        for name in annotations:
+            output_field = query.annotations[name].output_field
+            for lookup in lookups[name]:
+                filter_name = (
+                    name if lookup == "exact" else "{}__{}".format(name, lookup)
+                )
+                filter_class, params = filterset_class.filter_for_lookup(
+                    output_field, lookup
+                )
+                filters[filter_name] = filter_class(
+                    field_name=name,
+                    lookup_expr=lookup,
+                    label=pretty_name(filter_name),
+                    **params,
+                )
+        return type(filterset_class.__name__, (filterset_class,), filters)
+
+    key = tuple((name, tuple(field_lookups)) for name, field_lookups in lookups.items())
+    return filterset_class_cache.get_or_set(
+        (model, key, tuple(annotations.items())), build
+    )
+
+
+def get_registry_key(registry) -> Hashable:
+    """
+    Get a hashable key that changes whenever viewsets are added to or removed
+    from the registry.
+    """
+    return tuple(
+        (app_label, tuple(viewsets_dict.items()))
+        for app_label, viewsets_dict in registry.items()
+    )
+
+
+def get_registry_facets(registry, facet_names: Sequence[str]) -> List[Tuple[str, list]]:
+    """
+    Get the facets with the given names for every viewset in the registry,
+    grouped by app label as ``[(app_label, [(viewset, [facet, ...]), ...]), ...]``.
+
+    Viewsets are only instantiated once for every state of the registry.
+    """
+
+    def build():
+        index = get_registry_index(registry)
+        grouped = []
+        for app_label, viewsets_dict in registry.items():
+            viewsets = []
+            for viewset in viewsets_dict.values():
+                links = index.get_instance(viewset).links
+                facets = [links[name] for name in facet_names if links.get(name)]
+                viewsets.append((viewset, facets))
+            grouped.append((app_label, viewsets))
+        return grouped
+
+    key = (get_registry_key(registry), tuple(facet_names))
+    return registry_facets_cache.get_or_set(key, build)
+
+
+def is_permission_cacheable(facet) -> bool:
+    """
+    Whether the permission check and url of a facet only depend on
+    the permissions of the user, which makes them safe to cache by
+    permission_fingerprint.
+    """
+    from .facets import BaseFacet
+
+    return (
+        type(facet).has_perm is BaseFacet.has_perm
+        and not callable(facet.permission)
+        and not any(callable(value) for value in facet.url_kwargs.values())
+    )
+
+
+def get_cached_for_permissions(key: Hashable, facets, user, request, build):
+    """
+    Return build() from a process wide cache keyed by the user's permissions,
+    the language and the url prefix. Falls back to calling build() directly
+    if one of the facets does not support caching.
+    """
+    if not all(is_permission_cacheable(facet) for facet in facets):
+        return build()
+
+    resolver_match = getattr(request, "resolver_match", None)
+    key = (
+        key,
+        permission_fingerprint(user),
+        get_language(),
+        get_script_prefix(),
+        resolver_match.namespace if resolver_match else "",
+    )
+    return navigation_cache.get_or_set(key, build)
+
+
 def reverse_facet(facet, obj, request, override_kwargs):
     """
     Reverse a facet and raise helpful error messages if reversing fails.
@@ -50,3 +235,56 @@ def reverse_facet(facet, obj, request, override_kwargs):
         raise NoReverseMatch(f"Unable to reverse url to {facet}: {e}") from e
     except BaseException as e:
         raise Exception(f"Unable to reverse url to {facet}: {e}") from e
+
+
+def get_related_facet_url(registry, request, instance, facet_name, override_kwargs):
+    """
+    Reverse the facet of the viewset registered for the model of `instance`,
+    which may be a model class, if the user of the request may access it.
+    """
+    if not instance:
+        return None
+
+    index = get_registry_index(registry)
+    viewset = index.get_viewset(instance._meta.model)
+    if viewset is None:
+        return None
+
+    facets = index.get_instance(viewset).facets
+    if facet_name not in facets:
+        return None
+
+    facet = facets[facet_name]
+    if request and not facet.has_perm(
+        request.user, obj=instance, request=request, override_kwargs=override_kwargs
+    ):
+        return None
+
+    return reverse_facet(
+        facet=facet, obj=instance, request=request, override_kwargs=override_kwargs
+    )
+
+
+class CreateRelatedUrls:
+    """
+    The create urls of the related models of form fields, resolved once per
+    form class and field for a request instead of once per rendered field.
+    """
+
+    def __init__(self, registry, request):
+        self.registry = registry
+        self.request = request
+        self.urls: Dict[Tuple[type, str], Optional[str]] = {}
+
+    def get(self, form, field_name) -> Optional[str]:
+        key = (type(form), field_name)
+        if key not in self.urls:
+            queryset = getattr(form.fields[field_name], "queryset", None)
+            self.urls[key] = get_related_facet_url(
+                self.registry,
+                self.request,
+                queryset.model if queryset is not None else None,
+                "create",
+                {},
+            )
+        return self.urls[key]
@@ -1,25 +1,47 @@
+import inspect
+from datetime import datetime
 from typing import List, Optional, Type
 
+from asgiref.sync import sync_to_async
 from django.apps import apps
 from django.contrib import messages
 from django.contrib.admin.utils import NestedObjects
+from django.core.cache import caches
 from django.core.exceptions import FieldDoesNotExist, PermissionDenied
-from django.db import router
+from django.db import router, transaction
+from django.db.models import Count, Max
+from django.db.models.constants import LOOKUP_SEP
 from django.forms import all_valid
-from django.http import HttpResponse, HttpResponseForbidden
+from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import salted_hmac
 from django.utils.html import escape
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
 from django.utils.translation import gettext as _
 from django.views import generic
 from django.views.generic.base import ContextMixin, TemplateView
-from django_filters.filterset import filterset_factory
 from extra_views import SearchableListMixin
 
 from beam.registry import default_registry, register
 
 from .actions import Action
+from .cache import FragmentCache, make_cache_key
 from .facets import Facet, ListFacet
 from .inlines import RelatedInline
+from .layouts import QueryVirtualField, get_annotations
+from .reference import use_reference_choices
+from .utils import (
+    CreateRelatedUrls,
+    apermission_fingerprint,
+    get_cached_for_permissions,
+    get_filterset_class_for_fields,
+    get_registry_facets,
+    get_registry_key,
+    is_permission_cacheable,
+    permission_fingerprint,
+)
 
 
 class FacetMixin(ContextMixin):
@@ -58,6 +80,9 @@ class FacetMixin(ContextMixin):
         context["viewset"] = self.viewset
         context["facet"] = self.facet
         context["popup"] = self.request.GET.get("_popup")
+        context["create_related_urls"] = CreateRelatedUrls(
+            self.viewset.registry if self.viewset else default_registry, self.request
+        )
 
         return context
 
@@ -73,6 +98,11 @@ class FacetMixin(ContextMixin):
             return self.facet.form_class
         return super().get_form_class()
 
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        use_reference_choices(form)
+        return form
+
     @property
     def fields(self):
         if self.facet.fields:
@@ -82,6 +112,17 @@ class FacetMixin(ContextMixin):
     def get_inline_classes(self):
         return self.facet.inline_classes
 
+    def get_object(self, queryset=None):
+        """
+        Fetch the object of the request once and share it between the permission
+        check, the handlers, inlines, actions and the context.
+        """
+        if queryset is not None:
+            return super().get_object(queryset)
+        if "_object" not in self.__dict__:
+            self._object = super().get_object()
+        return self._object
+
     def has_perm(self):
         try:
             obj = self.get_object()
@@ -99,13 +140,112 @@ class FacetMixin(ContextMixin):
 
         return redirect_to_login(self.request.get_full_path())
 
-    def dispatch(self, request, *args, **kwargs):
+    def check_access(self) -> Optional[HttpResponse]:
+        """
+        Check the permission and prepare the view, return a response if the
+        request is denied.
+        """
         if not self.has_perm():
             return self.handle_no_permission()
+        self.prepare()
+        return None
+
+    def prepare(self):
+        """
+        Prepare the view after the permission check, e.g. build its filterset.
+        """
+
+    def dispatch(self, request, *args, **kwargs):
+        response = self.check_access()
+        if response is not None:
+            return response
 
         return super().dispatch(request, *args, **kwargs)
 
 
+class ConditionalGetMixin(FacetMixin):
+    """
+    Answer GET requests with 304 Not Modified if the client already has the
+    current version of the page. Enabled by setting ``conditional_get`` and
+    ``version_field`` on the facet.
+    """
+
+    def get_version(self):
+        """
+        Return a value that changes whenever the rendered content changes, or None
+        to always render the page.
+        """
+        return None
+
+    def get_etag(self, version, fingerprint):
+        user = self.request.user
+        parts = [
+            self.facet.url_name,
+            str(version),
+            str(user.pk) if user.is_authenticated else "",
+            fingerprint,
+            get_language() or "",
+            self.request.GET.urlencode(),
+        ]
+        return quote_etag(
+            salted_hmac("beam.conditional_get", "\n".join(parts)).hexdigest()
+        )
+
+    def use_conditional_get(self):
+        return (
+            self.facet.conditional_get
+            and self.request.method in ("GET", "HEAD")
+            and not self.has_pending_messages()
+        )
+
+    def has_pending_messages(self):
+        # messages, e.g. of an action that redirected here, are only shown if the
+        # page is rendered again
+        return len(messages.get_messages(self.request)) > 0
+
+    def get_conditional_version(self):
+        """
+        Return the version of the page, or None if it has to be rendered.
+        """
+        if not self.use_conditional_get():
+            return None
+        return self.get_version()
+
+    def get_validators(self, version, fingerprint):
+        etag = self.get_etag(version, fingerprint)
+        last_modified = version.timestamp() if isinstance(version, datetime) else None
+        return etag, last_modified
+
+    def get_not_modified_response(self, etag, last_modified):
+        return get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified
+        )
+
+    def patch_conditional_response(self, response, etag, last_modified):
+        if response.status_code == 200:
+            response.headers["ETag"] = etag
+            if last_modified is not None:
+                response.headers["Last-Modified"] = http_date(last_modified)
+
+        # the content depends on the user, so it must neither end up in a shared
+        # cache nor be reused without asking us first
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get(self, request, *args, **kwargs):
+        version = self.get_conditional_version()
+        if version is None:
+            return super().get(request, *args, **kwargs)
+
+        etag, last_modified = self.get_validators(
+            version, permission_fingerprint(request.user)
+        )
+        response = self.get_not_modified_response(etag, last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.patch_conditional_response(response, etag, last_modified)
+
+
 class InlinesMixin(ContextMixin):
     inline_classes: List[Type[RelatedInline]] = []
 
@@ -148,9 +288,10 @@ class CreateWithInlinesMixin(InlinesMixin):
         return self.form_invalid(form, inlines)
 
     def form_valid(self, form, inlines):
-        self.object = form.save()
-        for inline in inlines:
-            inline.formset.save()
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            self.object = form.save()
+            for inline in inlines:
+                inline.formset.save()
         return redirect(self.get_success_url())
 
     def form_invalid(self, form, inlines):
@@ -173,9 +314,10 @@ class UpdateWithInlinesMixin(InlinesMixin):
         return self.form_invalid(form, inlines)
 
     def form_valid(self, form, inlines):
-        self.object = form.save()
-        for inline in inlines:
-            inline.formset.save()
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            self.object = form.save()
+            for inline in inlines:
+                inline.formset.save()
         return redirect(self.get_success_url())
 
     def form_invalid(self, form, inlines):
@@ -275,17 +417,53 @@ class SortableListMixin(FacetMixin):
     def get_sort_fields_columns(self):
         return self.facet.list_sort_fields_columns or {}
 
+    def get_annotations(self):
+        return {
+            **(self.facet.list_annotations or {}),
+            **get_annotations(self.facet.fields, self.facet.layout),
+        }
+
+    def annotate_queryset(self, qs):
+        annotations = self.get_annotations()
+        if annotations:
+            qs = qs.annotate(**annotations)
+        return qs
+
     def get_sort_column_for_field(self, field_name):
         explicit = self.get_sort_fields_columns()
         if field_name in explicit:
             return explicit[field_name]
 
+        if field_name in self.get_annotations():
+            return field_name
+
+        if LOOKUP_SEP in field_name:
+            return self.get_sort_column_for_path(field_name)
+
         try:
             field = self.model._meta.get_field(field_name)
             return field.name
         except FieldDoesNotExist:
             return None
 
+    def get_sort_column_for_path(self, path):
+        """
+        Resolve a related path like ``dragonfly__name``, only following
+        relations to a single object so that rows aren't duplicated.
+        """
+        *relation_names, field_name = path.split(LOOKUP_SEP)
+        opts = self.model._meta
+        try:
+            for name in relation_names:
+                field = opts.get_field(name)
+                if not (field.many_to_one or field.one_to_one):
+                    return None
+                opts = field.related_model._meta
+            opts.get_field(field_name)
+        except FieldDoesNotExist:
+            return None
+        return path
+
     def get_sort_fields_from_request(self) -> List[str]:
         fields = []
         sort_fields = set(self.get_sort_fields())
@@ -322,10 +500,35 @@ class SortableListMixin(FacetMixin):
         current_sort_columns = self.get_sort_columns(current_sort_fields)
         if current_sort_columns:
             qs = qs.order_by(*current_sort_columns)
-        return qs
+        return self.add_ordering_tiebreaker(qs)
+
+    def add_ordering_tiebreaker(self, qs):
+        """
+        End the ordering with the primary key so that pages are stable when rows
+        share the same values. The primary key follows the direction of the last
+        column so that an index on ``(column, pk)`` can be used.
+        """
+        if qs.query.order_by:
+            ordering = list(qs.query.order_by)
+        elif qs.query.default_ordering:
+            ordering = list(qs.model._meta.ordering)
+        else:
+            ordering = []
+
+        pk_names = {"pk", qs.model._meta.pk.name, qs.model._meta.pk.attname}
+        descending = False
+        for column in ordering:
+            if isinstance(column, str):
+                descending = column.startswith("-")
+                if column.lstrip("-") in pk_names:
+                    return qs
+            else:
+                descending = getattr(column, "descending", False)
+
+        return qs.order_by(*ordering, "-pk" if descending else "pk")
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        qs = self.annotate_queryset(super().get_queryset())
         return self.sort_queryset(qs)
 
     def get_context_data(self, **kwargs):
@@ -351,8 +554,8 @@ class FiltersetMixin(FacetMixin):
         if self.facet.list_filterset_class:
             return self.facet.list_filterset_class
         elif self.facet.list_filterset_fields:
-            return filterset_factory(
-                model=self.model, fields=self.get_filterset_fields()
+            return get_filterset_class_for_fields(
+                self.model, self.get_filterset_fields(), self.get_annotations()
             )
         return None
 
@@ -372,7 +575,9 @@ class FiltersetMixin(FacetMixin):
         filterset_class = self.get_filterset_class()
         if not filterset_class:
             return None
-        return filterset_class(**self.get_filterset_kwargs())
+        filterset = filterset_class(**self.get_filterset_kwargs())
+        use_reference_choices(filterset.form)
+        return filterset
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -380,9 +585,9 @@ class FiltersetMixin(FacetMixin):
             qs = self.filterset.filter_queryset(qs)
         return qs
 
-    def dispatch(self, request, *args, **kwargs):
+    def prepare(self):
+        super().prepare()
         self.filterset = self.get_filterset()
-        return super().dispatch(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -438,12 +643,16 @@ class InlineActionMixin(InlinesMixin):
 
         return redirect(self.request.get_full_path())
 
-    def post(self, request, *args, **kwargs):
+    def apply_action(self) -> Optional[HttpResponse]:
         inline, action = self.get_action()
         if action:
-            response = self.handle_action(inline, action)
-            if response:
-                return response
+            return self.handle_action(inline, action)
+        return None
+
+    def post(self, request, *args, **kwargs):
+        response = self.apply_action()
+        if response:
+            return response
         return self.get(request, *args, **kwargs)
 
 
@@ -515,21 +724,106 @@ class ListActionsMixin(FacetMixin):
 
         return redirect(self.request.get_full_path())
 
-    def dispatch(self, request, *args, **kwargs):
+    def prepare(self):
+        super().prepare()
         self.actions = self.get_actions()
-        return super().dispatch(request, *args, **kwargs)
 
-    def post(self, request, *args, **kwargs):
+    def apply_action(self) -> Optional[HttpResponse]:
         action = self.get_action()
         if action:
-            response = self.handle_action(action)
-            if response:
-                return response
+            return self.handle_action(action)
+        return None
+
+    def post(self, request, *args, **kwargs):
+        response = self.apply_action()
+        if response:
+            return response
         return self.get(request, *args, **kwargs)
 
 
+class RowCacheMixin(FacetMixin):
+    """
+    Serve the rendered rows of a list from the cache if the object did not change.
+    Enabled by setting ``list_row_cache`` and ``version_field`` on the facet.
+    """
+
+    facet: ListFacet
+    row_cache_alias = "default"
+
+    def get_row_cache_key_parts(self):
+        """
+        Everything besides the object's version that changes the rendered row.
+        """
+        viewset = self.viewset
+        return [
+            "{}.{}".format(viewset.__module__, viewset.__class__.__qualname__),
+            self.facet.name,
+            self.get_row_cache_user_key(),
+            get_language() or "",
+            [str(field) for field in self.facet.fields],
+            self.facet.list_item_link_layout,
+            bool(getattr(self, "actions", None)),
+            self.request.GET.get("_popup", ""),
+        ]
+
+    def get_row_cache_user_key(self):
+        user = self.request.user
+        fingerprint = permission_fingerprint(user)
+        if all(is_permission_cacheable(facet) for facet in self.viewset.links.values()):
+            return fingerprint
+        # the links of a row depend on more than the permissions of the user
+        return "{}-{}".format(fingerprint, user.pk)
+
+    def is_row_cacheable(self) -> bool:
+        """
+        Whether the rows only show values covered by the object's version.
+        Related objects and their links, which depend on the permissions of the
+        related viewset, and query virtual fields change without it.
+        """
+        relation_names = set()
+        for model_field in self.model._meta.get_fields():
+            if model_field.is_relation:
+                relation_names.add(model_field.name)
+                if model_field.auto_created and not model_field.concrete:
+                    relation_names.add(model_field.get_accessor_name())
+        return not any(
+            isinstance(field, QueryVirtualField) or field in relation_names
+            for field in self.facet.fields
+        )
+
+    def get_row_cache(self, context) -> Optional[FragmentCache]:
+        if not self.facet.list_row_cache or not self.is_row_cacheable():
+            return None
+
+        parts = self.get_row_cache_key_parts()
+        version_field = self.facet.version_field
+        keys = {
+            obj.pk: make_cache_key("row", obj.pk, getattr(obj, version_field), *parts)
+            for obj in context["object_list"]
+        }
+        return FragmentCache(
+            caches[self.row_cache_alias],
+            keys,
+            timeout=self.facet.list_row_cache_timeout,
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["row_cache"] = self.get_row_cache(context)
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        row_cache = context.get("row_cache")
+        if row_cache is not None:
+            response.add_post_render_callback(lambda response: row_cache.flush())
+        return response
+
+
 class ListView(
     ListActionsMixin,
+    RowCacheMixin,
+    ConditionalGetMixin,
     FiltersetMixin,
     SearchableListMixin,
     SortableListMixin,
@@ -538,6 +832,13 @@ class ListView(
 ):
     paginate_max_show_all = 250
 
+    def get_version_aggregates(self):
+        return {"version": Max(self.facet.version_field), "count": Count("pk")}
+
+    def get_version(self):
+        aggregates = self.get_queryset().aggregate(**self.get_version_aggregates())
+        return "{version}-{count}".format(**aggregates)
+
     @property
     def search_fields(self):
         return self.facet.list_search_fields
@@ -547,12 +848,15 @@ class ListView(
 
         show_all = self.request.GET.get("show_all", False)
 
-        if show_all and queryset.count() <= self.paginate_max_show_all:
+        if show_all and self.get_object_count(queryset) <= self.paginate_max_show_all:
             # ensure the queryset will not be paginated
             return None
 
         return paginate_by
 
+    def get_object_count(self, queryset):
+        return queryset.count()
+
     def get_search_query(self):
         if not self.search_fields:
             return ""
@@ -569,11 +873,219 @@ class ListView(
         return context
 
 
-class DetailView(InlineActionMixin, FacetMixin, InlinesMixin, generic.DetailView):
+class DetailView(
+    InlineActionMixin, ConditionalGetMixin, FacetMixin, InlinesMixin, generic.DetailView
+):
+    def get_version(self):
+        obj = self.get_object()
+        version = getattr(obj, self.facet.version_field)
+        inline_classes = self.get_inline_classes()
+        if not inline_classes:
+            return version
+        # inline actions change the inlines but not the object itself, their
+        # versions are aggregated without building the inlines
+        inline_versions = [
+            inline_class.get_version(obj) for inline_class in inline_classes
+        ]
+        return "{}-{}".format(version, "-".join(inline_versions))
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        annotations = get_annotations(self.facet.fields, self.facet.layout)
+        if annotations:
+            qs = qs.annotate(**annotations)
+        return qs
+
     def get_template_names(self):
         return super().get_template_names() + ["beam/detail.html"]
 
 
+class AsyncFacetMixin(FacetMixin):
+    """
+    Serve a facet view asynchronously. Permissions are checked and objects are
+    fetched using the async ORM, only building the context and rendering the
+    templates happens in a thread.
+    """
+
+    async def aget_user(self):
+        request = self.request
+        if hasattr(request, "auser"):
+            return await request.auser()
+        # evaluate the lazy user outside of the event loop
+        await sync_to_async(lambda: request.user.is_authenticated)()
+        return request.user
+
+    async def aget_permission_object(self):
+        return None
+
+    async def ahas_perm(self):
+        obj = await self.aget_permission_object()
+        return await self.facet.ahas_perm(self.request.user, obj)
+
+    async def acheck_access(self) -> Optional[HttpResponse]:
+        if not await self.ahas_perm():
+            return self.handle_no_permission()
+        await self.aprepare()
+        return None
+
+    async def aprepare(self):
+        # building e.g. the actions might query the database
+        await sync_to_async(self.prepare)()
+
+    def check_access(self) -> Optional[HttpResponse]:
+        # dispatch already checked the access asynchronously
+        return None
+
+    def render_response(self, **kwargs):
+        response = self.render_to_response(self.get_context_data(**kwargs))
+        if hasattr(response, "render"):
+            response.render()
+        return response
+
+    async def arender_response(self, **kwargs):
+        return await sync_to_async(self.render_response)(**kwargs)
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await self.aget_user()
+        response = await self.acheck_access()
+        if response is not None:
+            return response
+
+        # the dispatch of the sync views and mixins may query the database, it
+        # returns the coroutine of the async handler which is awaited here
+        response = await sync_to_async(super().dispatch)(request, *args, **kwargs)
+        if inspect.isawaitable(response):
+            response = await response
+        return response
+
+
+class AsyncMultipleObjectMixin:
+    """
+    Count and fetch the current page of ``object_list`` using the async ORM, the
+    paginator then uses the prefetched count and rows.
+    """
+
+    object_count: Optional[int] = None
+    paginated = None
+
+    def get_object_count(self, queryset):
+        if self.object_count is None:
+            return super().get_object_count(queryset)
+        return self.object_count
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        if self.object_count is not None:
+            paginator.count = self.object_count
+        return paginator
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.paginated is None:
+            self.paginated = super().paginate_queryset(queryset, page_size)
+        return self.paginated
+
+    async def afetch_object_list(self):
+        queryset = self.object_list
+        self.object_count = await queryset.acount()
+
+        page_size = self.get_paginate_by(queryset)
+        if page_size:
+            __, __, queryset, __ = self.paginate_queryset(queryset, page_size)
+
+        # fills the result cache of the queryset the template is going to use
+        [obj async for obj in queryset]
+
+
+class AsyncListView(AsyncMultipleObjectMixin, AsyncFacetMixin, ListView):
+    async def aget_version(self):
+        aggregates = await self.object_list.aaggregate(**self.get_version_aggregates())
+        return "{version}-{count}".format(**aggregates)
+
+    async def aget_queryset(self):
+        if self.filterset is not None and self.filterset.is_bound:
+            # validating the filters might query the database
+            return await sync_to_async(self.get_queryset)()
+        return self.get_queryset()
+
+    async def aget_response(self):
+        await self.afetch_object_list()
+        return await self.arender_response()
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = await self.aget_queryset()
+        if not await sync_to_async(self.use_conditional_get)():
+            return await self.aget_response()
+
+        etag, last_modified = self.get_validators(
+            await self.aget_version(), await apermission_fingerprint(request.user)
+        )
+        response = self.get_not_modified_response(etag, last_modified)
+        if response is None:
+            response = await self.aget_response()
+        return self.patch_conditional_response(response, etag, last_modified)
+
+    async def post(self, request, *args, **kwargs):
+        response = await sync_to_async(self.apply_action)()
+        if response:
+            return response
+        return await self.get(request, *args, **kwargs)
+
+
+class AsyncDetailView(AsyncFacetMixin, DetailView):
+    async def aget_object(self, queryset=None):
+        if queryset is None:
+            queryset = self.get_queryset()
+
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        slug = self.kwargs.get(self.slug_url_kwarg)
+        if pk is not None:
+            queryset = queryset.filter(pk=pk)
+        if slug is not None and (pk is None or self.query_pk_and_slug):
+            queryset = queryset.filter(**{self.get_slug_field(): slug})
+        if pk is None and slug is None:
+            raise AttributeError(
+                "Generic detail view %s must be called with either an object "
+                "pk or a slug in the URLconf." % self.__class__.__name__
+            )
+
+        try:
+            return await queryset.aget()
+        except queryset.model.DoesNotExist:
+            raise Http404(
+                _("No %(verbose_name)s found matching the query")
+                % {"verbose_name": queryset.model._meta.verbose_name}
+            )
+
+    async def aget_permission_object(self):
+        self.object = await self.aget_object()
+        return self.object
+
+    def get_object(self, queryset=None):
+        if queryset is None and getattr(self, "object", None) is not None:
+            return self.object
+        return super().get_object(queryset)
+
+    async def get(self, request, *args, **kwargs):
+        # the messages may be stored in the session
+        version = await sync_to_async(self.get_conditional_version)()
+        if version is None:
+            return await self.arender_response(object=self.object)
+
+        etag, last_modified = self.get_validators(
+            version, await apermission_fingerprint(request.user)
+        )
+        response = self.get_not_modified_response(etag, last_modified)
+        if response is None:
+            response = await self.arender_response(object=self.object)
+        return self.patch_conditional_response(response, etag, last_modified)
+
+    async def post(self, request, *args, **kwargs):
+        response = await sync_to_async(self.apply_action)()
+        if response:
+            return response
+        return await self.get(request, *args, **kwargs)
+
+
 class DeleteView(FacetMixin, InlinesMixin, generic.DeleteView):
     def get_template_names(self):
         return super().get_template_names() + ["beam/delete.html"]
@@ -648,29 +1160,45 @@ class DashboardView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        grouped = []
-        for app_label, viewsets_dict in self.get_registry().items():
-            viewsets = []
-            for viewset in viewsets_dict.values():
-                links = []
-                for name in "list", "create":
-                    link = viewset().links.get(name)
-                    if link and link.has_perm(
-                        user=self.request.user, obj=None, request=self.request
-                    ):
-                        links.append(link)
-
-                if links:
-                    viewsets.append((viewset, links))
-
-            if not viewsets:
-                continue
-
-            group = {
-                "app_label": app_label,
-                "app_config": apps.get_app_config(app_label),
-                "viewsets": viewsets,
-            }
-            grouped.append(group)
-        context["grouped_by_app"] = grouped
+        registry = self.get_registry()
+        grouped_facets = get_registry_facets(registry, ["list", "create"])
+
+        def build():
+            grouped = []
+            for app_label, viewsets_with_facets in grouped_facets:
+                viewsets = []
+                for viewset, facets in viewsets_with_facets:
+                    links = [
+                        link
+                        for link in facets
+                        if link.has_perm(
+                            user=self.request.user, obj=None, request=self.request
+                        )
+                    ]
+                    if links:
+                        viewsets.append((viewset, links))
+
+                if not viewsets:
+                    continue
+
+                group = {
+                    "app_label": app_label,
+                    "app_config": apps.get_app_config(app_label),
+                    "viewsets": viewsets,
+                }
+                grouped.append(group)
+            return grouped
+
+        context["grouped_by_app"] = get_cached_for_permissions(
+            ("dashboard", get_registry_key(registry)),
+            facets=[
+                facet
+                for app_label, viewsets in grouped_facets
+                for viewset, facets in viewsets
+                for facet in facets
+            ],
+            user=self.request.user,
+            request=self.request,
+            build=build,
+        )
         return context
@@ -1,9 +1,9 @@
 from collections import OrderedDict
-from functools import wraps
 from logging import getLogger
 from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Type
 
 import django_filters
+from django.conf import settings
 from django.db.models import Model, QuerySet
 from django.forms import Form, ModelForm
 from django.urls import path
@@ -18,7 +18,15 @@ from .facets import BaseFacet, Facet, FormFacet, ListFacet
 from .inlines import RelatedInline
 from .types import LayoutType
 from .urls import UrlKwargDict
-from .views import CreateView, DeleteView, DetailView, ListView, UpdateView
+from .views import (
+    AsyncDetailView,
+    AsyncListView,
+    CreateView,
+    DeleteView,
+    DetailView,
+    ListView,
+    UpdateView,
+)
 
 logger = getLogger(__name__)
 
@@ -39,6 +47,10 @@ class BaseViewSet(metaclass=ViewsetMetaClass):
     form_class: Form
     link_layout: List[str]
     url_namespace: str = ""
+    version_field: str
+    conditional_get: bool
+    # serve async views where the facet provides them, None uses BEAM_ASYNC_VIEWS
+    async_views: Optional[bool] = None
 
     # we default to change_ because it is a safe default
     permission = "{app_label}.change_{model_name}"
@@ -87,23 +99,36 @@ class BaseViewSet(metaclass=ViewsetMetaClass):
         """A list of facets that can be linked from within the ui"""
         return self.facets
 
+    def use_async_views(self) -> bool:
+        if self.async_views is not None:
+            return self.async_views
+        # django does not know how it is served, so this is opt-in
+        return getattr(settings, "BEAM_ASYNC_VIEWS", False)
+
+    def _get_view_class(self, facet: Facet):
+        view_class = facet.view_class
+        async_view_class = getattr(facet, "async_view_class", None)
+        if (
+            async_view_class
+            and self.use_async_views()
+            # keep customized views that the async view does not build upon
+            and issubclass(async_view_class, view_class)
+        ):
+            return async_view_class
+        return view_class
+
     def _get_view(self, facet: Facet):
         # FIXME handle function based views?
-        view_class = facet.view_class
+        view_class = self._get_view_class(facet)
         view_kwargs: Dict[str, Any] = {}
 
-        view = view_class.as_view(**view_kwargs)
         if hasattr(view_class, "viewset"):
+            # bind viewset and facet once so that every request gets a fresh view
+            # instance initialized with them without touching shared state
+            view_kwargs["viewset"] = self
+            view_kwargs["facet"] = facet
 
-            @wraps(view)
-            def wrapped_view(request, *args, **kwargs):
-                view.view_initkwargs["viewset"] = self
-                view.view_initkwargs["facet"] = facet
-                return view(request, *args, **kwargs)
-
-            return wrapped_view
-        else:
-            return view
+        return view_class.as_view(**view_kwargs)
 
     def _get_url_pattern(self, facet):
         view = self._get_view(facet)
@@ -130,6 +155,7 @@ class BaseViewSet(metaclass=ViewsetMetaClass):
 class ListMixin(BaseViewSet):
     list_facet = ListFacet
     list_view_class = ListView
+    list_async_view_class = AsyncListView
     list_url = ""
     list_url_name: str
     list_url_kwargs: UrlKwargDict = {}
@@ -137,6 +163,7 @@ class ListMixin(BaseViewSet):
 
     list_sort_fields: List[str]
     list_sort_fields_columns: Mapping[str, str]
+    list_annotations: Mapping[str, Any] = {}
     list_search_fields: List[str] = []
     list_paginate_by = 25
     list_item_link_layout = ["update", "detail"]
@@ -152,6 +179,8 @@ class ListMixin(BaseViewSet):
     list_filterset_class: Optional[Type[django_filters.FilterSet]] = None
     list_action_classes: List[Type[Action]] = []
     list_link_layout = ["create"]
+    list_row_cache = False
+    list_row_cache_timeout: Optional[int] = 60 * 60
 
 
 class CreateMixin(BaseViewSet):
@@ -193,6 +222,7 @@ class UpdateMixin(BaseViewSet):
 class DetailMixin(BaseViewSet):
     detail_facet = Facet
     detail_view_class: View = DetailView
+    detail_async_view_class: View = AsyncDetailView
     detail_url: str = "<str:pk>/"
     detail_url_name: str
     detail_url_kwargs: UrlKwargDict = {"pk": "pk"}
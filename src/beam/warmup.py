@@ -0,0 +1,109 @@
+import inspect
+import time
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpRequest
+from django.urls import URLResolver, get_resolver
+
+from .facets import Facet
+from .layouts import get_annotations
+from .registry import RegistryType, default_registry, freeze, get_registry_index
+from .utils import get_filterset_class_for_fields
+from .views import CreateWithInlinesMixin, UpdateWithInlinesMixin
+
+
+class WarmUpReport(NamedTuple):
+    viewsets: int
+    facets: int
+    duration: float
+    errors: List[Tuple[Type, Exception]]
+
+
+def get_served_facets(resolver: URLResolver) -> Iterator[Facet]:
+    """
+    Get the facets of the views in the url patterns of a resolver.
+    """
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from get_served_facets(pattern)
+            continue
+        initkwargs = getattr(pattern.callback, "view_initkwargs", None) or {}
+        if initkwargs.get("facet") is not None:
+            yield initkwargs["facet"]
+
+
+def warm_up_facet(facet: Facet):
+    """
+    Build the filterset and formset classes of a facet, which are cached and
+    shared with the facets of other instances of its viewset.
+    """
+    filterset_fields = getattr(facet, "list_filterset_fields", None)
+    if filterset_fields and not getattr(facet, "list_filterset_class", None):
+        annotations = {
+            **(getattr(facet, "list_annotations", None) or {}),
+            **get_annotations(facet.fields, facet.layout),
+        }
+        get_filterset_class_for_fields(facet.model, filterset_fields, annotations)
+
+    # only form views use formsets, create forms have an extra form
+    view_class = facet.view_class
+    if not inspect.isclass(view_class):
+        return
+    if issubclass(view_class, CreateWithInlinesMixin):
+        parent_instance = None
+    elif issubclass(view_class, UpdateWithInlinesMixin):
+        parent_instance = facet.model()
+    else:
+        return
+
+    request = HttpRequest()
+    request.user = AnonymousUser()
+    for inline_class in facet.inline_classes or []:
+        inline = inline_class(
+            parent_instance=parent_instance,
+            parent_model=facet.model,
+            request=request,
+        )
+        inline.get_formset_class()
+
+
+def warm_up(
+    registry: RegistryType = default_registry, urlconf: Optional[str] = None
+) -> WarmUpReport:
+    """
+    Import the urlconf, which imports and registers the viewsets and builds the
+    facets they serve, freeze the registry and build the filterset and formset
+    classes of the served facets of its viewsets.
+
+    Errors are collected per viewset instead of being raised.
+    """
+    start = time.perf_counter()
+
+    # populating the resolver imports the urlconf and builds the reverse lookups
+    resolver = get_resolver(urlconf)
+    resolver.reverse_dict
+    freeze(registry)
+
+    registered = set(get_registry_index(registry).viewsets.values())
+    viewsets = set()
+    facets = 0
+    errors: List[Tuple[Type, Exception]] = []
+    for facet in get_served_facets(resolver):
+        viewset = type(facet.viewset)
+        if viewset not in registered:
+            continue
+        viewsets.add(viewset)
+        facets += 1
+        try:
+            warm_up_facet(facet)
+        except Exception as e:
+            if viewset not in {failed for failed, _error in errors}:
+                errors.append((viewset, e))
+
+    return WarmUpReport(
+        viewsets=len(viewsets),
+        facets=facets,
+        duration=time.perf_counter() - start,
+        errors=errors,
+    )
@@ -1,5 +1,6 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.core.exceptions import PermissionDenied
-from django.test import RequestFactory, TestCase
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
 from test_views import user_with_perms
 from testapp.models import Dragonfly
 
@@ -63,3 +64,20 @@ class AutocompleteTest(TestCase):
 
         with self.assertRaises(PermissionDenied):
             view(request)
+
+    async def test_async_autocomplete(self):
+        viewset = AutocompleteDragonflyViewSet()
+        viewset.async_views = True
+        view = viewset._get_view(viewset.facets["autocomplete"])
+        self.assertTrue(iscoroutinefunction(view))
+
+        await Dragonfly.objects.acreate(name="alpha", age=12)
+        await Dragonfly.objects.acreate(name="omega", age=99)
+
+        request = AsyncRequestFactory().get("/", {"q": "Al"})
+        request.user = await sync_to_async(user_with_perms)(["testapp.view_dragonfly"])
+
+        response = await view(request)
+
+        self.assertContains(response, "alpha")
+        self.assertNotContains(response, "omega")
@@ -1,17 +1,35 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission
 from django.contrib.messages.middleware import MessageMiddleware
 from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import caches
 from django.core.exceptions import PermissionDenied
+from django.db import connection
 from django.http.response import HttpResponse
 from django.test import RequestFactory, TestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import include, path
-from reversion import is_registered, set_comment
-from reversion.models import Version
+from reversion import create_revision, is_registered, register, set_comment, unregister
+from reversion.models import Revision, Version
 from test_views import user_with_perms
 from testapp.models import Dragonfly, Petaluridae, Sighting
+from testapp.views import DragonFlyUpdateAction
 
 from beam import RelatedInline
+from beam.actions import DeleteAction
+from beam.contrib.reversion.compare import (
+    FieldChange,
+    FieldDiff,
+    ObjectDiff,
+    format_diff,
+)
+from beam.contrib.reversion.views import (
+    VersionCompareView,
+    get_version_inline_class,
+    get_version_instance,
+)
 from beam.contrib.reversion.viewsets import VersionViewSet
 from beam.registry import RegistryType
 
@@ -173,6 +191,52 @@ class ReversionViewTest(TestCase):
         self.assertContains(response, "number two")
         self.assertContains(response, "number three")
 
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_version_list_is_paginated_by_cursor(self):
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        user = user_with_perms(["testapp.view_dragonfly"])
+
+        request = RequestFactory().post("/")
+        request.user = user
+        for comment in ["one", "two", "three", "four", "five"]:
+            with VersionedDragonflyViewSet().create_revision(request):
+                set_comment("number {}".format(comment))
+                alpha.save()
+
+        class PaginatedDragonflyViewSet(VersionedDragonflyViewSet):
+            registry = {}
+            version_list_paginate_by = 2
+
+        viewset = PaginatedDragonflyViewSet()
+        view = viewset._get_view(viewset.facets["version_list"])
+
+        def get_page(**params):
+            request = RequestFactory().get("/", params)
+            request.user = user
+            response = view(request, pk=alpha.pk)
+            response.render()
+            return response
+
+        first_page = get_page()
+        self.assertContains(first_page, "number five")
+        self.assertContains(first_page, "number four")
+        self.assertNotContains(first_page, "number three")
+        self.assertContains(first_page, user.get_username())
+
+        with CaptureQueriesContext(connection) as second_page_queries:
+            second_page = get_page(before=first_page.context_data["next_cursor"])
+        self.assertContains(second_page, "number three")
+        self.assertContains(second_page, "number two")
+        self.assertNotContains(second_page, "number four")
+
+        with CaptureQueriesContext(connection) as last_page_queries:
+            last_page = get_page(before=second_page.context_data["next_cursor"])
+        self.assertContains(last_page, "number one")
+        self.assertIsNone(last_page.context_data["next_cursor"])
+
+        # neither the objects nor the users are loaded per version
+        self.assertEqual(len(second_page_queries), len(last_page_queries))
+
     def test_version_list_requires_view_permission(self):
         alpha = Dragonfly.objects.create(name="alpha", age=47)
 
@@ -230,6 +294,96 @@ class ReversionViewTest(TestCase):
         self.assertNotContains(version_page, "beta")
         self.assertNotContains(version_page, "Tokyo")
 
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_show_detail_from_previous_version_without_writes(self):
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        berlin = Sighting.objects.create(name="Berlin", dragonfly=alpha)
+        Sighting.objects.create(name="Paris", dragonfly=alpha)
+
+        request = RequestFactory().get("/", {})
+        request.user = user_with_perms(["testapp.view_dragonfly"])
+
+        with VersionedDragonflyViewSet().create_revision(request):
+            alpha.save()
+
+        version = Version.objects.get_for_object_reference(Dragonfly, alpha.pk).latest(
+            "revision__date_created"
+        )
+
+        alpha.name = "beta"
+        alpha.save()
+        berlin.delete()
+        Sighting.objects.create(name="Tokyo", dragonfly=alpha)
+
+        version_view = VersionedDragonflyViewSet()._get_view(
+            VersionedDragonflyViewSet().facets["version_detail"]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            version_page = version_view(request, pk=alpha.pk, version_id=version.pk)
+            version_page.render()
+
+        self.assertContains(version_page, "alpha")
+        self.assertContains(version_page, "Berlin")
+        self.assertContains(version_page, "Paris")
+        self.assertNotContains(version_page, "beta")
+        self.assertNotContains(version_page, "Tokyo")
+
+        for query in queries.captured_queries:
+            self.assertTrue(query["sql"].startswith("SELECT"), query["sql"])
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_show_detail_from_previous_version_by_reverting(self):
+        class RevertingDragonflyViewSet(VersionedDragonflyViewSet):
+            registry = {}
+            version_detail_revert = True
+
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        Sighting.objects.create(name="Berlin", dragonfly=alpha)
+
+        request = RequestFactory().get("/", {})
+        request.user = user_with_perms(["testapp.view_dragonfly"])
+
+        with VersionedDragonflyViewSet().create_revision(request):
+            alpha.save()
+
+        version = Version.objects.get_for_object_reference(Dragonfly, alpha.pk).get()
+        alpha.name = "beta"
+        alpha.save()
+
+        version_view = RevertingDragonflyViewSet()._get_view(
+            RevertingDragonflyViewSet().facets["version_detail"]
+        )
+        version_page = version_view(request, pk=alpha.pk, version_id=version.pk)
+
+        self.assertContains(version_page, "alpha")
+        self.assertContains(version_page, "Berlin")
+        self.assertNotContains(version_page, "beta")
+
+        alpha.refresh_from_db()
+        self.assertEqual(alpha.name, "beta")
+
+    def test_version_instance_has_the_stored_many_to_many_values(self):
+        register(Group)
+        self.addCleanup(unregister, Group)
+        view, change = Permission.objects.all()[:2]
+        group = Group.objects.create(name="staff")
+        group.permissions.set([view])
+
+        with create_revision():
+            group.save()
+        version = Version.objects.get_for_object(group).get()
+        group.permissions.set([change])
+
+        instance = get_version_instance(version)
+
+        self.assertEqual(list(instance.permissions.all()), [view])
+
+    def test_version_inline_classes_are_built_once(self):
+        self.assertIs(
+            get_version_inline_class(SightingInline),
+            get_version_inline_class(SightingInline),
+        )
+
     def test_version_detail_requires_view_perm(self):
         alpha = Dragonfly.objects.create(name="alpha", age=47)
         Sighting.objects.create(name="Berlin", dragonfly=alpha)
@@ -303,3 +457,300 @@ class ReversionViewTest(TestCase):
         )
         with self.assertRaises(PermissionDenied):
             version_view(request, pk=alpha.pk, version_id=version.pk)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class VersionCompareTest(TestCase):
+    def setUp(self):
+        caches["default"].clear()
+        self.viewset = VersionedDragonflyViewSet()
+        self.view = self.viewset._get_view(self.viewset.facets["version_compare"])
+        self.user = user_with_perms(["testapp.view_dragonfly"])
+        self.alpha = Dragonfly.objects.create(name="alpha", age=47)
+        self.berlin = Sighting.objects.create(name="Berlin", dragonfly=self.alpha)
+        self.paris = Sighting.objects.create(name="Paris", dragonfly=self.alpha)
+
+    def create_version(self):
+        request = RequestFactory().post("/")
+        request.user = self.user
+        with self.viewset.create_revision(request):
+            self.alpha.save()
+        return Version.objects.get_for_object(self.alpha).latest("pk")
+
+    def compare(self, version, **params):
+        request = RequestFactory().get("/", params)
+        request.user = self.user
+        response = self.view(request, pk=self.alpha.pk, version_id=version.pk)
+        response.render()
+        return response
+
+    def change_alpha(self):
+        self.alpha.name = "beta"
+        self.alpha.save()
+        self.berlin.name = "Tokyo"
+        self.berlin.save()
+        self.paris.delete()
+        Sighting.objects.create(name="Rome", dragonfly=self.alpha)
+
+    def test_compare_with_current(self):
+        version = self.create_version()
+        self.change_alpha()
+
+        response = self.compare(version)
+        diff = response.context_data["diff"]
+
+        self.assertEqual(
+            [(change.old, change.new) for change in diff["changes"]],
+            [("alpha", "beta")],
+        )
+        [(title, changes)] = diff["inlines"]
+        self.assertEqual(
+            {change.action: change.changes for change in changes},
+            {
+                "changed": [FieldChange("name", "Berlin", "Tokyo")],
+                "removed": [],
+                "added": [],
+            },
+        )
+        self.assertContains(response, "Berlin")
+        self.assertContains(response, "Tokyo")
+
+    def test_related_objects_are_fetched_once_per_model(self):
+        beta = Dragonfly.objects.create(name="beta", age=1)
+        field = Sighting._meta.get_field("dragonfly")
+        diff = {
+            "changes": [FieldDiff(field, self.alpha.pk, beta.pk)],
+            "inlines": [
+                (
+                    "sightings",
+                    [
+                        ObjectDiff(
+                            "Berlin", "changed", [FieldDiff(field, beta.pk, None)]
+                        ),
+                        ObjectDiff(
+                            "Paris", "changed", [FieldDiff(field, self.alpha.pk, 0)]
+                        ),
+                    ],
+                )
+            ],
+        }
+
+        with self.assertNumQueries(1):
+            formatted = format_diff(diff)
+
+        self.assertEqual(
+            formatted["changes"], [FieldChange("dragonfly", "alpha", "beta")]
+        )
+        [(title, changes)] = formatted["inlines"]
+        self.assertEqual(
+            [change.changes for change in changes],
+            [
+                [FieldChange("dragonfly", "beta", None)],
+                [FieldChange("dragonfly", "alpha", 0)],
+            ],
+        )
+
+        # the labels are not cached with the diff
+        beta.name = "gamma"
+        beta.save()
+        self.assertEqual(
+            format_diff(diff)["changes"], [FieldChange("dragonfly", "alpha", "gamma")]
+        )
+
+    def test_compare_versions_is_cached(self):
+        version = self.create_version()
+        self.change_alpha()
+        other_version = self.create_version()
+
+        with mock.patch.object(
+            VersionCompareView,
+            "compute_diff",
+            autospec=True,
+            side_effect=VersionCompareView.compute_diff,
+        ) as compute_diff:
+            response = self.compare(version, **{"with": other_version.pk})
+            self.compare(version, **{"with": other_version.pk})
+
+        compute_diff.assert_called_once()
+        diff = response.context_data["diff"]
+        self.assertEqual(len(diff["changes"]), 1)
+        [(title, changes)] = diff["inlines"]
+        self.assertEqual(len(changes), 3)
+
+        # the object changed but the versions did not
+        self.alpha.name = "gamma"
+        self.alpha.save()
+        self.assertEqual(
+            self.compare(version, **{"with": other_version.pk}).context_data["diff"],
+            diff,
+        )
+
+    def test_compare_without_differences(self):
+        version = self.create_version()
+        response = self.compare(version)
+        self.assertEqual(response.context_data["diff"]["changes"], [])
+        self.assertEqual(response.context_data["diff"]["inlines"], [])
+
+
+class RevisionCreationTest(TestCase):
+    def setUp(self):
+        self.user = user_with_perms(["testapp.change_dragonfly"])
+        self.alpha = Dragonfly.objects.create(name="alpha", age=47)
+        Sighting.objects.bulk_create(
+            Sighting(name="sighting {}".format(index), dragonfly=self.alpha)
+            for index in range(200)
+        )
+
+    def post_update(self, viewset, **data):
+        sightings = list(self.alpha.sighting_set.order_by("pk"))
+        post = {
+            "name": "alpha",
+            "age": 47,
+            "sighting_set-TOTAL_FORMS": len(sightings),
+            "sighting_set-INITIAL_FORMS": len(sightings),
+        }
+        for index, sighting in enumerate(sightings):
+            post["sighting_set-{}-id".format(index)] = sighting.pk
+            post["sighting_set-{}-name".format(index)] = sighting.name
+        post.update(data)
+
+        request = RequestFactory().post("/", data=post)
+        request.user = self.user
+        SessionMiddleware(get_response=GetResponse()).process_request(request)
+        setattr(request, "_messages", FallbackStorage(request))
+        return viewset._get_view(viewset.facets["update"])(request, pk=self.alpha.pk)
+
+    def test_get_and_invalid_forms_do_not_create_revisions(self):
+        viewset = VersionedDragonflyViewSet()
+        request = RequestFactory().get("/")
+        request.user = self.user
+
+        with mock.patch.object(viewset, "create_revision") as create_revision:
+            viewset._get_view(viewset.facets["update"])(request, pk=self.alpha.pk)
+            response = self.post_update(viewset, age="not a number")
+        self.assertEqual(response.status_code, 200)
+        create_revision.assert_not_called()
+
+        response = self.post_update(viewset, name="beta")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Version.objects.get_for_object(self.alpha).count(), 1)
+
+    def test_update_with_changed_inlines_only(self):
+        """
+        Compare updating a single inline row of 200 with and without following
+        the inlines.
+        """
+        with CaptureQueriesContext(connection) as follow_queries:
+            self.post_update(
+                VersionedDragonflyViewSet(), **{"sighting_set-0-name": "Tokyo"}
+            )
+        revision = Version.objects.get_for_object(self.alpha).get().revision
+        self.assertEqual(revision.version_set.count(), 201)
+
+        class ChangedInlinesOnlyViewSet(VersionedDragonflyViewSet):
+            registry = {}
+            version_changed_inlines_only = True
+
+        unregister(Dragonfly)
+        self.addCleanup(VersionedDragonflyViewSet)  # registers the model again
+        self.addCleanup(unregister, Dragonfly)
+
+        with CaptureQueriesContext(connection) as changed_only_queries:
+            self.post_update(
+                ChangedInlinesOnlyViewSet(), **{"sighting_set-1-name": "Paris"}
+            )
+        revision = Version.objects.get_for_object(self.alpha).latest("pk").revision
+        self.assertEqual(
+            sorted(version.object_repr for version in revision.version_set.all()),
+            sorted([str(self.alpha), str(self.alpha.sighting_set.get(name="Paris"))]),
+        )
+        self.assertLess(len(changed_only_queries), len(follow_queries))
+
+
+class ActionRevisionTest(TestCase):
+    def setUp(self):
+        self.user = user_with_perms(
+            ["testapp.view_dragonfly", "testapp.change_dragonfly"]
+        )
+        Dragonfly.objects.bulk_create(
+            Dragonfly(name="dragonfly {}".format(index), age=index)
+            for index in range(25)
+        )
+
+    def post_action(self, viewset, **data):
+        request = RequestFactory().post("/", data=data)
+        request.user = self.user
+        SessionMiddleware(get_response=GetResponse()).process_request(request)
+        setattr(request, "_messages", FallbackStorage(request))
+        return viewset._get_view(viewset.facets["list"])(request)
+
+    def test_mass_update_creates_a_single_revision(self):
+        class ActionViewSet(VersionedDragonflyViewSet):
+            registry = {}
+            list_action_classes = [DragonFlyUpdateAction]
+            version_action_chunk_size = 10
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_action(
+                ActionViewSet(),
+                _action_choice="0-update_selected",
+                _action_select_across="all",
+                **{"0-update_selected-age": "100"}
+            )
+        self.assertEqual(response.status_code, 302)
+
+        revision = Revision.objects.get()
+        self.assertEqual(revision.user, self.user)
+        self.assertEqual(revision.comment, str(DragonFlyUpdateAction.verbose_name))
+        self.assertEqual(revision.version_set.count(), 25)
+        self.assertTrue(
+            all(
+                version.field_dict["age"] == 100
+                for version in revision.version_set.all()
+            )
+        )
+        # one insert per chunk of ten versions
+        version_inserts = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith('INSERT INTO "reversion_version"')
+        ]
+        self.assertEqual(len(version_inserts), 3)
+
+    def test_delete_versions_the_deleted_objects(self):
+        self.user = user_with_perms(
+            ["testapp.view_dragonfly", "testapp.delete_dragonfly"],
+            username="deleter",
+        )
+
+        class ActionViewSet(VersionedDragonflyViewSet):
+            registry = {}
+            list_action_classes = [DeleteAction]
+
+        pks = list(Dragonfly.objects.filter(age__lt=5).values_list("pk", flat=True))
+        response = self.post_action(
+            ActionViewSet(), _action_choice="0-delete", **{"_action_select[]": pks}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Dragonfly.objects.count(), 20)
+
+        revision = Revision.objects.get()
+        self.assertEqual(
+            sorted(int(version.object_id) for version in revision.version_set.all()),
+            sorted(pks),
+        )
+        self.assertEqual(Version.objects.get_deleted(Dragonfly).count(), 5)
+
+    def test_invalid_action_form_does_not_create_a_revision(self):
+        class ActionViewSet(VersionedDragonflyViewSet):
+            registry = {}
+            list_action_classes = [DragonFlyUpdateAction]
+
+        response = self.post_action(
+            ActionViewSet(),
+            _action_choice="0-update_selected",
+            _action_select_across="all",
+            **{"0-update_selected-age": "not a number"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Revision.objects.exists())
@@ -1,6 +1,30 @@
+from unittest import mock
+
 from beam import RelatedInline
-from django.test import TestCase
-from testapp.models import Dragonfly, Sighting
+from beam.inlines import RelatedInlineFormSet, dump_manifest, get_fingerprint
+from django import forms
+from django.contrib.auth.models import Permission, User
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from testapp.models import (
+    CascadingSighting,
+    Dragonfly,
+    OrderedSighting,
+    Sighting,
+    SightingReference,
+)
+
+UserPermission = User.user_permissions.through
+
+
+class UserPermissionInline(RelatedInline):
+    model = UserPermission
+    foreign_key_field = "user"
+    fields = ["permission"]
+
+    def get_queryset(self):
+        return UserPermission.objects.filter(user=self.parent_instance).order_by("pk")
 
 
 class InlineTest(TestCase):
@@ -23,3 +47,499 @@ class InlineTest(TestCase):
             foreign_key_field = "dragonfly"
 
         self.assertEqual(SightingInline(parent_model=Dragonfly).prefix, "sighting_set")
+
+    def test_forms_share_the_choices_of_model_choice_fields(self):
+        user = User.objects.create(username="alice")
+        user.user_permissions.set(Permission.objects.all()[:5])
+
+        formset = UserPermissionInline(parent_instance=user, parent_model=User).formset
+
+        with CaptureQueriesContext(connection) as queries:
+            for form in formset.forms:
+                str(form["permission"])
+            str(formset.empty_form["permission"])
+
+        choice_queries = [
+            query
+            for query in queries.captured_queries
+            if 'FROM "auth_permission"' in query["sql"]
+        ]
+        self.assertEqual(len(choice_queries), 1)
+        self.assertEqual(
+            len(list(formset.forms[0].fields["permission"].choices)),
+            Permission.objects.count() + 1,
+        )
+
+    def test_form_class_can_be_customized(self):
+        class CustomForm(forms.ModelForm):
+            pass
+
+        class CustomFormSightingInline(RelatedInline):
+            fields = ["name"]
+            model = Sighting
+            foreign_key_field = "dragonfly"
+
+            def _construct_form_class(self):
+                return CustomForm
+
+        formset = CustomFormSightingInline(parent_model=Dragonfly).formset
+
+        self.assertIsInstance(formset.forms[0], CustomForm)
+
+    def test_choices_keys_are_computed_once_per_field(self):
+        user = User.objects.create(username="alice")
+        user.user_permissions.set(Permission.objects.all()[:5])
+
+        formset = UserPermissionInline(parent_instance=user, parent_model=User).formset
+        with mock.patch.object(
+            RelatedInlineFormSet,
+            "get_choices_key",
+            autospec=True,
+            side_effect=RelatedInlineFormSet.get_choices_key,
+        ) as get_choices_key:
+            formset.forms
+            formset.empty_form
+        # the permission and the hidden primary key field
+        self.assertEqual(get_choices_key.call_count, 2)
+
+    def test_forms_changing_their_querysets_get_their_own_choices(self):
+        class OwnPermissionForm(forms.ModelForm):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.fields["permission"].queryset = Permission.objects.filter(
+                    pk=self.instance.permission_id
+                )
+
+        class OwnPermissionInline(UserPermissionInline):
+            form_class = OwnPermissionForm
+
+        user = User.objects.create(username="alice")
+        permissions = list(Permission.objects.order_by("pk")[:3])
+        user.user_permissions.set(permissions)
+
+        formset = OwnPermissionInline(parent_instance=user, parent_model=User).formset
+        self.assertEqual(
+            [list(form.fields["permission"].choices)[1][1] for form in formset.forms],
+            [str(permission) for permission in permissions],
+        )
+
+    def test_shared_choices_are_still_validated(self):
+        user = User.objects.create(username="alice")
+        permission = Permission.objects.first()
+        data = {
+            "user_user_permissions-TOTAL_FORMS": "2",
+            "user_user_permissions-INITIAL_FORMS": "0",
+            "user_user_permissions-0-permission": str(permission.pk),
+            "user_user_permissions-1-permission": "0",
+        }
+        formset_class = UserPermissionInline(
+            parent_instance=user, parent_model=User
+        ).get_formset_class()
+        formset = formset_class(
+            data=data, instance=user, prefix="user_user_permissions"
+        )
+
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(formset.forms[0].cleaned_data["permission"], permission)
+        self.assertIn("permission", formset.forms[1].errors)
+
+    def test_protected_deletions_are_collected_at_once(self):
+        class SightingInline(RelatedInline):
+            fields = ["name"]
+            model = Sighting
+            foreign_key_field = "dragonfly"
+
+        dragonfly = Dragonfly.objects.create(name="alpha", age=1)
+        sightings = [
+            Sighting.objects.create(name="sighting-{}".format(i), dragonfly=dragonfly)
+            for i in range(3)
+        ]
+        SightingReference.objects.create(sighting=sightings[0])
+        SightingReference.objects.create(sighting=sightings[2])
+        SightingReference.objects.create(sighting=sightings[2])
+
+        data = {
+            "sighting_set-TOTAL_FORMS": "3",
+            "sighting_set-INITIAL_FORMS": "3",
+        }
+        for index, sighting in enumerate(sightings):
+            data["sighting_set-{}-id".format(index)] = str(sighting.pk)
+            data["sighting_set-{}-name".format(index)] = sighting.name
+            data["sighting_set-{}-DELETE".format(index)] = "on"
+        formset_class = SightingInline(
+            parent_instance=dragonfly, parent_model=Dragonfly
+        ).get_formset_class()
+        formset = formset_class(data=data, instance=dragonfly, prefix="sighting_set")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertFalse(formset.is_valid())
+
+        reference_queries = [
+            query
+            for query in queries.captured_queries
+            if 'FROM "testapp_sightingreference"' in query["sql"]
+        ]
+        self.assertEqual(len(reference_queries), 1)
+        self.assertEqual(
+            [form.non_field_errors().as_data()[0].code for form in formset.forms[::2]],
+            ["deleting_protected", "deleting_protected"],
+        )
+        self.assertEqual(formset.forms[1].errors, {})
+        self.assertEqual(
+            [form.cleaned_data.get("DELETE", False) for form in formset.forms],
+            [False, True, False],
+        )
+        self.assertEqual(
+            str(formset.forms[2].non_field_errors()).count("sighting reference"), 2
+        )
+
+    def test_formset_is_saved_in_bulk(self):
+        class SightingInline(RelatedInline):
+            fields = ["name"]
+            model = CascadingSighting
+            foreign_key_field = "dragonfly"
+            extra = 2
+
+        dragonfly = Dragonfly.objects.create(name="alpha", age=1)
+        sightings = [
+            CascadingSighting.objects.create(
+                name="sighting-{}".format(i), dragonfly=dragonfly
+            )
+            for i in range(3)
+        ]
+        data = {
+            "cascadingsighting_set-TOTAL_FORMS": "5",
+            "cascadingsighting_set-INITIAL_FORMS": "3",
+            "cascadingsighting_set-2-DELETE": "on",
+            "cascadingsighting_set-3-name": "new-0",
+            "cascadingsighting_set-4-name": "new-1",
+        }
+        for index, sighting in enumerate(sightings):
+            data["cascadingsighting_set-{}-id".format(index)] = str(sighting.pk)
+            data["cascadingsighting_set-{}-name".format(index)] = "changed-{}".format(
+                index
+            )
+        formset_class = SightingInline(
+            parent_instance=dragonfly, parent_model=Dragonfly
+        ).get_formset_class()
+        formset = formset_class(
+            data=data, instance=dragonfly, prefix="cascadingsighting_set"
+        )
+        self.assertTrue(formset.is_valid())
+
+        with CaptureQueriesContext(connection) as queries:
+            formset.save()
+
+        statements = [
+            query["sql"].split(" ")[0]
+            for query in queries.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE"))
+        ]
+        self.assertEqual(statements, ["UPDATE", "INSERT"])
+        self.assertEqual(
+            sorted(dragonfly.cascadingsighting_set.values_list("name", flat=True)),
+            ["changed-0", "changed-1", "new-0", "new-1"],
+        )
+        self.assertTrue(all(obj.pk for obj in formset.new_objects))
+
+    def test_bulk_save_can_be_disabled(self):
+        class SightingInline(RelatedInline):
+            fields = ["name"]
+            model = CascadingSighting
+            foreign_key_field = "dragonfly"
+            extra = 2
+            bulk_save = False
+
+        dragonfly = Dragonfly.objects.create(name="alpha", age=1)
+        request = RequestFactory().post(
+            "/",
+            {
+                "cascadingsighting_set-TOTAL_FORMS": "2",
+                "cascadingsighting_set-INITIAL_FORMS": "0",
+                "cascadingsighting_set-0-name": "new-0",
+                "cascadingsighting_set-1-name": "new-1",
+            },
+        )
+        formset = SightingInline(
+            parent_instance=dragonfly, parent_model=Dragonfly, request=request
+        ).formset
+        self.assertTrue(formset.is_valid())
+
+        with CaptureQueriesContext(connection) as queries:
+            formset.save()
+
+        inserts = [
+            query
+            for query in queries.captured_queries
+            if query["sql"].startswith("INSERT")
+        ]
+        self.assertEqual(len(inserts), 2)
+
+    def test_reordering_only_updates_the_order_field(self):
+        class OrderedSightingInline(RelatedInline):
+            fields = ["name", "order"]
+            model = OrderedSighting
+            foreign_key_field = "dragonfly"
+            can_order = True
+            order_field = "order"
+
+        dragonfly = Dragonfly.objects.create(name="alpha", age=1)
+        sightings = [
+            OrderedSighting.objects.create(
+                name="sighting-{}".format(i), dragonfly=dragonfly, order=i
+            )
+            for i in range(4)
+        ]
+        # the first sighting is moved behind the third, the last is renamed
+        orders = [2, 0, 1, 3]
+        data = {
+            "orderedsighting_set-TOTAL_FORMS": "4",
+            "orderedsighting_set-INITIAL_FORMS": "4",
+        }
+        for index, sighting in enumerate(sightings):
+            prefix = "orderedsighting_set-{}-".format(index)
+            data[prefix + "id"] = str(sighting.pk)
+            data[prefix + "name"] = sighting.name
+            data[prefix + "order"] = str(orders[index])
+        data["orderedsighting_set-3-name"] = "renamed"
+        formset_class = OrderedSightingInline(
+            parent_instance=dragonfly, parent_model=Dragonfly
+        ).get_formset_class()
+        formset = formset_class(
+            data=data, instance=dragonfly, prefix="orderedsighting_set"
+        )
+        self.assertTrue(formset.is_valid())
+
+        with CaptureQueriesContext(connection) as queries:
+            formset.save()
+
+        updates = [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("UPDATE")
+        ]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(
+            sorted('"name"' in update for update in updates), [False, True]
+        )
+        self.assertEqual(
+            list(
+                dragonfly.orderedsighting_set.order_by("order").values_list(
+                    "name", flat=True
+                )
+            ),
+            ["sighting-1", "sighting-2", "sighting-0", "renamed"],
+        )
+
+    def test_paginated_inlines_limit_the_number_of_forms(self):
+        class SightingInline(RelatedInline):
+            fields = ["name"]
+            model = CascadingSighting
+            foreign_key_field = "dragonfly"
+            paginate_by = 10
+
+        formset_class = SightingInline(parent_model=Dragonfly).get_formset_class()
+
+        self.assertEqual(formset_class.max_num, 20)
+        self.assertEqual(formset_class.absolute_max, 20)
+
+    def test_rows_can_be_added_to_a_full_page(self):
+        class SightingInline(RelatedInline):
+            fields = ["name"]
+            model = CascadingSighting
+            foreign_key_field = "dragonfly"
+            paginate_by = 2
+            extra = 1
+
+        dragonfly = Dragonfly.objects.create(name="alpha", age=1)
+        sightings = [
+            CascadingSighting.objects.create(
+                name="sighting-{}".format(i), dragonfly=dragonfly
+            )
+            for i in range(2)
+        ]
+        formset = SightingInline(
+            parent_instance=dragonfly,
+            parent_model=Dragonfly,
+            request=RequestFactory().get("/"),
+        ).formset
+        self.assertEqual(len(formset.forms), 3)
+
+        data = {
+            "cascadingsighting_set-TOTAL_FORMS": "3",
+            "cascadingsighting_set-INITIAL_FORMS": "2",
+            "cascadingsighting_set-2-name": "new",
+        }
+        for index, sighting in enumerate(sightings):
+            data["cascadingsighting_set-{}-id".format(index)] = str(sighting.pk)
+            data["cascadingsighting_set-{}-name".format(index)] = sighting.name
+        formset = SightingInline(
+            parent_instance=dragonfly,
+            parent_model=Dragonfly,
+            request=RequestFactory().post("/", data),
+        ).formset
+
+        self.assertTrue(formset.is_valid(), formset.errors)
+        formset.save()
+        self.assertEqual(dragonfly.cascadingsighting_set.count(), 3)
+
+    def test_submissions_with_too_many_forms_are_rejected(self):
+        class SightingInline(RelatedInline):
+            fields = ["name"]
+            model = CascadingSighting
+            foreign_key_field = "dragonfly"
+            max_num = 2
+            absolute_max = 3
+
+        dragonfly = Dragonfly.objects.create(name="alpha", age=1)
+        request = RequestFactory().post(
+            "/",
+            {
+                "cascadingsighting_set-TOTAL_FORMS": "1000000",
+                "cascadingsighting_set-INITIAL_FORMS": "0",
+                "cascadingsighting_set-0-name": "new-0",
+            },
+        )
+        formset = SightingInline(
+            parent_instance=dragonfly, parent_model=Dragonfly, request=request
+        ).formset
+
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(formset.forms, [])
+        self.assertEqual(formset.non_form_errors().as_data()[0].code, "too_many_forms")
+
+    def test_max_num_can_be_validated(self):
+        class SightingInline(RelatedInline):
+            fields = ["name"]
+            model = CascadingSighting
+            foreign_key_field = "dragonfly"
+            max_num = 1
+            validate_max = True
+
+        dragonfly = Dragonfly.objects.create(name="alpha", age=1)
+        request = RequestFactory().post(
+            "/",
+            {
+                "cascadingsighting_set-TOTAL_FORMS": "2",
+                "cascadingsighting_set-INITIAL_FORMS": "0",
+                "cascadingsighting_set-0-name": "new-0",
+                "cascadingsighting_set-1-name": "new-1",
+            },
+        )
+        formset = SightingInline(
+            parent_instance=dragonfly, parent_model=Dragonfly, request=request
+        ).formset
+
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(formset.non_form_errors().as_data()[0].code, "too_many_forms")
+
+
+class ChangedOnlyCascadingSightingInline(RelatedInline):
+    fields = ["name"]
+    model = CascadingSighting
+    foreign_key_field = "dragonfly"
+    submit_changed_only = True
+
+
+class SubmitChangedOnlyTest(TestCase):
+    def setUp(self):
+        self.dragonfly = Dragonfly.objects.create(name="alpha", age=1)
+        self.sightings = [
+            CascadingSighting.objects.create(
+                name="sighting-{}".format(i), dragonfly=self.dragonfly
+            )
+            for i in range(4)
+        ]
+        self.manifest = ChangedOnlyCascadingSightingInline(
+            parent_instance=self.dragonfly, parent_model=Dragonfly
+        ).formset.changed_only_manifest
+
+    def get_formset(self, data):
+        request = RequestFactory().post("/", data)
+        return ChangedOnlyCascadingSightingInline(
+            parent_instance=self.dragonfly, parent_model=Dragonfly, request=request
+        ).formset
+
+    def get_data(self, **forms):
+        data = {
+            "cascadingsighting_set-TOTAL_FORMS": "5",
+            "cascadingsighting_set-INITIAL_FORMS": "4",
+            "cascadingsighting_set-MANIFEST": self.manifest,
+        }
+        for index, name in forms.items():
+            prefix = "cascadingsighting_set-{}-".format(index[1:])
+            if int(index[1:]) < len(self.sightings):
+                data[prefix + "id"] = str(self.sightings[int(index[1:])].pk)
+            data[prefix + "name"] = name
+        return data
+
+    def test_only_submitted_forms_are_validated_and_saved(self):
+        formset = self.get_formset(self.get_data(f2="changed", f4="new"))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(formset.is_valid())
+        self.assertEqual(len(formset.forms), 2)
+        # loading the submitted object and validating its id
+        self.assertEqual(len(queries), 2)
+
+        formset.save()
+
+        self.assertEqual(
+            list(
+                self.dragonfly.cascadingsighting_set.order_by("pk").values_list(
+                    "name", flat=True
+                )
+            ),
+            ["sighting-0", "sighting-1", "changed", "sighting-3", "new"],
+        )
+
+    def test_concurrent_changes_are_rejected(self):
+        CascadingSighting.objects.filter(pk=self.sightings[1].pk).update(
+            name="someone-else"
+        )
+
+        formset = self.get_formset(self.get_data(f1="mine", f3="changed"))
+
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(
+            formset.forms[0].non_field_errors().as_data()[0].code,
+            "concurrent_change",
+        )
+        self.assertEqual(formset.forms[1].errors, {})
+        self.assertEqual(
+            CascadingSighting.objects.get(pk=self.sightings[1].pk).name,
+            "someone-else",
+        )
+
+    def test_submissions_without_a_valid_manifest_are_rejected(self):
+        data = self.get_data(f2="changed")
+        data["cascadingsighting_set-MANIFEST"] = "tampered"
+
+        formset = self.get_formset(data)
+
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(
+            formset.non_form_errors().as_data()[0].code, "invalid_manifest"
+        )
+
+    def test_manifests_of_other_formsets_are_rejected(self):
+        other = Dragonfly.objects.create(name="omega", age=2)
+        other_manifest = ChangedOnlyCascadingSightingInline(
+            parent_instance=other, parent_model=Dragonfly
+        ).formset.changed_only_manifest
+        fingerprints = {
+            str(sighting.pk): get_fingerprint(sighting) for sighting in self.sightings
+        }
+        for manifest in [
+            other_manifest,
+            dump_manifest(fingerprints, self.dragonfly.pk, "other_prefix"),
+        ]:
+            data = self.get_data(f2="changed")
+            data["cascadingsighting_set-MANIFEST"] = manifest
+
+            formset = self.get_formset(data)
+
+            self.assertFalse(formset.is_valid())
+            self.assertEqual(
+                formset.non_form_errors().as_data()[0].code, "invalid_manifest"
+            )
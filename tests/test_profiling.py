@@ -0,0 +1,100 @@
+import os
+import pstats
+import tempfile
+from io import StringIO
+
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from test_views import user_with_perms
+from testapp.models import Dragonfly
+from testapp.views import DragonflyViewSet
+
+from beam.profiling import FacetProfiler, ProfileReport, normalize_sql
+
+
+class FacetProfilerTest(TestCase):
+    def setUp(self):
+        self.alpha = Dragonfly.objects.create(name="alpha", age=12)
+        self.alpha.sighting_set.create(name="Berlin")
+        self.user = user_with_perms(
+            ["testapp.view_dragonfly", "testapp.view_sighting"], username="profiler"
+        )
+
+    def test_profile_detail(self):
+        report = FacetProfiler(DragonflyViewSet(), "detail").profile(
+            url_kwargs={"pk": self.alpha.pk}, user=self.user
+        )
+        self.assertEqual(report.status_code, 200)
+        self.assertEqual(report.url, "/dragonfly/{}/".format(self.alpha.pk))
+        self.assertTrue(report.queries)
+        self.assertGreater(report.timings["permissions"].calls, 0)
+        self.assertGreater(report.timings["reverse"].calls, 0)
+        self.assertGreater(report.timings["templates"].calls, 0)
+        self.assertEqual(report.timings["inlines"].calls, 1)
+
+    def test_session_is_deleted(self):
+        FacetProfiler(DragonflyViewSet(), "detail").profile(
+            url_kwargs={"pk": self.alpha.pk}, user=self.user
+        )
+        self.assertFalse(Session.objects.exists())
+
+    def test_duplicate_and_similar_queries(self):
+        report = ProfileReport(
+            url="/",
+            status_code=200,
+            duration=0.0,
+            queries=[
+                {"sql": "SELECT 1 FROM a WHERE id = 1", "time": "0.001"},
+                {"sql": "SELECT 1 FROM a WHERE id = 1", "time": "0.001"},
+                {"sql": "SELECT 1 FROM a WHERE id = 2", "time": "0.001"},
+                {"sql": "SELECT 1 FROM b WHERE name = 'x'", "time": "0.001"},
+            ],
+            timings={},
+        )
+        self.assertEqual(
+            report.get_duplicate_queries(), [("SELECT 1 FROM a WHERE id = 1", 2)]
+        )
+        self.assertEqual(
+            report.get_similar_queries(), [("SELECT ? FROM a WHERE id = ?", 3)]
+        )
+        self.assertEqual(
+            normalize_sql("SELECT 'it''s' FROM t1 WHERE x = 1.5"),
+            "SELECT ? FROM t1 WHERE x = ?",
+        )
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            stats_file = os.path.join(directory, "list.prof")
+            out = StringIO()
+            call_command(
+                "beam_profile",
+                "testapp.views.DragonflyViewSet",
+                "list",
+                query="o=name",
+                user="profiler",
+                profile_output=stats_file,
+                stdout=out,
+            )
+            self.assertTrue(pstats.Stats(stats_file).total_calls)
+
+        output = out.getvalue()
+        self.assertIn("GET /dragonfly/?o=name -> 200", output)
+        self.assertIn("SQL: ", output)
+        self.assertIn("Permissions: ", output)
+        self.assertIn("Templates: ", output)
+
+    def test_command_errors(self):
+        with self.assertRaises(CommandError):
+            call_command("beam_profile", "testapp.views.DragonflyViewSet", "nope")
+        with self.assertRaises(CommandError):
+            call_command(
+                "beam_profile", "testapp.views.DragonflyViewSet", "list", user="nobody"
+            )
+        with self.assertRaises(CommandError):
+            call_command(
+                "beam_profile",
+                "testapp.views.DragonflyViewSet",
+                "detail",
+                kwarg=["pk"],
+            )
@@ -0,0 +1,150 @@
+import time
+from unittest import mock
+
+import django_filters
+from django import forms
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from testapp.models import Dragonfly, Sighting
+
+from beam.reference import (
+    ReferenceModelRegistry,
+    reference_models,
+    use_reference_choices,
+)
+
+
+class SightingForm(forms.ModelForm):
+    class Meta:
+        model = Sighting
+        fields = ["name", "dragonfly"]
+
+
+class SightingFilterSet(django_filters.FilterSet):
+    class Meta:
+        model = Sighting
+        fields = ["dragonfly"]
+
+
+def dragonfly_queries(queries):
+    return [
+        query
+        for query in queries.captured_queries
+        if 'FROM "testapp_dragonfly"' in query["sql"]
+    ]
+
+
+class ReferenceModelTest(TestCase):
+    def setUp(self):
+        reference_models.register(Dragonfly)
+        self.addCleanup(reference_models.unregister, Dragonfly)
+        Dragonfly.objects.create(name="alpha", age=1)
+
+    def render_form(self):
+        form = SightingForm()
+        use_reference_choices(form)
+        return str(form["dragonfly"])
+
+    def test_choices_are_cached_across_forms(self):
+        self.render_form()
+
+        with CaptureQueriesContext(connection) as queries:
+            html = self.render_form()
+
+        self.assertEqual(dragonfly_queries(queries), [])
+        self.assertIn("alpha", html)
+
+    def test_saving_and_deleting_invalidates_the_choices(self):
+        self.render_form()
+
+        beta = Dragonfly.objects.create(name="beta", age=2)
+        self.assertIn("beta", self.render_form())
+
+        beta.delete()
+        self.assertNotIn("beta", self.render_form())
+
+    def test_other_models_are_not_cached(self):
+        reference_models.unregister(Dragonfly)
+        self.render_form()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.render_form()
+
+        self.assertEqual(len(dragonfly_queries(queries)), 1)
+
+    def test_filtersets_keep_their_null_choice(self):
+        class NullableSightingFilterSet(SightingFilterSet):
+            dragonfly = django_filters.ModelChoiceFilter(
+                queryset=Dragonfly.objects.all(), null_label="none"
+            )
+
+        form = NullableSightingFilterSet().form
+        use_reference_choices(form)
+        str(form["dragonfly"])
+
+        with CaptureQueriesContext(connection) as queries:
+            form = NullableSightingFilterSet().form
+            use_reference_choices(form)
+            html = str(form["dragonfly"])
+
+        self.assertEqual(dragonfly_queries(queries), [])
+        self.assertIn("none", html)
+        self.assertIn("alpha", html)
+
+    def test_validation_still_uses_the_queryset(self):
+        dragonfly = Dragonfly.objects.get()
+        self.render_form()
+        dragonfly.delete()
+        Dragonfly.objects.create(name="gamma", age=3)
+
+        form = SightingForm(data={"name": "x", "dragonfly": dragonfly.pk})
+        use_reference_choices(form)
+
+        self.assertFalse(form.is_valid())
+        self.assertIn("dragonfly", form.errors)
+
+    @override_settings(BEAM_REFERENCE_CACHE="default")
+    def test_choices_can_be_stored_in_djangos_cache(self):
+        self.addCleanup(caches["default"].clear)
+        self.render_form()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.render_form()
+        self.assertEqual(dragonfly_queries(queries), [])
+
+        Dragonfly.objects.create(name="beta", age=2)
+        self.assertIn("beta", self.render_form())
+
+
+class ReferenceModelRegistryTest(TestCase):
+    def test_m2m_changes_invalidate_the_choices(self):
+        from django.contrib.auth.models import Group, Permission
+
+        registry = ReferenceModelRegistry()
+        registry.register(Group)
+        self.addCleanup(registry.unregister, Group)
+        group = Group.objects.create(name="staff")
+        version = registry.get_version(Group)
+
+        group.permissions.add(Permission.objects.first())
+
+        self.assertNotEqual(registry.get_version(Group), version)
+
+    def test_choices_cached_in_the_process_expire_after_the_timeout(self):
+        registry = ReferenceModelRegistry()
+        registry.register(Dragonfly, timeout=60)
+        self.addCleanup(registry.unregister, Dragonfly)
+        Dragonfly.objects.create(name="alpha", age=1)
+        registry.get_objects(Dragonfly.objects.all())
+
+        # e.g. changed by another process, which doesn't invalidate this one
+        Dragonfly.objects.update(name="omega")
+        names = [obj.name for obj in registry.get_objects(Dragonfly.objects.all())]
+        self.assertEqual(names, ["alpha"])
+
+        now = time.monotonic()
+        with mock.patch("beam.cache.time.monotonic", return_value=now + 61):
+            objects = registry.get_objects(Dragonfly.objects.all())
+        self.assertEqual([obj.name for obj in objects], ["omega"])
@@ -1,10 +1,24 @@
-from beam.registry import default_registry, unregister
+from beam.registry import (
+    default_registry,
+    get_registry_index,
+    get_viewset_for_model,
+    unregister,
+)
+from beam.utils import navigation_facet_entry
 from beam.viewsets import ViewSet
+from django.contrib.contenttypes.models import ContentType
 from django.test import TestCase
+from test_views import user_with_perms
 from testapp.models import Dragonfly, Petaluridae
 from testapp.views import DragonflyViewSet
 
 
+class ProxyDragonfly(Dragonfly):
+    class Meta:
+        app_label = "testapp"
+        proxy = True
+
+
 class RegistryTest(TestCase):
     def test_registry_contains_viewset(self):
         self.assertIs(default_registry["testapp"]["dragonfly"], DragonflyViewSet)
@@ -55,3 +69,74 @@ class RegistryTest(TestCase):
 
         self.assertIs(default_registry["testapp"]["dragonfly"], DragonflyViewSet)
         self.assertIs(custom_registry["testapp"]["dragonfly"], AnotherDragonFlyViewSet)
+
+
+class RegistryIndexTest(TestCase):
+    def test_lookup_by_model_falls_back_to_concrete_model(self):
+        self.assertIs(
+            get_viewset_for_model(default_registry, Dragonfly), DragonflyViewSet
+        )
+        self.assertIs(
+            get_viewset_for_model(default_registry, ProxyDragonfly), DragonflyViewSet
+        )
+        with self.assertRaises(KeyError):
+            get_viewset_for_model({}, Dragonfly)
+
+    def test_registered_proxy_model_takes_precedence(self):
+        custom_registry = {}
+
+        class ProxyDragonflyViewSet(ViewSet):
+            registry = custom_registry
+            model = ProxyDragonfly
+
+        index = get_registry_index(custom_registry)
+        self.assertIs(index.get_viewset(ProxyDragonfly), ProxyDragonflyViewSet)
+        self.assertIsNone(index.get_viewset(Dragonfly))
+
+    def test_index_is_rebuilt_on_registration(self):
+        custom_registry = {}
+        index = get_registry_index(custom_registry)
+        self.assertIs(get_registry_index(custom_registry), index)
+
+        class CustomDragonflyViewSet(ViewSet):
+            registry = custom_registry
+            model = Dragonfly
+
+        self.assertIsNot(get_registry_index(custom_registry), index)
+        self.assertIs(
+            get_registry_index(custom_registry).get_viewset(Dragonfly),
+            CustomDragonflyViewSet,
+        )
+
+        unregister(custom_registry, Dragonfly)
+        self.assertIsNone(get_registry_index(custom_registry).get_viewset(Dragonfly))
+
+    def test_lookup_by_content_type(self):
+        index = get_registry_index(default_registry)
+        content_type = ContentType.objects.get_for_model(Dragonfly)
+        self.assertIs(
+            index.get_viewset_for_content_type(content_type.pk), DragonflyViewSet
+        )
+        proxy_content_type = ContentType.objects.get_for_model(
+            ProxyDragonfly, for_concrete_model=False
+        )
+        self.assertIs(
+            index.get_viewset_for_content_type(proxy_content_type.pk),
+            DragonflyViewSet,
+        )
+
+    def test_lookup_by_url_name(self):
+        index = get_registry_index(default_registry)
+        facet = index.get_facet("testapp_dragonfly_list")
+        self.assertEqual(facet.name, "list")
+        self.assertIs(facet.model, Dragonfly)
+        self.assertIs(index.get_instance(DragonflyViewSet).facets["list"], facet)
+        self.assertIsNone(index.get_facet("testapp_dragonfly_missing"))
+
+    def test_navigation_facet_entry_by_url_name(self):
+        user = user_with_perms(["testapp.view_dragonfly"])
+        self.assertEqual(
+            navigation_facet_entry("testapp_dragonfly_list", user=user),
+            (Dragonfly._meta.verbose_name_plural, "/dragonfly/"),
+        )
+        self.assertIsNone(navigation_facet_entry("testapp_dragonfly_missing"))
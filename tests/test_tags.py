@@ -1,3 +1,5 @@
+from unittest import mock
+
 from django.template import RequestContext
 from django.test import RequestFactory, TestCase
 from django.urls import NoReverseMatch
@@ -5,6 +7,7 @@ from test_views import user_with_perms
 from testapp.models import Dragonfly
 from testapp.views import DragonflyViewSet
 
+from beam.facets import BaseFacet
 from beam.templatetags.beam_tags import (
     _add_params_to_url_if_new,
     get_apps_for_navigation,
@@ -78,6 +81,32 @@ class TagsTest(TestCase):
             [("dragonflys", "/dragonfly/"), ("sightings", "/sighting/")],
         )
 
+    def test_apps_for_navigation_is_cached_by_permissions(self):
+        def get_apps(user):
+            request = RequestFactory().get("/")
+            request.user = user
+            return get_apps_for_navigation(
+                context=RequestContext(request, {"request": request})
+            )
+
+        first = get_apps(user_with_perms(["testapp.view_dragonfly"], username="a"))
+
+        with mock.patch.object(
+            DragonflyViewSet, "__init__", side_effect=AssertionError
+        ), mock.patch.object(BaseFacet, "reverse", side_effect=AssertionError):
+            second = get_apps(user_with_perms(["testapp.view_dragonfly"], username="b"))
+        self.assertIs(first, second)
+
+        other = get_apps(
+            user_with_perms(
+                ["testapp.view_dragonfly", "testapp.view_sighting"], username="c"
+            )
+        )
+        self.assertEqual(
+            other[0]["entries"],
+            [("dragonflys", "/dragonfly/"), ("sightings", "/sighting/")],
+        )
+
     def test_apps_for_navigation_require_permission(self):
         request = RequestFactory().get("/")
         request.user = user_with_perms([])
@@ -1,11 +1,17 @@
 from unittest import mock
 
+from django.contrib.auth.models import AnonymousUser
 from django.test import TestCase
 from django.urls import NoReverseMatch
 from test_views import user_with_perms
 from testapp.views import DragonflyViewSet, SightingViewSet
 
-from beam.utils import check_permission, navigation_facet_entry, reverse_facet
+from beam.utils import (
+    check_permission,
+    navigation_facet_entry,
+    permission_fingerprint,
+    reverse_facet,
+)
 
 
 class CheckPermissionsTest(TestCase):
@@ -34,6 +40,15 @@ class CheckPermissionsTest(TestCase):
     def test_check_any_permission_with_no_user_implies_false(self):
         self.assertFalse(check_permission(lambda *args: True, user=None, obj=None))
 
+    def test_permission_fingerprint_is_shared_by_equal_permissions(self):
+        one = user_with_perms(["testapp.view_dragonfly"], username="one")
+        two = user_with_perms(["testapp.view_dragonfly"], username="two")
+        three = user_with_perms(["testapp.change_dragonfly"], username="three")
+
+        self.assertEqual(permission_fingerprint(one), permission_fingerprint(two))
+        self.assertNotEqual(permission_fingerprint(one), permission_fingerprint(three))
+        self.assertEqual(permission_fingerprint(AnonymousUser()), "anonymous")
+
     def test_navigation_entry_handles_empty(self):
         self.assertEqual(navigation_facet_entry(None), None)
 
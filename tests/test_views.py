@@ -1,7 +1,16 @@
 from unittest import TestCase, mock
 
+from asgiref.sync import iscoroutinefunction, sync_to_async
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+from django.db import DatabaseError, connection
+from django.db.models import Count
+from django.forms import modelformset_factory
+from django.http import Http404
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.translation import gettext as _
 from django_webtest import WebTest
@@ -14,7 +23,17 @@ from testapp.models import (
 )
 from testapp.views import DragonflyViewSet, ExtraView, SightingViewSet
 
-from beam.views import CreateView, DetailView, ListView, UpdateView
+from beam import RelatedInline, ViewSet
+from beam.layouts import QueryVirtualField
+from beam.utils import CreateRelatedUrls
+from beam.views import (
+    AsyncDetailView,
+    AsyncListView,
+    CreateView,
+    DetailView,
+    ListView,
+    UpdateView,
+)
 
 
 def user_with_perms(perms, username="foo", password="bar", user_model=None):
@@ -833,6 +852,26 @@ class ViewTest(WebTest):
 
         self.assertTrue(dragonfly.sighting_set.exists())
 
+    def test_update_with_inlines_is_atomic(self):
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        response = self.app.get(
+            DragonflyViewSet().links["update"].reverse(alpha),
+            user=user_with_perms(
+                ["testapp.view_dragonfly", "testapp.change_dragonfly"]
+            ),
+        )
+        form = response.form
+        form["name"] = "first"
+
+        with mock.patch(
+            "beam.inlines.RelatedInlineFormSet.save", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                form.submit()
+
+        alpha.refresh_from_db()
+        self.assertEqual(alpha.name, "alpha")
+
     def test_navigation(self):
         user = user_with_perms(["testapp.view_dragonfly", "testapp.view_sighting"])
         base_page = self.app.get(reverse("base-template"), user=user)
@@ -996,3 +1035,672 @@ class InlinePaginationTest(WebTest):
         )
         self.assertContains(dashboard_view_all, 'href="/sighting/"')
         self.assertNotContains(dashboard_view_all, 'href="/sighting/create/"')
+
+
+class ConditionalGetTest(WebTest):
+    def test_detail_not_modified(self):
+        user = user_with_perms(["testapp.view_dragonfly"])
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        url = DragonflyViewSet().links["detail"].reverse(alpha)
+
+        response = self.app.get(url, user=user)
+        etag = response.headers["ETag"]
+
+        not_modified = self.app.get(
+            url, user=user, headers={"If-None-Match": etag}, status=304
+        )
+        self.assertEqual(not_modified.body, b"")
+
+        alpha.name = "beta"
+        alpha.save()
+
+        modified = self.app.get(url, user=user, headers={"If-None-Match": etag})
+        self.assertEqual(modified.status_code, 200)
+        self.assertContains(modified, "beta")
+
+    def test_detail_without_inlines_is_last_modified(self):
+        class PlainDragonflyViewSet(ViewSet):
+            registry = {}
+            model = Dragonfly
+            fields = ["name", "age"]
+            version_field = "updated_at"
+            conditional_get = True
+
+        viewset = PlainDragonflyViewSet()
+        view = viewset._get_view(viewset.facets["detail"])
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        request = RequestFactory().get("/dragonfly/{}/".format(alpha.pk))
+        request.user = user_with_perms(["testapp.view_dragonfly"])
+
+        response = view(request, pk=alpha.pk)
+
+        self.assertIn("Last-Modified", response.headers)
+
+    def test_detail_etag_depends_on_inlines(self):
+        user = user_with_perms(["testapp.view_dragonfly"])
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        url = DragonflyViewSet().links["detail"].reverse(alpha)
+        etag = self.app.get(url, user=user).headers["ETag"]
+
+        Sighting.objects.create(name="Berlin", dragonfly=alpha)
+
+        self.app.get(url, user=user, headers={"If-None-Match": etag}, status=200)
+
+    def test_detail_not_modified_does_not_build_inlines(self):
+        viewset = DragonflyViewSet()
+        view = viewset._get_view(viewset.facets["detail"])
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        user = user_with_perms(["testapp.view_dragonfly"])
+
+        def get(**headers):
+            request = RequestFactory().get("/", **headers)
+            request.user = user
+            return view(request, pk=alpha.pk)
+
+        etag = get().headers["ETag"]
+        with mock.patch.object(DetailView, "get_inlines") as get_inlines:
+            with CaptureQueriesContext(connection) as queries:
+                response = get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        get_inlines.assert_not_called()
+        # the object and one aggregate per inline class
+        self.assertEqual(len(queries), 1 + len(viewset.inline_classes))
+
+    def test_detail_is_rendered_after_inline_action(self):
+        user = user_with_perms(
+            [
+                "testapp.view_dragonfly",
+                "testapp.view_sighting",
+                "testapp.change_sighting",
+                "testapp.delete_sighting",
+            ]
+        )
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        Sighting.objects.create(name="Berlin", dragonfly=alpha)
+        url = DragonflyViewSet().links["detail"].reverse(alpha)
+        detail_page = self.app.get(url, user=user)
+
+        # renaming changes neither the dragonfly nor the number of sightings
+        form = detail_page.forms["sighting_set-action-form"]
+        form["_action_choice"] = "sighting_set-1-update_selected"
+        form["_action_select_across"] = "all"
+        form["sighting_set-1-update_selected-name"] = "Hamburg"
+        form.submit()
+        response = self.app.get(
+            url,
+            user=user,
+            headers={"If-None-Match": detail_page.headers["ETag"]},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Hamburg")
+        self.assertContains(response, "Updated 1 sightings")
+
+    def test_etag_depends_on_user(self):
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        url = DragonflyViewSet().links["detail"].reverse(alpha)
+
+        response = self.app.get(
+            url, user=user_with_perms(["testapp.view_dragonfly"], username="one")
+        )
+        other_response = self.app.get(
+            url,
+            user=user_with_perms(["testapp.view_dragonfly"], username="other"),
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        self.assertEqual(other_response.status_code, 200)
+
+    def test_list_not_modified(self):
+        user = user_with_perms(["testapp.view_dragonfly"])
+        Dragonfly.objects.create(name="alpha", age=47)
+        url = DragonflyViewSet().links["list"].reverse()
+
+        etag = self.app.get(url, user=user).headers["ETag"]
+        self.app.get(url, user=user, headers={"If-None-Match": etag}, status=304)
+
+        # the query string is part of the etag
+        self.app.get(
+            url + "?page=1", user=user, headers={"If-None-Match": etag}, status=200
+        )
+
+        Dragonfly.objects.create(name="omega", age=99)
+        self.app.get(url, user=user, headers={"If-None-Match": etag}, status=200)
+
+    def test_list_not_modified_after_delete(self):
+        user = user_with_perms(["testapp.view_dragonfly"])
+        Dragonfly.objects.create(name="alpha", age=47)
+        omega = Dragonfly.objects.create(name="omega", age=99)
+        url = DragonflyViewSet().links["list"].reverse()
+
+        etag = self.app.get(url, user=user).headers["ETag"]
+        Dragonfly.objects.filter(pk=omega.pk).delete()
+        self.app.get(url, user=user, headers={"If-None-Match": etag}, status=200)
+
+    def test_conditional_get_is_opt_in(self):
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        sighting = Sighting.objects.create(name="Berlin", dragonfly=alpha)
+        response = self.app.get(
+            SightingViewSet().links["detail"].reverse(sighting),
+            user=user_with_perms(["testapp.view_sighting"]),
+        )
+        self.assertNotIn("ETag", response.headers)
+
+
+class RowCacheTest(WebTest):
+    def setUp(self):
+        caches["default"].clear()
+
+        class RowCacheDragonflyViewSet(ViewSet):
+            registry = {}
+            model = Dragonfly
+            fields = ["name", "age"]
+            version_field = "updated_at"
+            list_row_cache = True
+
+        self.viewset = RowCacheDragonflyViewSet()
+        self.view = self.viewset._get_view(self.viewset.facets["list"])
+        self.user = user_with_perms(["testapp.view_dragonfly"])
+
+    def render_list(self):
+        request = RequestFactory().get("/dragonfly/")
+        request.user = self.user
+        response = self.view(request)
+        response.render()
+        return response.content.decode()
+
+    def test_unchanged_rows_are_served_from_cache(self):
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        self.assertIn("alpha", self.render_list())
+
+        # update() does not touch updated_at so the stale row is served
+        Dragonfly.objects.filter(pk=alpha.pk).update(name="beta")
+        self.assertIn("alpha", self.render_list())
+
+        alpha.refresh_from_db()
+        alpha.save()
+        self.assertIn("beta", self.render_list())
+
+    def test_rows_are_fetched_with_one_round_trip(self):
+        Dragonfly.objects.create(name="alpha", age=47)
+        Dragonfly.objects.create(name="omega", age=99)
+        self.render_list()
+
+        cache = caches["default"]
+        with mock.patch.object(
+            cache, "get_many", wraps=cache.get_many
+        ) as get_many, mock.patch.object(cache, "set_many") as set_many:
+            self.render_list()
+
+        get_many.assert_called_once()
+        set_many.assert_not_called()
+
+    def test_rows_with_object_permissions_are_cached_per_user(self):
+        class ObjectPermissionDragonflyViewSet(ViewSet):
+            registry = {}
+            model = Dragonfly
+            fields = ["name", "age"]
+            version_field = "updated_at"
+            list_row_cache = True
+            update_permission = staticmethod(
+                lambda user, obj=None: user.username == "owner"
+            )
+
+        viewset = ObjectPermissionDragonflyViewSet()
+        self.view = viewset._get_view(viewset.facets["list"])
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        update_url = viewset.links["update"].reverse(alpha)
+
+        self.user = user_with_perms(["testapp.view_dragonfly"], username="owner")
+        self.assertIn(update_url, self.render_list())
+
+        self.user = user_with_perms(["testapp.view_dragonfly"], username="other")
+        self.assertNotIn(update_url, self.render_list())
+
+    def test_rows_with_related_objects_are_not_cached(self):
+        custom_registry = {}
+
+        class ObjectPermissionDragonflyViewSet(ViewSet):
+            registry = custom_registry
+            model = Dragonfly
+            fields = ["name", "age"]
+            detail_permission = staticmethod(
+                lambda user, obj=None: user.username == "owner"
+            )
+
+        class RowCacheSightingViewSet(ViewSet):
+            registry = custom_registry
+            model = Sighting
+            fields = ["name", "dragonfly"]
+            version_field = "created_at"
+            list_row_cache = True
+
+        viewset = RowCacheSightingViewSet()
+        self.view = viewset._get_view(viewset.facets["list"])
+        alpha = Dragonfly.objects.create(name="alpha", age=47)
+        Sighting.objects.create(name="berlin", dragonfly=alpha)
+        detail_url = ObjectPermissionDragonflyViewSet().links["detail"].reverse(alpha)
+        perms = ["testapp.view_sighting", "testapp.view_dragonfly"]
+
+        self.user = user_with_perms(perms, username="owner")
+        self.assertIn(detail_url, self.render_list())
+
+        self.user = user_with_perms(perms, username="other")
+        self.assertNotIn(detail_url, self.render_list())
+
+        Dragonfly.objects.filter(pk=alpha.pk).update(name="omega")
+        self.assertIn("omega", self.render_list())
+
+
+class AsyncViewTest(WebTest):
+    def setUp(self):
+        class AsyncDragonflyViewSet(DragonflyViewSet):
+            registry = {}
+            async_views = True
+
+        self.viewset = AsyncDragonflyViewSet()
+        self.user = user_with_perms(["testapp.view_dragonfly"])
+        self.alpha = Dragonfly.objects.create(name="alpha", age=47)
+        for index in range(6):
+            Dragonfly.objects.create(name="omega{}".format(index), age=index)
+
+    def get_view(self, name):
+        return self.viewset._get_view(self.viewset.facets[name])
+
+    def get_request(self, user=None, **kwargs):
+        request = AsyncRequestFactory().get("/", **kwargs)
+        request.user = user or self.user
+        return request
+
+    def test_async_views_are_opt_in(self):
+        viewset = DragonflyViewSet()
+        self.assertIs(viewset._get_view_class(viewset.facets["list"]), ListView)
+
+        with override_settings(ASGI_APPLICATION="testapp.asgi.application"):
+            self.assertIs(viewset._get_view_class(viewset.facets["list"]), ListView)
+
+        with override_settings(BEAM_ASYNC_VIEWS=True):
+            facets = viewset.facets
+            self.assertIs(viewset._get_view_class(facets["list"]), AsyncListView)
+            self.assertIs(viewset._get_view_class(facets["detail"]), AsyncDetailView)
+            self.assertIs(viewset._get_view_class(facets["update"]), UpdateView)
+            # customized views are kept
+            self.assertIs(viewset._get_view_class(facets["extra"]), ExtraView)
+
+            viewset.async_views = False
+            self.assertIs(viewset._get_view_class(facets["list"]), ListView)
+
+    async def test_list(self):
+        view = self.get_view("list")
+        self.assertTrue(iscoroutinefunction(view))
+
+        response = await view(self.get_request())
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn("alpha", content)
+        self.assertIn("omega3", content)
+        # paginated by 5
+        self.assertNotIn("omega4", content)
+        self.assertIn('data-object-count="7"', content)
+
+    async def test_list_runs_the_dispatch_of_the_sync_view(self):
+        class TracingListView(ListView):
+            def dispatch(self, request, *args, **kwargs):
+                # querying is fine, dispatch runs in a thread
+                self.traced = Dragonfly.objects.filter(name="alpha").exists()
+                return super().dispatch(request, *args, **kwargs)
+
+            def get_context_data(self, **kwargs):
+                context = super().get_context_data(**kwargs)
+                context["traced"] = self.traced
+                return context
+
+        class AsyncTracingListView(AsyncListView, TracingListView):
+            pass
+
+        class TracingDragonflyViewSet(DragonflyViewSet):
+            registry = {}
+            async_views = True
+            list_view_class = TracingListView
+            list_async_view_class = AsyncTracingListView
+
+        viewset = TracingDragonflyViewSet()
+        view = viewset._get_view(viewset.facets["list"])
+
+        response = await view(self.get_request())
+
+        self.assertTrue(response.context_data["traced"])
+
+    async def test_list_search_and_show_all(self):
+        response = await self.get_view("list")(
+            self.get_request(data={"q": "omega", "show_all": "1"})
+        )
+        content = response.content.decode()
+        self.assertNotIn("alpha", content)
+        self.assertIn("omega5", content)
+
+    async def test_list_requires_permission(self):
+        user = await sync_to_async(user_with_perms)([], username="nobody")
+        with self.assertRaises(PermissionDenied):
+            await self.get_view("list")(self.get_request(user=user))
+
+    async def test_list_not_modified(self):
+        view = self.get_view("list")
+        response = await view(self.get_request())
+        etag = response.headers["ETag"]
+
+        not_modified = await view(self.get_request(headers={"If-None-Match": etag}))
+        self.assertEqual(not_modified.status_code, 304)
+
+    async def test_detail(self):
+        view = self.get_view("detail")
+        response = await view(self.get_request(), pk=self.alpha.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("alpha", response.content.decode())
+
+        not_modified = await view(
+            self.get_request(headers={"If-None-Match": response.headers["ETag"]}),
+            pk=self.alpha.pk,
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.assertRaises(Http404):
+            await view(self.get_request(), pk=0)
+
+
+class SortingTest(WebTest):
+    def setUp(self):
+        class AnnotatedDragonflyViewSet(ViewSet):
+            registry = {}
+            model = Dragonfly
+            fields = ["name", "age"]
+            list_fields = ["name", "sighting_count"]
+            list_annotations = {"sighting_count": Count("sighting")}
+
+        class SortedSightingViewSet(ViewSet):
+            registry = {}
+            model = Sighting
+            fields = ["name", "dragonfly"]
+            list_sort_fields = ["name", "dragonfly__name"]
+
+        self.dragonfly_viewset = AnnotatedDragonflyViewSet()
+        self.sighting_viewset = SortedSightingViewSet()
+        self.user = user_with_perms(["testapp.view_dragonfly", "testapp.view_sighting"])
+
+        alpha = Dragonfly.objects.create(name="alpha", age=12)
+        omega = Dragonfly.objects.create(name="omega", age=99)
+        alpha.sighting_set.create(name="alpha-in-berlin")
+        for name in ["omega-in-paris", "omega-in-rome"]:
+            omega.sighting_set.create(name=name)
+
+    def get_view(self, viewset, query=""):
+        request = RequestFactory().get("/?" + query)
+        request.user = self.user
+        facet = viewset.facets["list"]
+        view = facet.view_class(viewset=viewset, facet=facet)
+        view.setup(request)
+        return view
+
+    def render(self, viewset, query=""):
+        request = RequestFactory().get("/?" + query)
+        request.user = self.user
+        response = viewset._get_view(viewset.facets["list"])(request)
+        response.render()
+        return response.content.decode()
+
+    def test_sort_by_annotation(self):
+        view = self.get_view(self.dragonfly_viewset, "o=-sighting_count")
+        self.assertIn("sighting_count", view.get_sort_fields())
+        self.assertEqual(
+            [dragonfly.name for dragonfly in view.get_queryset()], ["omega", "alpha"]
+        )
+        self.assertEqual(
+            [dragonfly.sighting_count for dragonfly in view.get_queryset()], [2, 1]
+        )
+
+        content = self.render(self.dragonfly_viewset, "o=sighting_count")
+        self.assertLess(content.index("alpha"), content.index("omega"))
+
+    def test_sort_by_related_path(self):
+        view = self.get_view(self.sighting_viewset, "o=-dragonfly__name,name")
+        self.assertEqual(
+            [sighting.name for sighting in view.get_queryset()],
+            ["omega-in-paris", "omega-in-rome", "alpha-in-berlin"],
+        )
+        content = self.render(self.sighting_viewset, "o=dragonfly__name,-name")
+        self.assertLess(
+            content.index("alpha-in-berlin"), content.index("omega-in-rome")
+        )
+        self.assertLess(content.index("omega-in-rome"), content.index("omega-in-paris"))
+
+    def test_only_single_valued_paths_are_sortable(self):
+        view = self.get_view(self.sighting_viewset)
+        self.assertEqual(
+            view.get_sort_column_for_field("dragonfly__name"), "dragonfly__name"
+        )
+        self.assertIsNone(view.get_sort_column_for_field("dragonfly__nope"))
+        self.assertIsNone(view.get_sort_column_for_field("name__dragonfly"))
+
+        view = self.get_view(self.dragonfly_viewset)
+        self.assertIsNone(view.get_sort_column_for_field("sighting__name"))
+
+    def test_ordering_ends_with_the_primary_key(self):
+        view = self.get_view(self.sighting_viewset, "o=-dragonfly__name")
+        self.assertEqual(
+            view.get_queryset().query.order_by, ("-dragonfly__name", "-pk")
+        )
+
+        view = self.get_view(self.sighting_viewset, "o=name,-pk")
+        self.assertEqual(view.get_queryset().query.order_by, ("name", "pk"))
+
+        view = self.get_view(self.dragonfly_viewset, "o=-sighting_count")
+        self.assertEqual(view.get_queryset().query.order_by, ("-sighting_count", "-pk"))
+
+        # the default ordering of the model
+        view = self.get_view(self.dragonfly_viewset)
+        self.assertEqual(
+            view.get_queryset().query.order_by,
+            (*Dragonfly._meta.ordering, "pk"),
+        )
+
+
+class QueryVirtualFieldTest(WebTest):
+    def setUp(self):
+        sighting_count = QueryVirtualField(
+            "sighting_count", Count("sighting"), verbose_name="number of sightings"
+        )
+
+        class CountingDragonflyViewSet(ViewSet):
+            registry = {}
+            model = Dragonfly
+            fields = ["name", "age"]
+            list_fields = ["name", sighting_count]
+            list_filterset_fields = ["name", "sighting_count"]
+            detail_fields = ["name", sighting_count]
+
+        self.viewset = CountingDragonflyViewSet()
+        self.user = user_with_perms(["testapp.view_dragonfly", "testapp.view_sighting"])
+        self.alpha = Dragonfly.objects.create(name="alpha", age=12)
+        self.omega = Dragonfly.objects.create(name="omega", age=99)
+        self.alpha.sighting_set.create(name="berlin")
+        for name in ["paris", "rome", "tokyo"]:
+            self.omega.sighting_set.create(name=name)
+
+    def render(self, facet_name, query="", **kwargs):
+        request = RequestFactory().get("/?" + query)
+        request.user = self.user
+        response = self.viewset._get_view(self.viewset.facets[facet_name])(
+            request, **kwargs
+        )
+        response.render()
+        return response
+
+    def test_values_are_fetched_with_the_rows(self):
+        content = self.render("list").content.decode()
+        self.assertIn("Number of sightings", content)
+        self.assertRegex(content, r'beam-field-sighting_count">\s*3\s*</td>')
+        self.assertIn("Sighting count", content)
+
+        with CaptureQueriesContext(connection) as few:
+            self.render("list")
+        for index in range(5):
+            Dragonfly.objects.create(name="dragonfly {}".format(index), age=index)
+        with CaptureQueriesContext(connection) as many:
+            self.render("list")
+        self.assertEqual(len(few), len(many))
+
+    def test_sort_and_filter(self):
+        response = self.render("list", "o=-sighting_count")
+        self.assertEqual(
+            [dragonfly.name for dragonfly in response.context_data["object_list"]],
+            ["omega", "alpha"],
+        )
+
+        response = self.render("list", "filter-sighting_count=1")
+        self.assertEqual(
+            [dragonfly.name for dragonfly in response.context_data["object_list"]],
+            ["alpha"],
+        )
+
+    def test_detail(self):
+        response = self.render("detail", pk=self.omega.pk)
+        self.assertEqual(response.context_data["object"].__dict__["sighting_count"], 3)
+        self.assertIn("Number of sightings", response.content.decode())
+
+    def test_inline_values_are_fetched_with_the_rows(self):
+        reference_count = QueryVirtualField(
+            "reference_count", Count("sightingreference"), verbose_name="references"
+        )
+
+        class CountingSightingInline(RelatedInline):
+            model = Sighting
+            foreign_key_field = "dragonfly"
+            fields = ["name"]
+            layout = [[["name", reference_count]]]
+
+        self.viewset.inline_classes = [CountingSightingInline]
+        paris = self.omega.sighting_set.get(name="paris")
+        for _index in range(2):
+            SightingReference.objects.create(sighting=paris)
+
+        response = self.render("detail", pk=self.omega.pk)
+        (inline,) = response.context_data["inlines"]
+        self.assertEqual(
+            {
+                sighting.name: sighting.__dict__["reference_count"]
+                for sighting in inline.get_queryset()
+            },
+            {"paris": 2, "rome": 0, "tokyo": 0},
+        )
+        self.assertIn("References", response.content.decode())
+
+        with CaptureQueriesContext(connection) as few:
+            self.render("detail", pk=self.omega.pk)
+        for index in range(5):
+            self.omega.sighting_set.create(name="sighting {}".format(index))
+        with CaptureQueriesContext(connection) as many:
+            self.render("detail", pk=self.omega.pk)
+        self.assertEqual(len(few), len(many))
+
+    def test_value_without_annotation(self):
+        field = QueryVirtualField("sighting_count", Count("sighting"))
+        alpha = Dragonfly.objects.get(pk=self.alpha.pk)
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertWarns(RuntimeWarning):
+                self.assertIsNone(field.get_value(alpha))
+        self.assertEqual(len(queries), 0)
+
+
+class ObjectFetchedOnceTest(WebTest):
+    def setUp(self):
+        self.alpha = Dragonfly.objects.create(name="alpha", age=12)
+        self.alpha.sighting_set.create(name="berlin")
+        self.user = user_with_perms(
+            [
+                "testapp.view_dragonfly",
+                "testapp.change_dragonfly",
+                "testapp.delete_dragonfly",
+                "testapp.view_sighting",
+                "testapp.change_sighting",
+                "testapp.delete_sighting",
+            ]
+        )
+        self.links = DragonflyViewSet().links
+
+    def object_queries(self, queries):
+        table = Dragonfly._meta.db_table
+        return [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith("SELECT")
+            and 'FROM "{}"'.format(table) in query["sql"]
+            and '"{}"."id" = {}'.format(table, self.alpha.pk) in query["sql"]
+        ]
+
+    def assertFetchedOnce(self, request):
+        with CaptureQueriesContext(connection) as queries:
+            response = request()
+        self.assertEqual(len(self.object_queries(queries)), 1)
+        return response
+
+    def test_detail(self):
+        url = self.links["detail"].reverse(self.alpha)
+        self.assertFetchedOnce(lambda: self.app.get(url, user=self.user))
+
+    def test_inline_action(self):
+        detail_page = self.app.get(
+            self.links["detail"].reverse(self.alpha), user=self.user
+        )
+        form = detail_page.forms["sighting_set-action-form"]
+        form["_action_choice"] = "sighting_set-0-delete"
+        form["_action_select_across"] = "all"
+        self.assertFetchedOnce(form.submit)
+        self.assertFalse(self.alpha.sighting_set.exists())
+
+    def test_update(self):
+        url = self.links["update"].reverse(self.alpha)
+        page = self.assertFetchedOnce(lambda: self.app.get(url, user=self.user))
+        form = page.form
+        form["name"] = "beta"
+        self.assertFetchedOnce(form.submit)
+        self.alpha.refresh_from_db()
+        self.assertEqual(self.alpha.name, "beta")
+
+    def test_delete(self):
+        url = self.links["delete"].reverse(self.alpha)
+        page = self.assertFetchedOnce(lambda: self.app.get(url, user=self.user))
+        self.assertFetchedOnce(page.form.submit)
+        self.assertFalse(Dragonfly.objects.exists())
+
+
+class CreateRelatedUrlTest(WebTest):
+    def test_create_url_is_rendered_for_related_fields(self):
+        sighting = Sighting.objects.create(name="berlin")
+        user = user_with_perms(
+            ["testapp.change_sighting", "testapp.add_dragonfly"], username="bar"
+        )
+        page = self.app.get(
+            SightingViewSet().links["update"].reverse(sighting), user=user
+        )
+        self.assertContains(page, 'data-create-url="/dragonfly/create/?_popup=')
+
+        user = user_with_perms(["testapp.change_sighting"], username="baz")
+        page = self.app.get(
+            SightingViewSet().links["update"].reverse(sighting), user=user
+        )
+        self.assertNotContains(page, "data-create-url")
+
+    def test_create_url_is_resolved_once_per_form_class_and_field(self):
+        formset = modelformset_factory(Sighting, fields=["name", "dragonfly"], extra=5)(
+            queryset=Sighting.objects.none()
+        )
+        request = RequestFactory().get("/")
+        request.user = user_with_perms(["testapp.add_dragonfly"])
+        urls = CreateRelatedUrls({}, request)
+        with mock.patch(
+            "beam.utils.get_related_facet_url", return_value="/create/"
+        ) as get_related_facet_url:
+            for form in formset:
+                self.assertEqual(urls.get(form, "dragonfly"), "/create/")
+                urls.get(form, "name")
+        self.assertEqual(get_related_facet_url.call_count, 2)
@@ -1,9 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict
 from unittest.mock import Mock
 
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.views import View
+from testapp.models import Dragonfly
 
 from beam.facets import BaseFacet, Facet
+from beam.views import FacetMixin
 from beam.viewsets import BaseViewSet, undefined
 
 
@@ -66,9 +72,8 @@ class ViewsetTest(TestCase):
         viewset = ViewSet()
         facet = viewset.facets["test"]
 
-        self.assertEqual(
-            viewset._get_view(facet).__wrapped__, ViewSet.view_class.as_view()
-        )
+        self.assertEqual(viewset._get_view(facet), ViewSet.view_class.as_view())
+        ViewSet.view_class.as_view.assert_any_call(viewset=viewset, facet=facet)
 
     def test_resolve_facet_kwargs(self):
         class ViewSet(BaseViewSet):
@@ -137,3 +142,60 @@ class ViewsetTest(TestCase):
             test_arg = None
 
         self.assertIsNone(ViewSet()._resolve_facet_kwargs("test", ["arg"])["arg"])
+
+
+class EchoView(FacetMixin, View):
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(
+            "{} {} {}".format(
+                self.viewset.__class__.__name__, self.viewset.name, self.facet.name
+            )
+        )
+
+
+class ConcurrentViewTest(SimpleTestCase):
+    def test_views_are_bound_to_their_viewset_under_concurrency(self):
+        class EchoViewSet(BaseViewSet):
+            registry = None
+            model = Dragonfly
+            permission = None
+
+            one_facet = Facet
+            one_view_class = EchoView
+            one_url = "one/"
+
+            two_facet = Facet
+            two_view_class = EchoView
+            two_url = "two/"
+
+            def __init__(self, name):
+                super().__init__()
+                self.name = name
+
+        class OtherEchoViewSet(EchoViewSet):
+            pass
+
+        views = []
+        for viewset in [
+            EchoViewSet("a"),
+            EchoViewSet("b"),
+            OtherEchoViewSet("c"),
+            OtherEchoViewSet("d"),
+        ]:
+            for facet in viewset.facets.values():
+                expected = "{} {} {}".format(
+                    viewset.__class__.__name__, viewset.name, facet.name
+                )
+                views.append((viewset._get_view(facet), expected))
+
+        def call(index):
+            view, expected = views[index % len(views)]
+            request = RequestFactory().get("/")
+            request.user = AnonymousUser()
+            return view(request).content.decode(), expected
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(call, range(2000)))
+
+        for content, expected in results:
+            self.assertEqual(content, expected)
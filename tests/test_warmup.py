@@ -0,0 +1,155 @@
+from io import StringIO
+from types import ModuleType
+from unittest import mock
+
+from django.apps import apps
+from django.core.management import CommandError, call_command
+from django.core.signals import request_started
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+from django.urls import include, path
+from testapp.models import Dragonfly, Sighting
+from testapp.views import DragonflyViewSet, SightingInline
+
+from beam import RelatedInline, ViewSet, registry
+from beam.registry import default_registry, is_frozen
+from beam.warmup import WarmUpReport, warm_up
+
+
+class BrokenInline(RelatedInline):
+    model = Sighting
+    foreign_key_field = "does_not_exist"
+
+
+def make_urlconf(*viewsets):
+    urlconf = ModuleType("urls")
+    urlconf.urlpatterns = [
+        path("{}/".format(index), include(viewset().get_urls()))
+        for index, viewset in enumerate(viewsets)
+    ]
+    return urlconf
+
+
+class WarmUpTest(TestCase):
+    def setUp(self):
+        # warming up freezes the registry, undo that after each test
+        patcher = mock.patch.dict(registry._frozen_registries)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_warm_up_builds_and_freezes_the_registry(self):
+        custom_registry = {}
+
+        class CustomDragonflyViewSet(DragonflyViewSet):
+            registry = custom_registry
+
+        urlconf = make_urlconf(CustomDragonflyViewSet, DragonflyViewSet)
+        report = warm_up(custom_registry, urlconf)
+
+        self.assertTrue(is_frozen(custom_registry))
+        self.assertFalse(is_frozen(default_registry))
+        # only the served facets of the viewsets of the registry are warmed up
+        self.assertEqual(report.viewsets, 1)
+        self.assertEqual(report.facets, len(urlconf.urlpatterns[0].url_patterns))
+        self.assertEqual(report.errors, [])
+
+        with self.assertWarns(UserWarning):
+
+            class LateViewSet(ViewSet):
+                registry = custom_registry
+                model = Sighting
+                fields = ["name"]
+
+        self.assertNotIn("sighting", custom_registry["testapp"])
+
+    def test_formset_classes_are_built_once(self):
+        request = RequestFactory().get("/")
+        request.user = None
+
+        custom_registry = {}
+
+        class CustomDragonflyViewSet(DragonflyViewSet):
+            registry = custom_registry
+
+        warm_up(custom_registry, make_urlconf(CustomDragonflyViewSet))
+
+        with mock.patch("beam.inlines.inlineformset_factory") as factory:
+            inline = SightingInline(
+                parent_instance=Dragonfly(), parent_model=Dragonfly, request=request
+            )
+            inline.get_formset_class()
+        factory.assert_not_called()
+
+    def test_formset_classes_depend_on_the_fields_of_the_instance(self):
+        class PerRequestSightingInline(SightingInline):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                if self.request.GET.get("all"):
+                    self.fields = ["name", "dragonfly"]
+
+        classes = {}
+        for query in ["all", ""]:
+            request = RequestFactory().get("/", {"all": query})
+            request.user = None
+            inline = PerRequestSightingInline(
+                parent_instance=Dragonfly(), parent_model=Dragonfly, request=request
+            )
+            classes[query] = inline.get_formset_class()
+
+        self.assertEqual(list(classes["all"].form.base_fields), ["name", "dragonfly"])
+        self.assertEqual(list(classes[""].form.base_fields), ["name"])
+
+    def test_errors_are_collected(self):
+        custom_registry = {}
+
+        class BrokenViewSet(ViewSet):
+            registry = custom_registry
+            model = Dragonfly
+            fields = ["name"]
+            inline_classes = [BrokenInline]
+
+        report = warm_up(custom_registry, make_urlconf(BrokenViewSet))
+        self.assertEqual(len(report.errors), 1)
+        self.assertIs(report.errors[0][0], BrokenViewSet)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("beam_warm_up", stdout=out)
+        self.assertIn("Warmed up", out.getvalue())
+        self.assertTrue(is_frozen(default_registry))
+
+        failed = WarmUpReport(1, 0, 0.0, [(DragonflyViewSet, ValueError("broken"))])
+        with mock.patch(
+            "beam.management.commands.beam_warm_up.warm_up", return_value=failed
+        ):
+            err = StringIO()
+            with self.assertRaises(CommandError):
+                call_command("beam_warm_up", stdout=StringIO(), stderr=err)
+        self.assertIn("DragonflyViewSet", err.getvalue())
+
+    def test_ready_warms_up_on_the_first_request_if_enabled(self):
+        config = apps.get_app_config("beam")
+        self.addCleanup(request_started.disconnect, dispatch_uid="beam.apps.warm_up")
+        with mock.patch("beam.warmup.warm_up") as warm_up_mock:
+            config.ready()
+            request_started.send(sender=None)
+            warm_up_mock.assert_not_called()
+
+            warm_up_mock.return_value = WarmUpReport(1, 1, 0.0, [])
+            with override_settings(BEAM_WARM_UP=True):
+                config.ready()
+            warm_up_mock.assert_not_called()
+            request_started.send(sender=None)
+            request_started.send(sender=None)
+            warm_up_mock.assert_called_once_with()
+
+            warm_up_mock.reset_mock()
+            warm_up_mock.return_value = WarmUpReport(
+                1, 0, 0.0, [(DragonflyViewSet, ValueError("broken"))]
+            )
+            with override_settings(BEAM_WARM_UP=True):
+                config.ready()
+            # errors are logged instead of failing the request
+            with self.assertLogs("beam.apps", level="ERROR"):
+                request_started.send(sender=None)
+            warm_up_mock.assert_called_once_with()
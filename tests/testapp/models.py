@@ -5,6 +5,8 @@ class Dragonfly(models.Model):
     name = models.CharField(max_length=255)
     age = models.IntegerField()
 
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return self.name
 
@@ -44,3 +46,9 @@ class CascadingSighting(models.Model):
 
 class SightingReference(models.Model):
     sighting = models.ForeignKey(Sighting, on_delete=models.PROTECT)
+
+
+class OrderedSighting(models.Model):
+    name = models.CharField(max_length=255)
+    dragonfly = models.ForeignKey(Dragonfly, on_delete=models.CASCADE)
+    order = models.IntegerField(default=0)
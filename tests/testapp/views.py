@@ -89,6 +89,8 @@ class DragonflyViewSet(ViewSet):
     list_filterset_class = DragonflyFilterSet
     list_action_classes = [DeleteAction, DragonFlyUpdateAction]
     list_paginate_by = 5
+    version_field = "updated_at"
+    conditional_get = True
 
     extra_facet = ExtraFacet
     extra_view_class = ExtraView